@@ -7,6 +7,9 @@ import subprocess
 import platform
 import os
 import logging
+import threading
+import time
+import urllib.request
 
 app = Flask(__name__)
 
@@ -16,6 +19,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Chrome processes launched by this service, keyed by debug port
+launched = {}
+launch_lock = threading.Lock()
+
+def devtools_ready(port):
+    """Check whether a Chrome DevTools endpoint answers on the port"""
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/json/version', timeout=1) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+def wait_for_devtools(port, process, timeout):
+    """
+    Poll the DevTools endpoint with backoff until it answers or the deadline passes
+    
+    Returns:
+        float: Seconds until ready, or None on timeout / Chrome exiting with an error
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    delay = 0.05
+    
+    while True:
+        if devtools_ready(port):
+            return round(time.monotonic() - start, 3)
+        
+        # Exit code 0 means Chrome handed the URLs to an already running browser
+        if process.poll() not in (None, 0):
+            return None
+        
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+
+def stop_process(process, grace=5):
+    """Terminate a launched Chrome (and its children on Windows, where it runs under a shell)"""
+    if process.poll() is not None:
+        return
+    
+    if platform.system() == 'Windows':
+        subprocess.run(['taskkill', '/PID', str(process.pid), '/T', '/F'], capture_output=True)
+    else:
+        process.terminate()
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def instance_info(port):
+    """Describe the Chrome instance on a port"""
+    entry = launched.get(port)
+    info = {
+        'port': port,
+        'running': devtools_ready(port),
+        'launched_by_helper': entry is not None
+    }
+    if entry:
+        info.update({
+            'pid': entry['process'].pid,
+            'process_alive': entry['process'].poll() is None,
+            'launched_at': entry['launched_at'],
+            'launch_latency': entry['launch_latency']
+        })
+    return info
+
 def get_chrome_path():
     """Get Chrome executable path based on OS"""
     system = platform.system()
@@ -47,11 +119,17 @@ def health():
     """Health check endpoint"""
     return jsonify({'status': 'ok', 'system': platform.system()})
 
+@app.route('/status', methods=['GET'])
+def status():
+    """Report the Chrome instance on a port and how long its launch took"""
+    port = request.args.get('port', 9222, type=int)
+    return jsonify(instance_info(port))
+
 @app.route('/launch-chrome', methods=['POST'])
 def launch_chrome():
     """Launch Chrome with provided configuration"""
     try:
-        data = request.json
+        data = request.json or {}
         
         chrome_path = data.get('chrome_path')
         if not chrome_path:
@@ -63,7 +141,8 @@ def launch_chrome():
                 'error': 'Chrome executable not found'
             }), 404
         
-        port = data.get('chrome_debug_port', 9222)
+        port = int(data.get('chrome_debug_port', 9222))
+        startup_timeout = data.get('timing', {}).get('chrome_startup_timeout', 20)
         user_data_dir = data.get('chrome_user_data_dir', '')
         baselinker_url = data.get('baselinker_url', '')
         b2b_hendi_url = data.get('b2b_hendi_url', '')
@@ -84,17 +163,58 @@ def launch_chrome():
         if b2b_hendi_url:
             cmd.append(b2b_hendi_url)
         
-        logger.info(f"Launching Chrome: {' '.join(cmd)}")
+        # One launch per port at a time; repeated clicks get the live instance
+        with launch_lock:
+            if devtools_ready(port):
+                logger.info(f"Chrome already running on port {port}")
+                return jsonify({
+                    'success': True,
+                    'already_running': True,
+                    'message': 'Chrome already running',
+                    **instance_info(port)
+                })
+            
+            # A launched Chrome that is alive but not answering yet is still starting
+            entry = launched.get(port)
+            if entry and entry['process'].poll() is None:
+                logger.warning(f"Chrome on port {port} is still starting (pid {entry['process'].pid})")
+                return jsonify({
+                    'success': False,
+                    'error': f'Chrome on port {port} is still starting',
+                    **instance_info(port)
+                }), 409
+            
+            logger.info(f"Launching Chrome: {' '.join(cmd)}")
+            
+            # Launch Chrome
+            if platform.system() == 'Windows':
+                process = subprocess.Popen(cmd, shell=True)
+            else:
+                process = subprocess.Popen(cmd)
+            
+            latency = wait_for_devtools(port, process, startup_timeout)
+            if latency is None:
+                # Do not leave an untracked Chrome holding the profile
+                stop_process(process)
+            launched[port] = {
+                'process': process,
+                'launched_at': time.time(),
+                'launch_latency': latency
+            }
         
-        # Launch Chrome
-        if platform.system() == 'Windows':
-            subprocess.Popen(cmd, shell=True)
-        else:
-            subprocess.Popen(cmd)
+        if latency is None:
+            logger.error(f"Chrome debug port {port} did not open within {startup_timeout}s")
+            return jsonify({
+                'success': False,
+                'error': f'Chrome debug port {port} did not open within {startup_timeout}s; the launch was stopped'
+            }), 504
         
+        logger.info(f"Chrome ready on port {port} after {latency}s")
         return jsonify({
             'success': True,
-            'message': 'Chrome launched successfully'
+            'already_running': False,
+            'message': 'Chrome launched successfully',
+            **instance_info(port)
         })
         
     except Exception as e:
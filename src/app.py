@@ -1,27 +1,24 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context, send_file, g
 import json
 import logging
 import os
 import sys
+import threading
+import time
+from collections import deque
 from chrome_manager import ChromeManager
-from extractors import OrderCoordinator, B2BExtractor
+from order_store import OrderStore
+from logging_setup import setup_logging, apply_log_levels, get_log_file
+from extractors import OrderCoordinator, TimingProfile, SkuCatalog
+from extractors.flight_recorder import FlightRecordStore
+from extractors.driver_lifecycle import DriverLifecycle
+from browser_jobs import BrowserJobs
+from order_scheduler import OrderScheduler
+from request_profiler import SamplingProfiler, ProfileStore, wants_profile
+from driver_broker import BrokerClient
 
 app = Flask(__name__)
 
-# Setup logging with UTF-8 encoding for Windows
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-# Disable Flask's default request logging to reduce log clutter
-log = logging.getLogger('werkzeug')
-log.setLevel(logging.WARNING)
-
 # Fix console encoding for Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -39,7 +36,121 @@ def load_config():
         logger.error("Config file not found")
         return {}
 
+# Setup queued logging (background writer, rotation, gzip archives)
+log_listener = setup_logging(load_config())
+
+# Disable Flask's default request logging to reduce log clutter
+log = logging.getLogger('werkzeug')
+log.setLevel(logging.WARNING)
+
+def merge_config(base, updates):
+    """Recursively merge updates into base, keeping keys the UI does not send"""
+    merged = dict(base)
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def request_deadline():
+    """Time budget in seconds for this call ('deadline' in the JSON body or query), or None for the config default"""
+    data = request.get_json(silent=True) or {}
+    deadline = data.get('deadline', request.args.get('deadline'))
+    try:
+        return float(deadline) if deadline is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def ndjson_stream(events):
+    """Stream events as newline-delimited JSON"""
+    return Response(
+        stream_with_context(json.dumps(event, ensure_ascii=False) + '\n' for event in events),
+        mimetype='application/x-ndjson'
+    )
+
 chrome_manager = ChromeManager()
+order_store = OrderStore.from_config(load_config())
+browser_jobs = BrowserJobs(order_store, chrome_manager)
+
+# Reap chromedriver processes left by earlier runs and start the idle timer
+# (the broker does this itself when it owns the drivers)
+if not load_config().get('driver_broker', {}).get('enabled'):
+    DriverLifecycle.for_config(load_config())
+
+def browser_call(config, method, **params):
+    """Run a browser job here, or in the driver broker when it is enabled"""
+    settings = config.get('driver_broker', {})
+    if settings.get('enabled'):
+        return BrokerClient(settings).call(method, config=config, **params)
+    return getattr(browser_jobs, method)(config, **params)
+
+def browser_stream(config, method, **params):
+    """Run a streaming browser job here, or in the driver broker when it is enabled"""
+    settings = config.get('driver_broker', {})
+    if settings.get('enabled'):
+        return BrokerClient(settings).stream(method, config=config, **params)
+    return getattr(browser_jobs, method)(config, **params)
+
+def run_scheduled_job(job):
+    """Run a queued order submission as a complete-order browser job"""
+    params = job['_params']
+    return browser_call(
+        load_config(), 'complete_order', products=params['products'], address_data=params['address_data'],
+        payment_amount=params.get('payment_amount'), order_id=params.get('order_id'), deadline=params.get('deadline')
+    )
+
+order_scheduler = OrderScheduler(load_config().get('order_scheduler', {}), run_scheduled_job).start()
+
+def b2b_checkout_pending():
+    """409 response while a prepared B2B checkout waits for the operator, else None"""
+    job = order_scheduler.holder('b2b')
+    if job is None:
+        return None
+    return jsonify({
+        "success": False,
+        "error": f"Checkout of order {job['order_id']} awaits confirmation; "
+                 f"confirm or discard queue job {job['id']} first",
+        "job": job
+    }), 409
+
+@app.before_request
+def start_profile():
+    """Sample this request's stack when asked to (X-Profile header or ?profile=1) and profiling is on"""
+    requested = request.headers.get('X-Profile') or request.args.get('profile')
+    if requested in (None, '', '0', 'false'):
+        return
+    
+    settings = load_config().get('profiling', {})
+    if wants_profile(settings, True):
+        g.profiler = SamplingProfiler(threading.get_ident(), settings.get('interval', 0.005)).start()
+        g.profile_started_at = time.time()
+
+@app.after_request
+def finish_profile(response):
+    """Save the profile once the response (including a streamed body) has been sent"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    
+    store = ProfileStore.for_settings(load_config().get('profiling', {}))
+    name = store.new_name(request.path)
+    summary = {
+        'method': request.method,
+        'endpoint': request.path,
+        'status': response.status_code,
+        'started_at': g.pop('profile_started_at', None)
+    }
+    response.headers['X-Profile-Name'] = name
+    response.call_on_close(lambda: store.save(name, {**summary, **profiler.stop()}))
+    return response
+
+@app.teardown_request
+def discard_profile(exc):
+    """Stop the sampler of a request that failed before after_request ran"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
 
 @app.route('/')
 def index():
@@ -49,21 +160,20 @@ def index():
 def get_status():
     """Check Chrome and tabs status"""
     config = load_config()
-    status = chrome_manager.check_status(config)
+    status = browser_call(config, 'status')
     return jsonify(status)
 
 @app.route('/api/logs')
 def get_logs():
     """Get recent logs from app.log file"""
     try:
-        log_file = 'app.log'
+        log_file = get_log_file(load_config())
         if not os.path.exists(log_file):
             return jsonify({'logs': []})
         
-        # Read last 100 lines from log file
-        with open(log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            recent_lines = lines[-100:] if len(lines) > 100 else lines
+        # Keep only the last 100 lines while streaming through the file
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            recent_lines = list(deque(f, maxlen=100))
             
         return jsonify({'logs': recent_lines})
     except Exception as e:
@@ -74,7 +184,7 @@ def get_logs():
 def launch_chrome():
     """Launch Chrome with configured tabs"""
     config = load_config()
-    result = chrome_manager.launch_chrome(config)
+    result = browser_call(config, 'launch_chrome')
     return jsonify(result)
 
 @app.route('/api/extract-order', methods=['POST'])
@@ -83,13 +193,9 @@ def extract_order():
     try:
         logger.info("Extract order endpoint called")
         config = load_config()
-        port = config.get('chrome_debug_port', 9222)
-        
-        logger.info(f"Creating OrderCoordinator with port {port}")
-        coordinator = OrderCoordinator(chrome_debug_port=port, config=config)
         
-        logger.info("Calling extract_all_order_data()")
-        order_data = coordinator.extract_all_order_data()
+        logger.info(f"Extracting order via Chrome on port {config.get('chrome_debug_port', 9222)}")
+        order_data = browser_call(config, 'extract_order', deadline=request_deadline())
         
         logger.info(f"Extraction complete, success={order_data.get('success')}")
         
@@ -101,6 +207,53 @@ def extract_order():
             "error": str(e)
         }), 500
 
+@app.route('/api/extract-orders', methods=['POST'])
+def extract_orders():
+    """Extract several BaseLinker orders at once in parallel tabs"""
+    data = request.json or {}
+    order_ids = data.get('order_ids', [])
+    
+    if not order_ids:
+        return jsonify({
+            "success": False,
+            "error": "No order ids provided"
+        }), 400
+    
+    try:
+        result = browser_call(load_config(), 'extract_orders', order_ids=order_ids, deadline=request_deadline())
+        
+        return jsonify(result) if result['success'] else (jsonify(result), 500)
+    except Exception as e:
+        logger.error(f"Error extracting orders: {e}", exc_info=True)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/extract-status-orders', methods=['POST'])
+def extract_status_orders():
+    """Extract every order in a BaseLinker status through the BaseLinker API"""
+    data = request.json or {}
+    config = load_config()
+    
+    if not config.get('baselinker_api', {}).get('enabled'):
+        return jsonify({
+            "success": False,
+            "error": "BaseLinker API not enabled (baselinker_api.enabled)"
+        }), 400
+    
+    try:
+        result = browser_call(config, 'extract_status_orders', status_id=data.get('status_id'),
+                              deadline=request_deadline())
+        
+        return jsonify(result) if result['success'] else (jsonify(result), 500)
+    except Exception as e:
+        logger.error(f"Error extracting status orders: {e}", exc_info=True)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get current configuration"""
@@ -111,55 +264,74 @@ def get_config():
 def save_config():
     """Save configuration"""
     try:
-        new_config = request.json
+        new_config = merge_config(load_config(), request.json or {})
         config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.json')
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(new_config, f, indent=2, ensure_ascii=False)
+        apply_log_levels(new_config)
         logger.info("Configuration saved")
         return jsonify({"success": True, "message": "Configuration saved"})
     except Exception as e:
         logger.error(f"Failed to save config: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/timing-profile', methods=['GET'])
+def get_timing_profile():
+    """Get learned step timings and tuned delays"""
+    profile = TimingProfile.for_config(load_config())
+    return jsonify(profile.snapshot())
+
+@app.route('/api/timing-profile', methods=['DELETE'])
+def reset_timing_profile():
+    """Forget learned step timings"""
+    try:
+        TimingProfile.for_config(load_config()).reset()
+        return jsonify({"success": True, "message": "Timing profile reset"})
+    except Exception as e:
+        logger.error(f"Failed to reset timing profile: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/sku-catalog', methods=['GET'])
+def get_sku_catalog():
+    """Get local SKU catalog status"""
+    catalog = SkuCatalog.for_config(load_config())
+    if catalog is None:
+        return jsonify({'enabled': False})
+    return jsonify(catalog.status())
+
+@app.route('/api/validate-skus', methods=['POST'])
+def validate_skus():
+    """Validate products against the local SKU catalog without using the browser"""
+    try:
+        data = request.json or {}
+        products = data.get('products', [])
+        
+        config = load_config()
+        coordinator = OrderCoordinator(chrome_debug_port=config.get('chrome_debug_port', 9222), config=config)
+        validation = coordinator.validate_products(products)
+        
+        if validation is None:
+            return jsonify({"success": False, "error": "SKU catalog is disabled"}), 400
+        
+        return jsonify({"success": True, **validation})
+    except Exception as e:
+        logger.error(f"Error validating SKUs: {e}", exc_info=True)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route('/api/open-import-modal', methods=['POST'])
 def open_import_modal():
     """Open the import products modal on B2B Hendi"""
     try:
         logger.info("Open import modal endpoint called")
-        config = load_config()
-        port = config.get('chrome_debug_port', 9222)
+        result = browser_call(load_config(), 'open_import_modal')
         
-        extractor = B2BExtractor(chrome_debug_port=port, config=config)
-        
-        # Connect to Chrome
-        if not extractor.connect_to_chrome():
-            return jsonify({
-                "success": False,
-                "error": "Could not connect to Chrome"
-            }), 500
-        
-        # Switch to B2B Hendi tab
-        if not extractor.find_b2b_hendi_tab():
-            extractor.close()
-            return jsonify({
-                "success": False,
-                "error": "B2B Hendi tab not found"
-            }), 404
-        
-        # Click the import button
-        result = extractor.click_import_products_button()
-        extractor.close()
-        
-        if result:
-            return jsonify({
-                "success": True,
-                "message": "Import modal opened successfully"
-            })
+        if result['success']:
+            return jsonify(result)
         else:
-            return jsonify({
-                "success": False,
-                "error": "Failed to open import modal"
-            }), 500
+            return jsonify(result), result.pop('status_code', 500)
             
     except Exception as e:
         logger.error(f"Error opening import modal: {e}", exc_info=True)
@@ -184,12 +356,11 @@ def import_products():
                 "error": "No products provided"
             }), 400
         
-        config = load_config()
-        port = config.get('chrome_debug_port', 9222)
+        pending = b2b_checkout_pending()
+        if pending:
+            return pending
         
-        # Use OrderCoordinator for simplified import
-        coordinator = OrderCoordinator(chrome_debug_port=port, config=config)
-        result = coordinator.import_products_to_b2b(products)
+        result = browser_call(load_config(), 'import_products', products=products, deadline=request_deadline())
         
         if result['success']:
             return jsonify(result)
@@ -227,25 +398,30 @@ def complete_order():
                 "error": "No address data provided"
             }), 400
         
+        pending = b2b_checkout_pending()
+        if pending:
+            return pending
+        
         # Prepare address data for B2B format
-        address_data = {
-            'name': address.get('company', ''),
-            'phone': address.get('phone', ''),
-            'email': data.get('email', ''),
-            'street': address.get('address', ''),
-            'street_no': '.',
-            'street_flat': '',
-            'zip': address.get('postal_code', ''),
-            'city': address.get('city', '')
-        }
+        address_data = OrderCoordinator.build_address_data(address, data.get('email', ''))
         
-        config = load_config()
-        port = config.get('chrome_debug_port', 9222)
+        # Run through the scheduler so the B2B rate limit, concurrency cap and checkout hold apply
+        params = {
+            "products": products,
+            "address_data": address_data,
+            "payment_amount": payment_amount,
+            "order_id": data.get('order_id'),
+            "priority": data.get('priority', 'express'),
+            "deadline": request_deadline()
+        }
+        operator = data.get('operator') or request.headers.get('X-Operator') or request.remote_addr
+        job = order_scheduler.submit(params, operator=operator)
+        job = order_scheduler.wait(job['id'], load_config().get('order_scheduler', {}).get('sync_timeout', 600))
         
-        # Use OrderCoordinator for complete order
-        coordinator = OrderCoordinator(chrome_debug_port=port, config=config)
-        result = coordinator.complete_order_with_address(products, address_data, payment_amount)
+        if job['status'] in ('queued', 'running'):
+            return jsonify({"success": False, "error": "Order still queued or running", "job": job}), 202
         
+        result = {**job['result'], "job_id": job['id']}
         if result['success']:
             return jsonify(result)
         else:
@@ -258,5 +434,251 @@ def complete_order():
             "error": str(e)
         }), 500
 
+@app.route('/api/queue', methods=['POST'])
+def queue_order():
+    """Queue a complete-order submission; express and paid orders run before cash on delivery"""
+    data = request.json or {}
+    products = data.get('products', [])
+    address = data.get('address', {})
+    
+    if not products or not address:
+        return jsonify({
+            "success": False,
+            "error": "Products and address data are required"
+        }), 400
+    
+    params = {
+        "products": products,
+        "address_data": OrderCoordinator.build_address_data(address, data.get('email', '')),
+        "payment_amount": data.get('payment_amount'),
+        "order_id": data.get('order_id'),
+        "priority": data.get('priority'),
+        "express": data.get('express', False),
+        "delivery_method": data.get('delivery_method')
+    }
+    operator = data.get('operator') or request.headers.get('X-Operator') or request.remote_addr
+    
+    job = order_scheduler.submit(params, operator=operator)
+    return jsonify({"success": True, "job": job}), 202
+
+@app.route('/api/queue', methods=['GET'])
+def get_queue():
+    """Queue depth per priority class and operator, wait times and site limits"""
+    return jsonify(order_scheduler.snapshot())
+
+@app.route('/api/queue/<job_id>', methods=['GET'])
+def get_queued_job(job_id):
+    """Status and, once finished, result of a queued job"""
+    job = order_scheduler.job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/api/queue/<job_id>/confirm', methods=['POST'])
+def confirm_queued_job(job_id):
+    """Record that the operator submitted a job's checkout and let the next B2B job run (body: optional b2b_number)"""
+    data = request.get_json(silent=True) or {}
+    job = order_scheduler.job(job_id)
+    if job is None or job['status'] != 'awaiting_confirmation':
+        return jsonify({"success": False, "error": "Job not awaiting confirmation"}), 409
+    
+    # Without a number the order would stay a draft, so keep the hold until one is given
+    b2b_number = data.get('b2b_number') or job['result'].get('draft_b2b_number')
+    if job['order_id'] is not None and not b2b_number:
+        return jsonify({"success": False, "error": "Enter the B2B order number to confirm"}), 400
+    
+    job = order_scheduler.release(job_id, 'confirmed')
+    if job is None:
+        return jsonify({"success": False, "error": "Job not awaiting confirmation"}), 409
+    
+    if job['order_id'] is not None:
+        b2b_number = order_store.confirm(job['order_id'], b2b_number)
+    return jsonify({"success": True, "job": job, "b2b_number": b2b_number})
+
+@app.route('/api/queue/<job_id>/discard', methods=['POST'])
+def discard_queued_job(job_id):
+    """Record that a job's checkout was abandoned and let the next B2B job run"""
+    job = order_scheduler.release(job_id, 'discarded')
+    if job is None:
+        return jsonify({"success": False, "error": "Job not awaiting confirmation"}), 409
+    
+    if job['order_id'] is not None:
+        order_store.discard(job['order_id'])
+    return jsonify({"success": True, "job": job})
+
+@app.route('/api/queue/<job_id>', methods=['DELETE'])
+def cancel_queued_job(job_id):
+    """Drop a job that has not started yet"""
+    if not order_scheduler.cancel(job_id):
+        return jsonify({"success": False, "error": "Job not queued"}), 409
+    return jsonify({"success": True})
+
+@app.route('/api/consolidate-orders', methods=['POST'])
+def consolidate_orders():
+    """Merge several orders (extracted ones, or order ids to extract) into one B2B import"""
+    data = request.json or {}
+    orders = data.get('orders')
+    order_ids = data.get('order_ids')
+    address = data.get('address', {})
+    
+    if not orders and not order_ids:
+        return jsonify({
+            "success": False,
+            "error": "No orders provided"
+        }), 400
+    
+    pending = b2b_checkout_pending()
+    if pending:
+        return pending
+    
+    try:
+        address_data = OrderCoordinator.build_address_data(address, data.get('email', '')) if address else None
+        result = browser_call(
+            load_config(), 'consolidate_orders', orders=orders, order_ids=order_ids, address_data=address_data,
+            payment_amount=data.get('payment_amount'), deadline=request_deadline()
+        )
+        
+        return jsonify(result) if result['success'] else (jsonify(result), 500)
+    except Exception as e:
+        logger.error(f"Error consolidating orders: {e}", exc_info=True)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/orders', methods=['GET'])
+def get_order_history():
+    """Get recently processed orders (?awaiting=1: checkouts not yet confirmed or discarded)"""
+    if request.args.get('awaiting') in ('1', 'true'):
+        return jsonify({'orders': order_store.awaiting_confirmation()})
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'orders': order_store.recent_orders(limit)})
+
+@app.route('/api/orders/<order_id>', methods=['GET'])
+def get_order(order_id):
+    """Get one BaseLinker order with its extraction/completion history"""
+    order = order_store.get_order(order_id)
+    if order is None:
+        return jsonify({"success": False, "error": "Order not found"}), 404
+    return jsonify(order)
+
+@app.route('/api/orders/<order_id>/confirm', methods=['POST'])
+def confirm_order(order_id):
+    """Mark an order as placed after the operator submitted its checkout (body: optional b2b_number)"""
+    data = request.get_json(silent=True) or {}
+    b2b_number = order_store.confirm(order_id, data.get('b2b_number'))
+    if b2b_number is None:
+        return jsonify({"success": False, "error": "Order not found or no B2B number to confirm"}), 404
+    
+    job_id = order_scheduler.awaiting_job(order_id)
+    if job_id is not None:
+        order_scheduler.release(job_id, 'confirmed')
+    return jsonify({"success": True, "order_id": order_id, "b2b_number": b2b_number})
+
+@app.route('/api/orders/<order_id>/discard', methods=['POST'])
+def discard_order(order_id):
+    """Forget an abandoned checkout so the order is offered again"""
+    if not order_store.discard(order_id):
+        return jsonify({"success": False, "error": "Order not found"}), 404
+    
+    job_id = order_scheduler.awaiting_job(order_id)
+    if job_id is not None:
+        order_scheduler.release(job_id, 'discarded')
+    return jsonify({"success": True, "order_id": order_id})
+
+@app.route('/api/orders/by-b2b/<b2b_number>', methods=['GET'])
+def get_order_by_b2b_number(b2b_number):
+    """Find the BaseLinker order linked to a B2B order number"""
+    order = order_store.find_by_b2b_number(b2b_number)
+    if order is None:
+        return jsonify({"success": False, "error": "Order not found"}), 404
+    return jsonify(order)
+
+@app.route('/api/flight-records', methods=['GET'])
+def get_flight_records():
+    """List failure snapshots (driver commands, DOM and screenshot), newest first"""
+    store = FlightRecordStore.for_settings(load_config().get('flight_recorder', {}))
+    return jsonify({'records': store.list(), 'max_bytes': store.max_bytes})
+
+@app.route('/api/flight-records/<name>/<filename>', methods=['GET'])
+def get_flight_record_file(name, filename):
+    """Download one file of a flight record"""
+    store = FlightRecordStore.for_settings(load_config().get('flight_recorder', {}))
+    path = store.file_path(name, filename)
+    if path is None:
+        return jsonify({"success": False, "error": "Flight record file not found"}), 404
+    return send_file(path, as_attachment=filename.endswith('.gz'))
+
+@app.route('/api/profiles', methods=['GET'])
+def get_profiles():
+    """List request profiles (wall/CPU time and Python/IO/sleep split), newest first"""
+    store = ProfileStore.for_settings(load_config().get('profiling', {}))
+    return jsonify({'profiles': store.list(), 'max_files': store.max_files})
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Download one profile; ?format=folded gives collapsed stacks for flame graph tools"""
+    store = ProfileStore.for_settings(load_config().get('profiling', {}))
+    path = store.file_path(name)
+    if path is None:
+        return jsonify({"success": False, "error": "Profile not found"}), 404
+    if request.args.get('format') == 'folded':
+        with open(path, 'r', encoding='utf-8') as f:
+            folded = '\n'.join(json.load(f).get('folded', [])) + '\n'
+        return Response(folded, mimetype='text/plain',
+                        headers={'Content-Disposition': f'attachment; filename={name[:-5]}.folded'})
+    return send_file(path, as_attachment=True)
+
+@app.route('/api/timelines', methods=['GET'])
+def get_timelines():
+    """List recent job timelines, newest first"""
+    return jsonify({'timelines': browser_call(load_config(), 'timelines')})
+
+@app.route('/api/timelines/<timeline_id>', methods=['GET'])
+def get_timeline(timeline_id):
+    """Get the spans of one job for the waterfall view"""
+    timeline = browser_call(load_config(), 'timeline', timeline_id=timeline_id)
+    if timeline is None:
+        return jsonify({"success": False, "error": "Timeline not found"}), 404
+    return jsonify(timeline)
+
+@app.route('/api/drivers', methods=['GET'])
+def get_drivers():
+    """Chromedriver process counts, memory and caps"""
+    return jsonify(browser_call(load_config(), 'drivers'))
+
+@app.route('/api/large-order/extract', methods=['POST'])
+def extract_large_order():
+    """Extract a large order, streaming product batches as NDJSON"""
+    logger.info("Large order extract endpoint called")
+    return ndjson_stream(browser_stream(load_config(), 'stream_large_order_extraction',
+                                        deadline=request_deadline()))
+
+@app.route('/api/large-order/import', methods=['POST'])
+def import_large_order():
+    """Import a large order in chunks, streaming progress per chunk as NDJSON"""
+    logger.info("Large order import endpoint called")
+    
+    data = request.json or {}
+    products = data.get('products', [])
+    address = data.get('address', {})
+    
+    if not products:
+        return jsonify({
+            "success": False,
+            "error": "No products provided"
+        }), 400
+    
+    pending = b2b_checkout_pending()
+    if pending:
+        return pending
+    
+    address_data = OrderCoordinator.build_address_data(address, data.get('email', '')) if address else None
+    
+    return ndjson_stream(browser_stream(
+        load_config(), 'stream_large_order_import', products=products, address_data=address_data,
+        payment_amount=data.get('payment_amount'), order_id=data.get('order_id'), deadline=request_deadline()
+    ))
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
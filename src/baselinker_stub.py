@@ -0,0 +1,183 @@
+"""
+BaseLinker API Stub
+Local stand-in for api.baselinker.com/connector.php answering getOrders from
+generated (or fixture) orders, with BaseLinker's 100-orders-per-page paging,
+for testing the BaseLinker API extractor without a real account
+
+Point baselinker_api.url at it and use the printed token:
+    python baselinker_stub.py --orders 500 --port 5060
+    (config) "baselinker_api": {"enabled": true, "url": "http://127.0.0.1:5060/connector.php", "token": "stub-token"}
+
+Usage:
+    python baselinker_stub.py --orders 500 --status-id 26890
+    python baselinker_stub.py --fixture orders.json --latency 0.2
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+PAGE_SIZE = 100
+
+
+def generate_orders(count, status_id, seed=1, first_id=100000):
+    """
+    Orders shaped like getOrders results
+
+    Every fifth order is in another status and every seventh already has a
+    B2B number in extra_field_1, so status filters and skipping are exercised.
+    """
+    rng = random.Random(seed)
+    now = int(time.time())
+    orders = []
+    for index in range(count):
+        products = []
+        for line in range(rng.choice((1, 1, 2, 3, 5, 12))):
+            products.append({
+                "name": f"Product {line + 1}",
+                "sku": f"H-{rng.randint(100000, 999999)}",
+                "quantity": rng.randint(1, 6),
+                "price_brutto": round(rng.uniform(5, 400), 2)
+            })
+        total = round(sum(product['price_brutto'] * product['quantity'] for product in products) + 19.99, 2)
+        orders.append({
+            # Growing ids with gaps, as in BaseLinker
+            "order_id": first_id + index * 2 + rng.randint(0, 1),
+            "order_status_id": status_id if index % 5 else status_id + 1,
+            "date_confirmed": now - (count - index) * 600,
+            "confirmed": True,
+            "phone": f"+48 {rng.randint(500, 799)} {rng.randint(100, 999)} {rng.randint(100, 999)}",
+            "email": f"customer{index}@example.com",
+            "delivery_fullname": f"Customer {index}",
+            "delivery_company": f"Company {index}" if index % 3 == 0 else "",
+            "delivery_address": f"Testowa {index % 90 + 1}",
+            "delivery_city": "Warszawa",
+            "delivery_postcode": f"0{rng.randint(0, 9)}-{rng.randint(100, 999)}",
+            "delivery_price": 19.99,
+            "payment_done": total if index % 2 else 0,
+            "extra_field_1": str(rng.randint(1000, 9999)) if index % 7 == 0 else "",
+            "products": products
+        })
+    return orders
+
+
+def get_orders(orders, parameters):
+    """getOrders filtering and paging as documented by BaseLinker"""
+    selected = []
+    for order in orders:
+        if 'order_id' in parameters:
+            if order['order_id'] != int(parameters['order_id']):
+                continue
+        else:
+            if 'id_from' in parameters and order['order_id'] < int(parameters['id_from']):
+                continue
+            if 'date_confirmed_from' in parameters and order['date_confirmed'] < int(parameters['date_confirmed_from']):
+                continue
+            if 'status_id' in parameters and order['order_status_id'] != int(parameters['status_id']):
+                continue
+        if not order.get('confirmed', True) and not parameters.get('get_unconfirmed_orders'):
+            continue
+        selected.append(order)
+
+    if 'id_from' not in parameters and 'order_id' not in parameters:
+        selected.sort(key=lambda order: order['date_confirmed'])
+    return selected[:PAGE_SIZE]
+
+
+class BaseLinkerStub:
+    """HTTP server answering connector.php calls from an in-memory order list"""
+
+    def __init__(self, orders, token='stub-token', host='127.0.0.1', port=0, latency=0.0):
+        self.orders = orders
+        self.token = token
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://{host}:{self.port}/connector.php"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, token, method, parameters):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if token != self.token:
+            return {"status": "ERROR", "error_code": "ERROR_BAD_TOKEN", "error_message": "Invalid user token"}
+        if method != 'getOrders':
+            return {"status": "ERROR", "error_code": "ERROR_UNKNOWN_METHOD", "error_message": f"Unknown method {method}"}
+        return {"status": "SUCCESS", "orders": get_orders(self.orders, parameters)}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.split('?')[0].rstrip('/') != '/connector.php':
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                try:
+                    parameters = json.loads(form.get('parameters', ['{}'])[0] or '{}')
+                except ValueError:
+                    parameters = {}
+                body = stub.handle(self.headers.get('X-BLToken'), form.get('method', [''])[0], parameters)
+
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the BaseLinker getOrders API')
+    parser.add_argument('--orders', type=int, default=300, help='Number of generated orders')
+    parser.add_argument('--status-id', type=int, default=26890, help='Status id of most generated orders')
+    parser.add_argument('--fixture', help='JSON file with a list of getOrders orders instead of generated ones')
+    parser.add_argument('--token', default='stub-token', help='Accepted X-BLToken')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every call')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5060)
+    args = parser.parse_args(argv)
+
+    if args.fixture:
+        with open(args.fixture, 'r', encoding='utf-8') as f:
+            orders = json.load(f)
+    else:
+        orders = generate_orders(args.orders, args.status_id)
+
+    stub = BaseLinkerStub(orders, args.token, args.host, args.port, args.latency)
+    print(f"BaseLinker stub with {len(orders)} orders on {stub.url} (token: {args.token})")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
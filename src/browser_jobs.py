@@ -0,0 +1,118 @@
+"""
+Browser Jobs
+Everything the API does with the operator's Chrome, run either in the web
+process or in the driver broker (see driver_broker.py)
+"""
+import logging
+from chrome_manager import ChromeManager
+from extractors import OrderCoordinator, B2BExtractor
+from extractors.timeline import TimelineStore
+from extractors.driver_lifecycle import DriverLifecycle
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserJobs:
+    """Chrome status, launch and order automation calls; each takes the caller's config first"""
+
+    # Calls that yield events instead of returning one result
+    STREAMS = ('stream_large_order_extraction', 'stream_large_order_import')
+
+    # Calls that only read state and need not wait for the browser
+    READ_ONLY = ('status', 'timelines', 'timeline', 'drivers', 'extract_status_orders')
+
+    def __init__(self, order_store=None, chrome_manager=None):
+        self.order_store = order_store
+        self.chrome_manager = chrome_manager or ChromeManager()
+
+    def _coordinator(self, config, deadline=None):
+        return OrderCoordinator(chrome_debug_port=config.get('chrome_debug_port', 9222), config=config,
+                                order_store=self.order_store, deadline=deadline)
+
+    def status(self, config):
+        return self.chrome_manager.check_status(config)
+
+    def launch_chrome(self, config):
+        return self.chrome_manager.launch_chrome(config)
+
+    def extract_order(self, config, deadline=None):
+        return self._coordinator(config, deadline).extract_all_order_data()
+
+    def extract_orders(self, config, order_ids, deadline=None):
+        return self._coordinator(config, deadline).extract_orders(order_ids)
+
+    def extract_status_orders(self, config, status_id=None, deadline=None):
+        # BaseLinker API only, the browser is not used
+        return self._coordinator(config, deadline).extract_status_orders(status_id)
+
+    def import_products(self, config, products, deadline=None):
+        return self._coordinator(config, deadline).import_products_to_b2b(products)
+
+    def complete_order(self, config, products, address_data, payment_amount=None, order_id=None, deadline=None):
+        return self._coordinator(config, deadline).complete_order_with_address(
+            products, address_data, payment_amount, order_id=order_id
+        )
+
+    def consolidate_orders(self, config, orders=None, order_ids=None, address_data=None,
+                           payment_amount=None, deadline=None):
+        """
+        Import several orders as one B2B import, extracting them first when only ids are given
+        
+        Returns:
+            dict: Consolidated import result; 'extraction_failed' lists orders
+                  that could not be extracted and were left out
+        """
+        extraction_failed = []
+        if orders is None:
+            extracted = self.extract_orders(config, order_ids or [], deadline)
+            if not extracted['success']:
+                return extracted
+            orders = [order for order in extracted['orders'] if order['success']]
+            extraction_failed = [{"order_id": order['order_id'], "error": order.get('error')}
+                                 for order in extracted['orders'] if not order['success']]
+        
+        result = self._coordinator(config, deadline).import_consolidated(orders, address_data, payment_amount)
+        result["extraction_failed"] = extraction_failed
+        return result
+    
+    def open_import_modal(self, config):
+        """
+        Open the import products modal on B2B Hendi
+
+        Returns:
+            dict: Result; 'status_code' is 404 when the B2B Hendi tab is missing
+        """
+        chrome_debug_port = config.get('chrome_debug_port', 9222)
+        OrderCoordinator.wait_for_prewarm(chrome_debug_port, config.get('prewarm', {}).get('timeout', 15) + 10)
+        extractor = B2BExtractor(chrome_debug_port=chrome_debug_port, config=config)
+        try:
+            if not extractor.connect_to_chrome():
+                return {"success": False, "error": "Could not connect to Chrome"}
+
+            if not extractor.find_b2b_hendi_tab():
+                return {"success": False, "error": "B2B Hendi tab not found", "status_code": 404}
+
+            if extractor.click_import_products_button():
+                return {"success": True, "message": "Import modal opened successfully"}
+            return {"success": False, "error": "Failed to open import modal"}
+        finally:
+            extractor.close()
+
+    def stream_large_order_extraction(self, config, deadline=None):
+        return self._coordinator(config, deadline).stream_large_order_extraction()
+
+    def stream_large_order_import(self, config, products, address_data=None, payment_amount=None,
+                                  order_id=None, deadline=None):
+        return self._coordinator(config, deadline).stream_large_order_import(
+            products, address_data, payment_amount, order_id=order_id
+        )
+
+    def timelines(self, config):
+        return TimelineStore.recent()
+
+    def timeline(self, config, timeline_id):
+        timeline = TimelineStore.get(timeline_id)
+        return timeline.to_dict() if timeline is not None else None
+
+    def drivers(self, config):
+        return DriverLifecycle.for_config(config).snapshot()
@@ -3,10 +3,19 @@ import platform
 import requests
 import logging
 import os
+import shutil
 import time
 
 logger = logging.getLogger(__name__)
 
+# Profile entries that are per-process locks or disposable caches, never copied into a snapshot
+PROFILE_SNAPSHOT_IGNORE = (
+    'Singleton*', 'lockfile', 'LOCK', '*.tmp',
+    'Cache', 'Code Cache', 'GPUCache', 'ShaderCache', 'GrShaderCache',
+    'DawnCache', 'DawnGraphiteCache', 'DawnWebGPUCache', 'CacheStorage', 'ScriptCache',
+    'Crashpad', 'Crash Reports', 'BrowserMetrics*', 'Safe Browsing', 'component_crx_cache'
+)
+
 class ChromeManager:
     def __init__(self):
         self.system = platform.system()
@@ -43,6 +52,45 @@ class ChromeManager:
         logger.warning(f"Could not find Chrome debug port on any host, defaulting to 127.0.0.1")
         return '127.0.0.1'
     
+    def wait_for_devtools(self, port=9222, timeout=20, host=None, process=None):
+        """
+        Poll the DevTools endpoint with backoff until it answers or the deadline passes
+        
+        Args:
+            port: Remote debugging port
+            timeout: Deadline in seconds
+            host: Host to probe (detected if not given)
+            process: Launched Popen; polling stops early if it exits with an error
+            
+        Returns:
+            float: Seconds until the endpoint answered, or None on timeout
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = 0.05
+        
+        while True:
+            try:
+                probe_host = host or self._chrome_host or '127.0.0.1'
+                if requests.get(f'http://{probe_host}:{port}/json/version', timeout=1).status_code == 200:
+                    latency = round(time.monotonic() - start, 3)
+                    logger.info(f"Chrome DevTools ready on port {port} after {latency}s")
+                    return latency
+            except requests.exceptions.RequestException:
+                pass
+            
+            # Chrome hands off to an already running instance and exits 0, so only errors end the wait
+            if process is not None and process.poll() not in (None, 0):
+                logger.error(f"Chrome exited with code {process.returncode} before opening port {port}")
+                return None
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"Chrome DevTools did not answer on port {port} within {timeout}s")
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+    
     def check_chrome_running(self, port=9222):
         """Check if Chrome is running with remote debugging"""
         try:
@@ -160,10 +208,11 @@ class ChromeManager:
                     # Helper service is available, use it
                     logger.info(f"Using Chrome Launcher Helper at {helper_url}")
                     
+                    startup_timeout = config.get('timing', {}).get('chrome_startup_timeout', 20)
                     response = requests.post(
                         f'{helper_url}/launch-chrome',
                         json=config,
-                        timeout=5
+                        timeout=startup_timeout + 5
                     )
                     
                     if response.status_code == 200:
@@ -196,6 +245,16 @@ class ChromeManager:
                 }
             
             port = config.get('chrome_debug_port', 9222)
+            
+            if self.check_chrome_running(port):
+                logger.info(f"Chrome already running with debug port {port}")
+                return {
+                    'success': True,
+                    'already_running': True,
+                    'launch_latency': 0,
+                    'message': 'Chrome already running'
+                }
+            
             user_data_dir = config.get('chrome_user_data_dir', '')
             baselinker_url = config.get('baselinker_url', '')
             b2b_hendi_url = config.get('b2b_hendi_url', '')
@@ -220,15 +279,24 @@ class ChromeManager:
             
             # Launch Chrome
             if self.system == 'Windows':
-                subprocess.Popen(cmd, shell=True)
+                process = subprocess.Popen(cmd, shell=True)
             else:
-                subprocess.Popen(cmd)
+                process = subprocess.Popen(cmd)
+            
+            # Return as soon as the debug port answers
+            startup_timeout = config.get('timing', {}).get('chrome_startup_timeout', 20)
+            latency = self.wait_for_devtools(port, startup_timeout, host='127.0.0.1', process=process)
             
-            # Wait a bit for Chrome to start
-            time.sleep(2)
+            if latency is None:
+                return {
+                    'success': False,
+                    'error': f'Chrome started but debug port {port} did not open within {startup_timeout}s'
+                }
             
             return {
                 'success': True,
+                'already_running': False,
+                'launch_latency': latency,
                 'message': 'Chrome launched successfully'
             }
             
@@ -237,4 +305,116 @@ class ChromeManager:
             return {
                 'success': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+    
+    def snapshot_profile(self, source_dir, snapshot_dir):
+        """
+        Copy a logged-in Chrome profile for a headless worker
+        
+        Lock files and caches are skipped, so the copy is small and can be made
+        while the operator's Chrome is running.
+        
+        Args:
+            source_dir: Operator's Chrome user data dir (config chrome_user_data_dir)
+            snapshot_dir: Destination directory (replaced if it exists)
+            
+        Returns:
+            str: Snapshot directory
+        """
+        if not source_dir or not os.path.isdir(source_dir):
+            raise ValueError(f"Chrome user data dir not found: {source_dir!r}")
+        
+        if os.path.exists(snapshot_dir):
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        
+        def copy_file(src, dst):
+            # Files held open by the running Chrome may be unreadable; the copy stays usable without them
+            try:
+                shutil.copy2(src, dst)
+            except OSError as e:
+                logger.debug(f"Skipped {src}: {e}")
+        
+        shutil.copytree(
+            source_dir, snapshot_dir,
+            ignore=shutil.ignore_patterns(*PROFILE_SNAPSHOT_IGNORE),
+            copy_function=copy_file,
+            dirs_exist_ok=True
+        )
+        logger.info(f"Chrome profile snapshot created: {snapshot_dir}")
+        return snapshot_dir
+    
+    def build_headless_command(self, config, user_data_dir):
+        """
+        Build the command line for a headless worker Chrome
+        
+        Args:
+            config: Full application config (uses the headless_worker section)
+            user_data_dir: Profile snapshot directory
+            
+        Returns:
+            list: Command line, or None if Chrome was not found
+        """
+        chrome_path = self.get_chrome_path(config)
+        if not chrome_path:
+            return None
+        
+        settings = config.get('headless_worker', {})
+        port = settings.get('port', 9223)
+        
+        cmd = [
+            chrome_path,
+            '--headless=new',
+            f'--remote-debugging-port={port}',
+            '--remote-debugging-address=127.0.0.1',
+            f'--user-data-dir={user_data_dir}',
+            f"--window-size={settings.get('window_size', '1366,900')}",
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-gpu',
+            '--disable-extensions',
+            '--disable-background-networking',
+            '--disable-sync',
+            '--mute-audio'
+        ]
+        
+        if settings.get('disable_images', True):
+            cmd.append('--blink-settings=imagesEnabled=false')
+        
+        if settings.get('disable_fonts', True):
+            cmd.append('--disable-remote-fonts')
+        
+        cmd.extend(settings.get('extra_args', []))
+        
+        for url in (config.get('baselinker_url', ''), config.get('b2b_hendi_url', '')):
+            if url:
+                cmd.append(url)
+        
+        return cmd
+    
+    def launch_headless(self, config, user_data_dir):
+        """
+        Launch a headless worker Chrome and wait until its debug port answers
+        
+        Args:
+            config: Full application config
+            user_data_dir: Profile snapshot directory
+            
+        Returns:
+            subprocess.Popen: Chrome process
+        """
+        cmd = self.build_headless_command(config, user_data_dir)
+        if not cmd:
+            raise RuntimeError('Chrome executable not found')
+        
+        settings = config.get('headless_worker', {})
+        port = settings.get('port', 9223)
+        startup_timeout = settings.get('startup_timeout', 30)
+        
+        logger.info(f"Launching headless Chrome: {' '.join(cmd)}")
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        if self.wait_for_devtools(port, startup_timeout, host='127.0.0.1', process=process) is not None:
+            return process
+        
+        process.terminate()
+        raise RuntimeError(f"Headless Chrome did not open debug port {port} within {startup_timeout}s")
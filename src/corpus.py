@@ -0,0 +1,348 @@
+"""
+Page Corpus
+Captures sanitised DOM snapshots of the BaseLinker and B2B Hendi tabs, replays
+the extractors' parsing over them offline in a headless Chrome, and compares
+replay runs (e.g. before and after a selector or regex change in config.json)
+
+Usage:
+    python corpus.py capture
+    python corpus.py replay --label before --output before.json
+    python corpus.py replay --config new-config.json --label after --output after.json
+    python corpus.py compare before.json after.json
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+from chrome_manager import ChromeManager
+from logging_setup import setup_logging
+from extractors import BaseLinkerExtractor, B2BExtractor
+from extractors.pii import pii_selectors
+from extractors.selector_chain import as_chain
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+DEFAULT_CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'corpus')
+
+# BaseLinker fields replayed, in snapshot_current_order order
+BASELINKER_FIELDS = {
+    'order_id': 'extract_order_id',
+    'b2b_number': 'extract_b2b_number',
+    'products': 'extract_product_data',
+    'payment_amount': 'extract_payment_amount',
+    'phone': 'extract_phone_number',
+    'email': 'extract_email',
+    'address': 'extract_address'
+}
+
+B2B_FIELDS = {
+    'b2b_number': 'extract_b2b_number'
+}
+
+# Clones the page without scripts, frames, external resources and tokens, and
+# masks all text and text-bearing attributes (digits -> random digits, letters
+# -> x/X, so the format survives but the data does not) except inside the
+# allow-listed elements the extractors read; personal-data elements are masked
+# even there. Words in keepWords (labels the regex patterns match) stay as they are.
+SANITIZE_SCRIPT = """
+const [keepSelectors, piiSelectors, keepWords] = arguments;
+const root = document.documentElement.cloneNode(true);
+const words = new Set(keepWords);
+const maskText = text => text.replace(/[\\p{L}\\p{N}]+/gu, word => words.has(word) ? word : word
+    .replace(/[0-9]/g, () => String(Math.floor(Math.random() * 10)))
+    .replace(/\\p{L}/gu, c => c === c.toUpperCase() ? 'X' : 'x'));
+const mark = (selectors, attribute) => {
+    for (const selector of selectors) {
+        try {
+            root.querySelectorAll(selector).forEach(element => element.setAttribute(attribute, ''));
+        } catch (e) {
+            // selector not valid as CSS
+        }
+    }
+};
+const kept = element => element !== null && element.closest('[data-corpus-pii]') === null
+    && element.closest('[data-corpus-keep]') !== null;
+
+root.querySelectorAll('script, noscript, iframe, object, embed, link[rel~="stylesheet"], link[rel~="preload"]')
+    .forEach(element => element.remove());
+root.querySelectorAll('[src], [srcset]').forEach(element => {
+    element.removeAttribute('src');
+    element.removeAttribute('srcset');
+});
+root.querySelectorAll('input[type="hidden"], input[type="password"]').forEach(input => input.setAttribute('value', ''));
+root.querySelectorAll('meta[name*="csrf" i], meta[name*="token" i]').forEach(meta => meta.setAttribute('content', ''));
+
+mark(keepSelectors, 'data-corpus-keep');
+mark(piiSelectors, 'data-corpus-pii');
+
+const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+    if (node.parentElement?.tagName !== 'STYLE' && !kept(node.parentElement)) node.nodeValue = maskText(node.nodeValue);
+}
+for (const attribute of ['value', 'placeholder', 'title', 'alt', 'aria-label', 'href']) {
+    root.querySelectorAll(`[${attribute}]`).forEach(element => {
+        if (!kept(element)) element.setAttribute(attribute, maskText(element.getAttribute(attribute)));
+    });
+}
+root.querySelectorAll('[data-corpus-keep], [data-corpus-pii]').forEach(element => {
+    element.removeAttribute('data-corpus-keep');
+    element.removeAttribute('data-corpus-pii');
+});
+return {html: '<!DOCTYPE html>\\n' + root.outerHTML, title: maskText(document.title)};
+"""
+
+# Labels the configured regex patterns need (e.g. B2B "Numer: 123 / 456")
+DEFAULT_KEEP_WORDS = ['Numer', 'SKU', 'PLN']
+
+
+def load_config(path=CONFIG_PATH):
+    """Load the shared application config"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def corpus_path(config):
+    return config.get('corpus', {}).get('path') or DEFAULT_CORPUS_PATH
+
+
+def keep_selectors(config, site):
+    """CSS selectors of the non-personal elements the extractors read, whose text is kept"""
+    if site == 'baselinker':
+        selectors = config.get('baselinker_selectors', {})
+        css = [f'#{element_id}' for key, default in (('products_container', 'sale_items_container'),
+                                                      ('total_price', 'sale_total_price'),
+                                                      ('b2b_number_field', 'oms_info_extra_field_1'))
+               for element_id in as_chain(selectors.get(key, default))]
+        css.extend(as_chain(selectors.get('paid_amount', 'span[data-tid="editPayment"]')))
+    else:
+        # The B2B order settings also hold the delivery address; the "Numer:" label
+        # survives through keep_words and the masked number keeps its format
+        css = []
+    css.extend(config.get('corpus', {}).get('extra_keep_selectors', []))
+    return css
+
+
+def capture_tab(extractor, site, config, directory):
+    """
+    Save a sanitised snapshot of the extractor's current tab
+
+    Returns:
+        str: Entry directory
+    """
+    settings = config.get('corpus', {})
+    page = extractor.driver.execute_script(SANITIZE_SCRIPT, keep_selectors(config, site), pii_selectors(config),
+                                           settings.get('keep_words', DEFAULT_KEEP_WORDS))
+    url = extractor.driver.current_url
+    order_id = extractor.extract_order_id() if site == 'baselinker' else None
+
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{site}" + (f"-{order_id}" if order_id else '')
+    entry = os.path.join(directory, name)
+    os.makedirs(entry, exist_ok=True)
+
+    with open(os.path.join(entry, 'page.html'), 'w', encoding='utf-8') as f:
+        f.write(page['html'])
+    with open(os.path.join(entry, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'site': site,
+            # Only the fragment is kept; it carries the order id the extractor reads
+            'fragment': urlsplit(url).fragment,
+            'title': page['title'],
+            'captured_at': time.time()
+        }, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"Captured {site} page into {entry}")
+    return entry
+
+
+def capture(config):
+    """Snapshot the BaseLinker and B2B Hendi tabs of the operator's Chrome"""
+    port = config.get('chrome_debug_port', 9222)
+    directory = corpus_path(config)
+    entries = []
+
+    for site, extractor_class, find_tab in (
+        ('baselinker', BaseLinkerExtractor, 'find_baselinker_tab'),
+        ('b2b', B2BExtractor, 'find_b2b_hendi_tab')
+    ):
+        extractor = extractor_class(port, config)
+        try:
+            if not extractor.connect_to_chrome() or not getattr(extractor, find_tab)():
+                logger.warning(f"{site} tab not found, not captured")
+                continue
+            entries.append(capture_tab(extractor, site, config, directory))
+        finally:
+            extractor.close()
+
+    return entries
+
+
+def list_entries(directory):
+    """Corpus entries (directories with page.html and meta.json), oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for name in sorted(os.listdir(directory)):
+        entry = os.path.join(directory, name)
+        if os.path.isfile(os.path.join(entry, 'page.html')) and os.path.isfile(os.path.join(entry, 'meta.json')):
+            with open(os.path.join(entry, 'meta.json'), 'r', encoding='utf-8') as f:
+                entries.append((name, entry, json.load(f)))
+    return entries
+
+
+def replay_entry(extractor, fields, entry, meta):
+    """Load one snapshot and run the extractor's field parsers over it"""
+    url = Path(entry, 'page.html').resolve().as_uri()
+    if meta.get('fragment'):
+        url += '#' + meta['fragment']
+    extractor.driver.get(url)
+
+    values = {}
+    timings = {}
+    for field, method in fields.items():
+        start = time.perf_counter()
+        values[field] = getattr(extractor, method)()
+        timings[field] = round((time.perf_counter() - start) * 1000, 2)
+    return values, timings
+
+
+def replay(config, label=None):
+    """
+    Run the extractors over every corpus page in a headless Chrome with an empty profile
+
+    Returns:
+        dict: Run with a label, per-entry 'values' and 'timings' (ms per field)
+    """
+    settings = config.get('corpus', {})
+    port = settings.get('replay_port', 9224)
+    replay_config = {
+        **config,
+        'chrome_debug_port': port,
+        # Start on a blank tab, the replay never touches the live sites
+        'baselinker_url': '',
+        'b2b_hendi_url': '',
+        'options': {**config.get('options', {}), 'auto_detect_chrome_host': False},
+        'headless_worker': {**config.get('headless_worker', {}), 'port': port, 'disable_images': True},
+        # Snapshots are static, nothing to wait for
+        'timing': {**config.get('timing', {}), 'default_timeout': 1, 'element_wait_timeout': 1},
+        'timing_profile': {**config.get('timing_profile', {}), 'enabled': False}
+    }
+
+    profile_dir = tempfile.mkdtemp(prefix='b2b-corpus-profile-')
+    process = ChromeManager().launch_headless(replay_config, profile_dir)
+    run = {'label': label or time.strftime('%Y%m%d-%H%M%S'), 'started_at': time.time(), 'entries': {}}
+
+    try:
+        for site, extractor_class, fields in (
+            ('baselinker', BaseLinkerExtractor, BASELINKER_FIELDS),
+            ('b2b', B2BExtractor, B2B_FIELDS)
+        ):
+            entries = [item for item in list_entries(corpus_path(config)) if item[2].get('site') == site]
+            if not entries:
+                continue
+
+            extractor = extractor_class(port, replay_config)
+            if not extractor.connect_to_chrome():
+                raise RuntimeError(f"Could not connect to replay Chrome on port {port}")
+            try:
+                for name, entry, meta in entries:
+                    values, timings = replay_entry(extractor, fields, entry, meta)
+                    run['entries'][name] = {'site': site, 'values': values, 'timings': timings}
+                    logger.info(f"Replayed {name}: {sum(timings.values()):.1f} ms")
+            finally:
+                extractor.close()
+    finally:
+        process.terminate()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return run
+
+
+def compare(baseline, candidate):
+    """
+    Compare two replay runs entry by entry
+
+    Returns:
+        dict: Changed field values per entry, entries missing from either run,
+              and median total time per run with the relative change
+    """
+    changed = {}
+    for name, entry in candidate['entries'].items():
+        before = baseline['entries'].get(name)
+        if before is None:
+            continue
+        fields = {
+            field: {'before': before['values'].get(field), 'after': value}
+            for field, value in entry['values'].items()
+            if before['values'].get(field) != value
+        }
+        if fields:
+            changed[name] = fields
+
+    def median_total(run):
+        totals = [sum(entry['timings'].values()) for entry in run['entries'].values()]
+        return round(statistics.median(totals), 2) if totals else None
+
+    before_ms, after_ms = median_total(baseline), median_total(candidate)
+    return {
+        'baseline': baseline['label'],
+        'candidate': candidate['label'],
+        'entries': len(candidate['entries']),
+        'changed': changed,
+        'only_in_baseline': sorted(set(baseline['entries']) - set(candidate['entries'])),
+        'only_in_candidate': sorted(set(candidate['entries']) - set(baseline['entries'])),
+        'median_ms': {'baseline': before_ms, 'candidate': after_ms},
+        'median_change': round(after_ms / before_ms - 1, 3) if before_ms and after_ms else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Capture, replay and compare a corpus of order pages')
+    parser.add_argument('--config', default=CONFIG_PATH, help='Path to config.json')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('capture', help='Snapshot the current BaseLinker and B2B tabs')
+
+    replay_parser = commands.add_parser('replay', help='Run the extractors over the corpus offline')
+    replay_parser.add_argument('--label', help='Name of this run (e.g. a git revision)')
+    replay_parser.add_argument('--output', help='Write the run to this file')
+
+    compare_parser = commands.add_parser('compare', help='Compare two replay runs')
+    compare_parser.add_argument('baseline', help='Replay output of the baseline version')
+    compare_parser.add_argument('candidate', help='Replay output of the changed version')
+
+    args = parser.parse_args(argv)
+    config = load_config(args.config)
+    setup_logging(config)
+
+    if args.command == 'capture':
+        entries = capture(config)
+        print(json.dumps(entries, indent=2))
+        return 0 if entries else 1
+
+    if args.command == 'replay':
+        run = replay(config, args.label)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(run, f, ensure_ascii=False, indent=2)
+        print(json.dumps(run, ensure_ascii=False, indent=2))
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r', encoding='utf-8') as f:
+        candidate = json.load(f)
+    report = compare(baseline, candidate)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if report['changed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
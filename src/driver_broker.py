@@ -0,0 +1,286 @@
+"""
+Driver Broker
+Local process that owns the Chrome/chromedriver attachment and runs browser
+jobs for any number of web workers, which connect to it as thin clients
+
+Usage:
+    python driver_broker.py
+
+Enable "driver_broker" in config.json so app.py sends browser calls here
+instead of attaching to Chrome from every worker process.
+
+Calls are pickled, so whoever knows the authkey can run code in the process
+holding the operator's logged-in sessions. The key comes from
+driver_broker.authkey, the B2B_BROKER_AUTHKEY environment variable, or a
+random key generated once per install in driver_broker.authkey_file.
+"""
+from multiprocessing.connection import Listener, Client
+import argparse
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+from order_store import OrderStore
+from logging_setup import setup_logging
+from browser_jobs import BrowserJobs
+from extractors import BaseExtractor, OrderCoordinator
+from extractors.driver_lifecycle import DriverLifecycle
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+DEFAULT_AUTHKEY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'broker.key')
+
+# Shipped in earlier config files, so known to everyone
+PUBLIC_AUTHKEYS = ('b2b-hendi-broker',)
+MIN_AUTHKEY_LENGTH = 16
+
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+
+def load_config(path=CONFIG_PATH):
+    """Load the shared application config"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def broker_address(settings):
+    return (settings.get('host', '127.0.0.1'), settings.get('port', 5055))
+
+
+class BrokerError(Exception):
+    """The broker could not be reached or the job raised inside it"""
+
+
+def _install_authkey(path):
+    """Read the per-install key, generating it (readable by the owner only) on first use"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+
+    key = secrets.token_hex(32)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(key)
+    logger.info(f"Generated driver broker authkey in {path}")
+    return key
+
+
+def broker_authkey(settings):
+    """
+    Secret shared by the broker and its clients
+
+    Raises:
+        BrokerError: If the configured key is a public default or too short
+    """
+    key = settings.get('authkey') or os.environ.get('B2B_BROKER_AUTHKEY')
+    if not key:
+        path = settings.get('authkey_file') or DEFAULT_AUTHKEY_PATH
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            key = _install_authkey(path)
+        except OSError as e:
+            raise BrokerError(f"No driver broker authkey configured and {path} is not usable: {e}")
+
+    if key in PUBLIC_AUTHKEYS or len(key) < MIN_AUTHKEY_LENGTH:
+        raise BrokerError(f"Driver broker authkey must be a private secret of at least {MIN_AUTHKEY_LENGTH} "
+                          f"characters; clear driver_broker.authkey to generate one")
+    return key.encode('utf-8')
+
+
+class SharedDriver:
+    """
+    One WebDriver session per Chrome debug address, handed to every extractor
+
+    Used as BaseExtractor.driver_provider inside the broker. A session that no
+    longer answers is replaced on the next connect.
+    """
+
+    def __init__(self):
+        self._drivers = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, extractor):
+        key = (extractor._chrome_host, extractor.chrome_debug_port)
+        with self._lock:
+            driver = self._drivers.get(key)
+            if driver is not None:
+                try:
+                    driver.window_handles
+                    return driver
+                except Exception as e:
+                    logger.warning(f"Shared driver for {key[0]}:{key[1]} stopped answering, reattaching: {e}")
+                    DriverLifecycle.for_config(extractor.config).release(driver)
+
+            # Tracked (and capped) by the lifecycle manager, but never released
+            driver = DriverLifecycle.for_config(extractor.config).acquire(extractor)
+            self._drivers[key] = driver
+            return driver
+
+    def count(self):
+        with self._lock:
+            return len(self._drivers)
+
+
+class DriverBroker:
+    """Accepts job calls over a local socket and runs them against one Chrome attachment"""
+
+    def __init__(self, config, jobs=None):
+        self.settings = config.get('driver_broker', {})
+        self.jobs = jobs or BrowserJobs(OrderStore.from_config(config))
+        self.shared_driver = SharedDriver()
+        # Browser jobs share the tabs of one Chrome, so they run one at a time
+        self._browser_lock = threading.Lock()
+        self._listener = None
+
+    def serve_forever(self):
+        host = broker_address(self.settings)[0]
+        if host not in LOCAL_HOSTS and not self.settings.get('allow_remote', False):
+            raise BrokerError(f"Driver broker host {host} is not local; set driver_broker.allow_remote to listen on it")
+        authkey = broker_authkey(self.settings)
+
+        BaseExtractor.driver_provider = self.shared_driver
+        # Jobs share one WebDriver session whose window switching is global, so
+        # background pre-warms take the same lock as jobs
+        OrderCoordinator.prewarm_guard = self._browser_lock
+        self._listener = Listener(broker_address(self.settings), authkey=authkey)
+        logger.info(f"Driver broker listening on {self._listener.address}")
+
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except OSError as e:
+                    if self._listener is None:
+                        break
+                    # Bad authkey or a client that went away during the handshake
+                    logger.warning(f"Rejected broker connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            BaseExtractor.driver_provider = None
+            OrderCoordinator.prewarm_guard = None
+
+    def shutdown(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+
+    def _handle(self, conn):
+        """Run one call; a stream call sends its events and then an end marker"""
+        try:
+            message = conn.recv()
+            method = message.get('method')
+            params = message.get('params', {})
+
+            if not hasattr(BrowserJobs, method) or method.startswith('_') or method in ('STREAMS', 'READ_ONLY'):
+                conn.send({"error": f"Unknown broker method: {method}"})
+                return
+
+            call = getattr(self.jobs, method)
+            if method in BrowserJobs.READ_ONLY:
+                conn.send({"result": call(**params)})
+                return
+
+            # Let a pre-warm started by the previous job finish first; it needs the lock
+            config = params.get('config', {})
+            port = config.get('chrome_debug_port', 9222)
+            OrderCoordinator.wait_for_prewarm(port, OrderCoordinator(port, config)._prewarm_wait_timeout())
+
+            with self._browser_lock:
+                if method in BrowserJobs.STREAMS:
+                    events = call(**params)
+                    try:
+                        for event in events:
+                            conn.send({"event": event})
+                    finally:
+                        # Stops the coordinator's generator if the client went away
+                        events.close()
+                    conn.send({"end": True})
+                else:
+                    conn.send({"result": call(**params)})
+
+        except (EOFError, OSError):
+            logger.info("Broker client disconnected")
+        except Exception as e:
+            logger.error(f"Broker call failed: {e}", exc_info=True)
+            try:
+                conn.send({"error": str(e)})
+            except OSError:
+                pass
+        finally:
+            conn.close()
+
+
+class BrokerClient:
+    """Thin client used by web workers; one connection per call"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.response_timeout = settings.get('response_timeout', 1800)
+
+    def _connect(self, method, params):
+        authkey = broker_authkey(self.settings)
+        try:
+            conn = Client(broker_address(self.settings), authkey=authkey)
+        except OSError as e:
+            raise BrokerError(f"Driver broker not reachable at {broker_address(self.settings)}: {e}")
+        conn.send({"method": method, "params": params})
+        return conn
+
+    def _receive(self, conn):
+        if not conn.poll(self.response_timeout):
+            raise BrokerError(f"Driver broker did not answer within {self.response_timeout}s")
+        message = conn.recv()
+        if "error" in message:
+            raise BrokerError(message["error"])
+        return message
+
+    def call(self, method, **params):
+        """Run a job in the broker and return its result"""
+        conn = self._connect(method, params)
+        try:
+            return self._receive(conn)["result"]
+        finally:
+            conn.close()
+
+    def stream(self, method, **params):
+        """Run a streaming job in the broker, yielding its events"""
+        conn = self._connect(method, params)
+        try:
+            while True:
+                message = self._receive(conn)
+                if message.get("end"):
+                    return
+                yield message["event"]
+        finally:
+            conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Own the Chrome attachment and run browser jobs for web workers')
+    parser.add_argument('--config', default=CONFIG_PATH, help='Path to config.json')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    setup_logging(config)
+
+    DriverLifecycle.for_config(config)
+    broker = DriverBroker(config)
+    try:
+        broker.serve_forever()
+    except BrokerError as e:
+        logger.error(f"Driver broker not started: {e}")
+        return 1
+    except KeyboardInterrupt:
+        broker.shutdown()
+        DriverLifecycle.for_config(config).shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,12 +4,23 @@ Contains all data extraction classes for different sources
 """
 from .base_extractor import BaseExtractor
 from .baselinker_extractor import BaseLinkerExtractor
+from .baselinker_api import BaseLinkerApiExtractor, BaseLinkerApiError
 from .b2b_extractor import B2BExtractor
 from .order_coordinator import OrderCoordinator
+from .timing_profile import TimingProfile
+from .sku_catalog import SkuCatalog, normalize_sku
+from .deadline import Deadline, DeadlineExceeded
 
 __all__ = [
     'BaseExtractor',
     'BaseLinkerExtractor',
+    'BaseLinkerApiExtractor',
+    'BaseLinkerApiError',
     'B2BExtractor',
-    'OrderCoordinator'
+    'OrderCoordinator',
+    'TimingProfile',
+    'SkuCatalog',
+    'normalize_sku',
+    'Deadline',
+    'DeadlineExceeded'
 ]
\ No newline at end of file
@@ -9,7 +9,12 @@ import tempfile
 import os
 import time
 import logging
-from .base_extractor import BaseExtractor
+from .base_extractor import BaseExtractor, detail_logger
+from .timing_profile import TimingProfile
+from .selector_chain import as_chain
+from .cart_diff import diff_cart, cart_key, missing_from_cart
+from .direct_import import (DirectImport, DirectImportError, DirectImportRejected, DirectImportUncertain,
+                            parse_table_rows)
 
 logger = logging.getLogger(__name__)
 
@@ -18,19 +23,87 @@ class B2BExtractor(BaseExtractor):
     
     B2B_KEYWORDS = ["b2b", "hendi"]
     
-    def __init__(self, chrome_debug_port=9222, config=None):
-        super().__init__(chrome_debug_port, config)
+    # Page the import button was last used on, remembered for pre-warming
+    last_import_page_url = None
+    
+    def __init__(self, chrome_debug_port=9222, config=None, deadline=None, recorder=None, timeline=None):
+        super().__init__(chrome_debug_port, config, deadline, recorder, timeline)
         self.selectors = self.config.get('b2b_selectors', {})
         self.patterns = self.config.get('regex_patterns', {}).get('b2b', {})
         self.data_processing = self.config.get('data_processing', {})
         self.csv_config = self.config.get('csv_config', {})
         self.payment_methods = self.config.get('payment_methods', {})
+        self.timing_profile = TimingProfile.for_config(self.config)
+        self.cart_selectors = self.selectors.get('cart', {})
+        self.cart_diff_settings = self.config.get('cart_diff', {})
+        self.direct_import_settings = self.config.get('direct_import', {})
+        self.last_import_report = None
+        self.last_cart_diff = None
         
     def find_b2b_hendi_tab(self):
         """Find and switch to B2B Hendi tab"""
         keywords = self.config.get('b2b_keywords', self.B2B_KEYWORDS)
         return self.find_tab_by_keywords(keywords)
     
+    def _is_step_ready(self, ready_locator, visible=True):
+        """Check whether the view a transition leads to is shown"""
+        try:
+            if callable(ready_locator):
+                return bool(ready_locator())
+            return self.find_first(*ready_locator, mode='visible' if visible else 'present') is not None
+        except Exception:
+            return False
+    
+    def _settle(self, step, delay_key, ready_locator=None, visible=True):
+        """
+        Wait after a transition and learn how long it takes to become ready
+        
+        Waits at least the tuned delay for the step. Meanwhile polls for the
+        next view (ready_locator) and, if it has not shown yet, keeps polling up
+        to the configured delay so slow runs are observed too. A run still not
+        ready then is recorded at the configured delay, so slow days raise the
+        percentile instead of being left out of it.
+        
+        Steps without a ready_locator cannot be observed and wait the
+        configured delay.
+        
+        Args:
+            step: Step name used in the timing profile
+            delay_key: Key in config["timing"] with the configured delay
+            ready_locator: (By, value) tuple that appears when the step is ready,
+                           or a callable returning True once it is (e.g. a modal closed)
+            visible: Require ready_locator to be displayed, not just present
+        """
+        configured = self.timing.get(delay_key, 1)
+        
+        if ready_locator is None:
+            self._sleep(configured, step)
+            return
+        
+        delay = self.deadline.clamp(self.timing_profile.delay_for(step, configured), step)
+        observe_for = max(delay, configured)
+        observe_until = self.deadline.clamp(observe_for, step)
+        poll_interval = self.timing_profile.poll_interval
+        start = time.monotonic()
+        ready_after = None
+        
+        with self._span(f"settle {step}", 'settle'):
+            while True:
+                elapsed = time.monotonic() - start
+                if ready_after is None and self._is_step_ready(ready_locator, visible):
+                    ready_after = elapsed
+                if elapsed >= delay and (ready_after is not None or elapsed >= observe_until):
+                    break
+                time.sleep(poll_interval)
+        
+        if ready_after is not None:
+            self.timing_profile.record(step, ready_after)
+            logger.debug(f"Step '{step}' ready after {ready_after:.2f}s (waited {delay:.2f}s)")
+        elif observe_until == observe_for:
+            # Censored: it took at least this long (a deadline cut-off says nothing about the step)
+            self.timing_profile.record(step, observe_for)
+            logger.debug(f"Step '{step}' not ready within {observe_for:.2f}s")
+    
     def extract_b2b_number(self):
         """
         Extract B2B order number from B2B Hendi tab
@@ -42,7 +115,7 @@ class B2BExtractor(BaseExtractor):
             container_class = self.selectors.get('order_settings_container', 'he-order-settings')
             pattern = self.patterns.get('order_number', r'Numer:\s*(\d+)\s*\/\s*(\d+)')
             
-            container = self.driver.find_element(By.CLASS_NAME, container_class)
+            container = self.find_element(By.CLASS_NAME, container_class)
             text = container.text
             
             b2b_match = re.search(pattern, text)
@@ -71,7 +144,6 @@ class B2BExtractor(BaseExtractor):
             import_button_selector = self.selectors.get('import_button', 
                 'button.jsShowModalButton[data-modal=".jsImportProductsModal"]')
             modal_class = self.selectors.get('import_modal', '.jsImportProductsModal')
-            modal_delay = self.timing.get('modal_open_delay', 1)
             
             # Find and click the import button
             import_button = self.wait_for_clickable(
@@ -84,14 +156,16 @@ class B2BExtractor(BaseExtractor):
                 logger.error("Import button not found")
                 return False
             
+            B2BExtractor.last_import_page_url = self.driver.current_url
             import_button.click()
             logger.info("Clicked 'Importuj produkty' button")
             
-            time.sleep(modal_delay)
+            self._settle('import_modal_open', 'modal_open_delay',
+                         ready_locator=(By.CSS_SELECTOR, modal_class))
             
             # Check if modal appeared
             try:
-                modal = self.driver.find_element(By.CSS_SELECTOR, modal_class)
+                modal = self.find_element(By.CSS_SELECTOR, modal_class)
                 if modal.is_displayed():
                     logger.info("Import modal opened successfully")
                     return True
@@ -106,6 +180,38 @@ class B2BExtractor(BaseExtractor):
             logger.error(f"Failed to click import button: {e}")
             return False
     
+    def prewarm_import_page(self, url=None, timeout=None):
+        """
+        Put the B2B tab back on the page with the import button and wait until it is clickable
+        
+        Args:
+            url: Import page URL (defaults to the page of the last import, then b2b_hendi_url)
+            timeout: Maximum wait for the import button
+            
+        Returns:
+            bool: True if the import button is ready
+        """
+        url = url or B2BExtractor.last_import_page_url or self.config.get('b2b_hendi_url')
+        import_button_selector = self.selectors.get('import_button',
+            'button.jsShowModalButton[data-modal=".jsImportProductsModal"]')
+        
+        try:
+            if not self.find_b2b_hendi_tab():
+                return False
+            
+            if url and self.driver.current_url != url:
+                logger.info(f"Resetting B2B tab to {url}")
+                self.navigate(url, 'B2B import page')
+            
+            ready = self.wait_for_clickable(By.CSS_SELECTOR, import_button_selector, timeout=timeout) is not None
+            if ready:
+                logger.info("B2B tab ready for the next import")
+            return ready
+            
+        except Exception as e:
+            logger.error(f"Failed to pre-warm B2B import page: {e}")
+            return False
+    
     def create_csv_from_products(self, products, csv_path=None):
         """
         Create CSV file from products list
@@ -143,12 +249,457 @@ class B2BExtractor(BaseExtractor):
             logger.error(f"Failed to create CSV: {e}")
             return None
     
-    def upload_csv_to_modal(self, csv_path):
+    def read_import_preview(self, products):
+        """
+        Read the import preview table in one browser call and compare it with products
+        
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys that were uploaded
+            
+        Returns:
+            dict: Per-SKU report with 'rows' and matched/unknown/quantity_changed counts,
+                  or None if the preview table could not be read
+        """
+        preview = self.selectors.get('import_preview', {})
+        row_selector = ', '.join(as_chain(preview.get('row', '.jsImportProductsModal table tbody tr')))
+        unknown_selector = ', '.join(as_chain(preview.get('unknown_row', '.table-danger, .text-danger, .is-invalid')))
+        
+        try:
+            rows = self.driver.execute_script("""
+                const [rowSelector, unknownSelector] = arguments;
+                return Array.from(document.querySelectorAll(rowSelector)).map(row => ({
+                    cells: Array.from(row.querySelectorAll('td')).map(cell => cell.innerText.trim()),
+                    unknown: unknownSelector
+                        ? (row.matches(unknownSelector) || row.querySelector(unknownSelector) !== null)
+                        : false
+                }));
+            """, row_selector, unknown_selector)
+        except Exception as e:
+            logger.warning(f"Could not read import preview: {e}")
+            return None
+        
+        return self._preview_report(rows, products)
+    
+    def read_import_preview_html(self, html, products):
+        """
+        Read the import preview from an import response (the direct import)
+        
+        Row classes stand in for the unknown_row selector, whose class names are matched.
+        
+        Returns:
+            dict: Report as read_import_preview returns it, or None if the response has no preview table
+        """
+        preview = self.selectors.get('import_preview', {})
+        unknown_selector = ', '.join(as_chain(preview.get('unknown_row', '.table-danger, .text-danger, .is-invalid')))
+        unknown_classes = set(re.findall(r'\.([\w-]+)', unknown_selector))
+        
+        rows = [{'cells': row['cells'], 'unknown': bool(row['classes'] & unknown_classes)}
+                for row in parse_table_rows(html)]
+        return self._preview_report(rows, products)
+    
+    def _preview_report(self, rows, products):
+        """Compare preview rows ('cells', 'unknown') with the uploaded products"""
+        preview = self.selectors.get('import_preview', {})
+        unknown_keywords = [k.lower() for k in preview.get('unknown_keywords', ['nie znaleziono', 'nieznany', 'brak produktu'])]
+        sku_column = preview.get('sku_column', 0)
+        quantity_column = preview.get('quantity_column', 1)
+        
+        if not rows:
+            logger.warning("Import preview table is empty or not found")
+            return None
+        
+        requested = {}
+        for product in products:
+            requested[str(product['sku']).strip().upper()] = str(product['quantity']).strip()
+        
+        report_rows = []
+        seen = set()
+        
+        for row in rows:
+            cells = row.get('cells', [])
+            if len(cells) <= max(sku_column, quantity_column):
+                continue
+            
+            sku = cells[sku_column]
+            key = sku.upper()
+            quantity_match = re.search(r'\d+', cells[quantity_column])
+            quantity = quantity_match.group(0) if quantity_match else None
+            requested_quantity = requested.get(key)
+            row_text = ' '.join(cells).lower()
+            
+            if row.get('unknown') or any(keyword in row_text for keyword in unknown_keywords):
+                status = 'unknown'
+            elif requested_quantity is not None and quantity is not None and quantity != requested_quantity:
+                status = 'quantity_changed'
+            else:
+                status = 'matched'
+            
+            seen.add(key)
+            report_rows.append({
+                'sku': sku,
+                'requested_quantity': requested_quantity,
+                'quantity': quantity,
+                'status': status
+            })
+        
+        # Uploaded lines that B2B Hendi dropped from the preview entirely
+        for product in products:
+            key = str(product['sku']).strip().upper()
+            if key not in seen:
+                report_rows.append({
+                    'sku': product['sku'],
+                    'requested_quantity': str(product['quantity']),
+                    'quantity': None,
+                    'status': 'unknown'
+                })
+        
+        report = {
+            'rows': report_rows,
+            'matched': sum(1 for r in report_rows if r['status'] == 'matched'),
+            'unknown': sum(1 for r in report_rows if r['status'] == 'unknown'),
+            'quantity_changed': sum(1 for r in report_rows if r['status'] == 'quantity_changed')
+        }
+        
+        logger.info(
+            f"Import preview: {report['matched']} matched, {report['unknown']} unknown, "
+            f"{report['quantity_changed']} quantity changed"
+        )
+        return report
+    
+    def read_cart(self):
+        """
+        Read the cart in one browser call by fetching the cart page with the session's cookies
+        
+        Returns:
+            list: Cart lines as dicts with 'sku', 'raw_sku' and 'quantity', or None if unreadable
+        """
+        url = self.cart_selectors.get('url')
+        if not url:
+            logger.warning("Cart URL not configured (b2b_selectors.cart.url)")
+            return None
+        
+        try:
+            self.apply_page_timeouts('read cart')
+            page = self.driver.execute_async_script("""
+                const [url, rowSelector, skuSelector, quantitySelector] = arguments;
+                const done = arguments[arguments.length - 1];
+                fetch(url, {credentials: 'same-origin'})
+                    .then(response => response.ok ? response.text() : Promise.reject(new Error('HTTP ' + response.status)))
+                    .then(html => {
+                        const doc = new DOMParser().parseFromString(html, 'text/html');
+                        done({rows: Array.from(doc.querySelectorAll(rowSelector)).map(row => {
+                            const sku = row.querySelector(skuSelector);
+                            const quantity = row.querySelector(quantitySelector);
+                            return {
+                                sku: sku ? sku.textContent.trim() : '',
+                                quantity: quantity ? String(quantity.value ?? quantity.textContent).trim() : ''
+                            };
+                        })});
+                    })
+                    .catch(error => done({error: String(error)}));
+            """, url, ', '.join(as_chain(self.cart_selectors.get('row', '.jsCartItem'))),
+                ', '.join(as_chain(self.cart_selectors.get('sku', '.jsCartItemSku'))),
+                ', '.join(as_chain(self.cart_selectors.get('quantity', 'input[name*="quantity"]'))))
+        except Exception as e:
+            logger.warning(f"Could not read cart: {e}")
+            return None
+        
+        if not page or page.get('error'):
+            logger.warning(f"Could not read cart: {(page or {}).get('error')}")
+            return None
+        
+        sku_pattern = self.cart_selectors.get('sku_pattern')
+        lines = []
+        for row in page['rows']:
+            sku = row['sku']
+            if sku_pattern:
+                match = re.search(sku_pattern, sku)
+                if not match:
+                    continue
+                sku = match.group(1) if match.groups() else match.group(0)
+            if sku:
+                lines.append({'sku': sku, 'raw_sku': row['sku'], 'quantity': row['quantity']})
+        
+        logger.info(f"Cart holds {len(lines)} lines")
+        return lines
+    
+    def adjust_cart(self, adjustments, cart_lines):
+        """
+        Set cart lines to a lower quantity (0 removes the line) on the cart page
+        
+        Args:
+            adjustments: 'adjust' entries from diff_cart
+            cart_lines: Lines returned by read_cart
+            
+        Returns:
+            bool: True if every adjustment was applied
+        """
+        raw_skus = {cart_key(line['sku']): line['raw_sku'] for line in cart_lines}
+        changes = {raw_skus[cart_key(item['sku'])]: item['quantity'] for item in adjustments}
+        
+        try:
+            self.navigate(self.cart_selectors['url'], 'cart page')
+            applied = self.driver.execute_script("""
+                const [rowSelector, skuSelector, quantitySelector, removeSelector, changes] = arguments;
+                let applied = 0;
+                for (const row of document.querySelectorAll(rowSelector)) {
+                    const sku = row.querySelector(skuSelector);
+                    if (!sku || !(sku.textContent.trim() in changes)) continue;
+                    const quantity = changes[sku.textContent.trim()];
+                    const remove = removeSelector ? row.querySelector(removeSelector) : null;
+                    if (quantity === 0 && remove) {
+                        remove.click();
+                        applied++;
+                        continue;
+                    }
+                    const input = row.querySelector(quantitySelector);
+                    if (!input || !('value' in input)) continue;
+                    input.value = quantity;
+                    input.dispatchEvent(new Event('input', {bubbles: true}));
+                    input.dispatchEvent(new Event('change', {bubbles: true}));
+                    applied++;
+                }
+                return applied;
+            """, ', '.join(as_chain(self.cart_selectors.get('row', '.jsCartItem'))),
+                ', '.join(as_chain(self.cart_selectors.get('sku', '.jsCartItemSku'))),
+                ', '.join(as_chain(self.cart_selectors.get('quantity', 'input[name*="quantity"]'))),
+                ', '.join(as_chain(self.cart_selectors.get('remove_button', ''))), changes)
+            
+            update_selector = self.cart_selectors.get('update_button')
+            update_button = self.wait_for_clickable(By.CSS_SELECTOR, update_selector) if update_selector else None
+            if update_button:
+                # Rows still carrying the mark have not been re-rendered by the update yet
+                self.driver.execute_script(
+                    "document.querySelectorAll(arguments[0]).forEach(row => row.setAttribute('data-cart-pending', ''));",
+                    ', '.join(as_chain(self.cart_selectors.get('row', '.jsCartItem')))
+                )
+                update_button.click()
+            self._settle('cart_update', 'between_steps_delay', ready_locator=lambda: self._cart_shows(changes))
+            
+            logger.info(f"Adjusted {applied} of {len(changes)} cart lines")
+            return applied == len(changes)
+            
+        except Exception as e:
+            logger.error(f"Failed to adjust cart: {e}")
+            return False
+    
+    def _cart_shows(self, changes):
+        """Whether the cart page shows the adjusted quantities (removed lines gone, rows refreshed)"""
+        return self.driver.execute_script("""
+            const [rowSelector, skuSelector, quantitySelector, changes] = arguments;
+            const rows = [...document.querySelectorAll(rowSelector)];
+            if (rows.some(row => row.hasAttribute('data-cart-pending'))) return false;
+            return Object.entries(changes).every(([sku, quantity]) => {
+                const row = rows.find(candidate => {
+                    const cell = candidate.querySelector(skuSelector);
+                    return cell && cell.textContent.trim() === sku;
+                });
+                if (quantity === 0) return !row;
+                const input = row ? row.querySelector(quantitySelector) : null;
+                return !!input && Number(input.value) === quantity;
+            });
+        """, ', '.join(as_chain(self.cart_selectors.get('row', '.jsCartItem'))),
+            ', '.join(as_chain(self.cart_selectors.get('sku', '.jsCartItemSku'))),
+            ', '.join(as_chain(self.cart_selectors.get('quantity', 'input[name*="quantity"]'))), changes)
+    
+    def apply_cart_delta(self, products):
+        """
+        Compare the cart with products, bring lines above target down and
+        return what is left to import
+        
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys
+            
+        Returns:
+            list: Products (with missing quantities) still to import, or None
+                  if the cart could not be read or adjusted (import everything)
+        """
+        import_page_url = self.driver.current_url
+        
+        with self._span('read cart', 'step'):
+            cart_lines = self.read_cart()
+        if cart_lines is None:
+            return None
+        
+        delta = diff_cart(products, cart_lines, self.cart_diff_settings.get('remove_extra', False))
+        self.last_cart_diff = delta
+        logger.info(
+            f"Cart diff: {len(delta['add'])} to import, {len(delta['adjust'])} to adjust, "
+            f"{delta['unchanged']} unchanged, {len(delta['extra'])} not in order"
+        )
+        
+        if delta['adjust']:
+            with self._span('adjust cart', 'step'):
+                adjusted = self.adjust_cart(delta['adjust'], cart_lines)
+            if not adjusted:
+                return None
+            if delta['add']:
+                self.navigate(import_page_url, 'import page')
+        
+        return delta['add']
+    
+    def open_cart_checkout(self):
+        """Go to checkout from the cart page when the cart already matches the order"""
+        try:
+            if self.driver.current_url != self.cart_selectors['url']:
+                self.navigate(self.cart_selectors['url'], 'cart page')
+        except Exception as e:
+            logger.error(f"Failed to open cart: {e}")
+            return False
+        return self.proceed_to_checkout()
+    
+    def read_import_form(self):
+        """
+        Read the import form of the B2B tab for a direct HTTP import
+        
+        Returns:
+            dict: 'url', 'user_agent', 'file_field' and 'form' (action, method,
+                  fields without the file), or None if the form is not on the page
+        """
+        form_id = self.direct_import_settings.get('form_id', 'import-form')
+        return self.driver.execute_script("""
+            const form = document.getElementById(arguments[0]);
+            if (!form) return null;
+            const file = form.querySelector('input[type="file"]');
+            if (!file || !file.name) return null;
+            const fields = [];
+            for (const [name, value] of new FormData(form)) {
+                if (typeof value === 'string') fields.push([name, value]);
+            }
+            return {
+                url: location.href,
+                user_agent: navigator.userAgent,
+                file_field: file.name,
+                form: {
+                    action: form.getAttribute('action') || location.href,
+                    method: (form.getAttribute('method') || 'post').toLowerCase(),
+                    fields: fields,
+                    buttons: []
+                }
+            };
+        """, form_id)
+    
+    def import_products_direct(self, products):
+        """
+        Import products with HTTP requests carrying the B2B tab's session cookies
+        
+        The cookies (HttpOnly ones included) come from DevTools, the import
+        form's hidden fields from the page. The B2B tab is not touched; the
+        caller opens the cart afterwards. The import report is built from the
+        preview in the upload response, and the cart is read before and after
+        adding to check that the matched lines arrived.
+        
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys
+            
+        Returns:
+            bool: True if the products were added to the cart, False if
+                  nothing was added (use the import modal), None if the
+                  add-to-cart step was sent but not confirmed
+        
+        Raises:
+            DirectImportRejected: The preview matched nothing; the import modal
+                                  would not either, so there is nothing to fall back to
+        """
+        self.last_import_report = None
+        
+        def check_preview(html):
+            self.last_import_report = self.read_import_preview_html(html, products)
+            report = self.last_import_report
+            if report and report['matched'] + report['quantity_changed'] == 0:
+                logger.error("No imported lines matched at B2B Hendi - not adding to cart")
+                return False
+            return True
+        
+        try:
+            with self._span('read import form', 'step'):
+                page = self.read_import_form()
+                if page is None:
+                    logger.info("Import form not on the B2B page, using the import modal")
+                    return False
+                cookies = self.driver.execute_cdp_cmd('Network.getCookies', {'urls': [page['url']]})['cookies']
+            
+            # Without the cart before and after, an accepted request proves nothing
+            with self._span('read cart', 'step'):
+                cart_before = self.read_cart()
+            if cart_before is None:
+                logger.info("Cart unreadable, cannot verify a direct import - using the import modal")
+                return False
+            
+            csv_path = self.create_csv_from_products(products)
+            if not csv_path:
+                return False
+            with open(csv_path, 'rb') as f:
+                csv_bytes = f.read()
+            
+            with self._span('direct import', 'step'):
+                DirectImport(self.direct_import_settings).run(page, cookies, csv_bytes, os.path.basename(csv_path),
+                                                              check_preview)
+            
+            with self._span('read cart', 'step'):
+                cart_after = self.read_cart()
+            if cart_after is None:
+                logger.warning("Cart unreadable after the direct import")
+                return None
+            
+            # Lines the preview did not recognise are not expected in the cart
+            report = self.last_import_report
+            unknown = {cart_key(row['sku']) for row in report['rows'] if row['status'] == 'unknown'} if report else set()
+            missing = missing_from_cart([product for product in products if cart_key(product['sku']) not in unknown],
+                                        cart_before, cart_after)
+            if missing:
+                logger.warning(f"Direct import: {len(missing)} lines not in the cart after adding: "
+                               f"{', '.join(item['sku'] for item in missing[:10])}")
+                return None
+            
+            logger.info(f"Imported {len(products)} products to B2B Hendi over HTTP")
+            return True
+            
+        except DirectImportUncertain as e:
+            logger.warning(f"Direct import add-to-cart not confirmed: {e}")
+            return None
+        except DirectImportRejected:
+            raise
+        except DirectImportError as e:
+            logger.warning(f"Direct import failed, using the import modal: {e}")
+            return False
+        except Exception as e:
+            logger.warning(f"Direct import unavailable, using the import modal: {e}")
+            return False
+    
+    def _import_direct_first(self, products, target):
+        """
+        Try the direct import and work out what the import modal still has to do
+        
+        Args:
+            products: Products to import (the cart delta when cart_diff is on)
+            target: The order's full product list, which the cart must end up holding
+        
+        Returns:
+            list: Products left for the import modal ([] when the cart is done),
+                  or None if the outcome is unknown and the cart cannot be read
+        
+        Raises:
+            DirectImportRejected: The preview matched nothing (see last_import_report)
+        """
+        outcome = self.import_products_direct(products)
+        if outcome is True:
+            return []
+        if outcome is False:
+            return products
+        
+        # The add-to-cart request may have gone through; only import what the cart lacks
+        return self.apply_cart_delta(target)
+    
+    def upload_csv_to_modal(self, csv_path, products=None, proceed_to_checkout=True):
         """
         Upload CSV file to the import modal and complete the import process
         
         Args:
             csv_path: Path to CSV file to upload
+            products: Products in the CSV; when given, the import preview is
+                      checked and the import stops if nothing matched
+            proceed_to_checkout: Go on to checkout after adding products to cart
             
         Returns:
             bool: True if upload successful, False otherwise
@@ -159,13 +710,6 @@ class B2BExtractor(BaseExtractor):
                 'button.jsImportNextStepButton[type="submit"][form="import-form"]')
             add_to_cart_selector = self.selectors.get('add_to_cart_button',
                 'button.jsManyProductsToCart[type="submit"]')
-            checkout_selector = self.selectors.get('checkout_button',
-                'button.jsCheckoutButton[type="submit"]')
-            new_address_checkbox_id = self.selectors.get('new_address_checkbox', 'new_delivery_address')
-            
-            # Get timing delays
-            after_upload_delay = self.timing.get('after_file_upload_delay', 1)
-            between_steps_delay = self.timing.get('between_steps_delay', 2)
             
             # Find file input in modal
             file_input = self.wait_for_element(
@@ -182,7 +726,8 @@ class B2BExtractor(BaseExtractor):
             file_input.send_keys(csv_path)
             logger.info(f"File uploaded: {csv_path}")
             
-            time.sleep(after_upload_delay)
+            self._settle('file_upload', 'after_file_upload_delay',
+                         ready_locator=(By.CSS_SELECTOR, continue_button_selector))
             
             # First click: "Kontynuuj" button
             kontynuuj_button = self.wait_for_clickable(
@@ -198,7 +743,18 @@ class B2BExtractor(BaseExtractor):
             kontynuuj_button.click()
             logger.info("Clicked 'Kontynuuj' button (first time)")
             
-            time.sleep(between_steps_delay)
+            preview_row_selector = ', '.join(as_chain(self.selectors.get('import_preview', {}).get(
+                'row', '.jsImportProductsModal table tbody tr')))
+            self._settle('import_continue_1', 'between_steps_delay',
+                         ready_locator=(By.CSS_SELECTOR, preview_row_selector))
+            
+            # Read the preview of matched lines before confirming the import
+            if products is not None:
+                self.last_import_report = self.read_import_preview(products)
+                report = self.last_import_report
+                if report and report['matched'] + report['quantity_changed'] == 0:
+                    logger.error("No imported lines matched at B2B Hendi - stopping before checkout")
+                    return False
             
             # Second click: "Kontynuuj" button again
             kontynuuj_button_2 = self.wait_for_clickable(
@@ -214,7 +770,8 @@ class B2BExtractor(BaseExtractor):
             kontynuuj_button_2.click()
             logger.info("Clicked 'Kontynuuj' button (second time)")
             
-            time.sleep(between_steps_delay)
+            self._settle('import_continue_2', 'between_steps_delay',
+                         ready_locator=(By.CSS_SELECTOR, add_to_cart_selector))
             
             # Third click: "Dodaj produkty do koszyka" button
             add_to_cart_button = self.wait_for_clickable(
@@ -230,9 +787,33 @@ class B2BExtractor(BaseExtractor):
             add_to_cart_button.click()
             logger.info("Clicked 'Dodaj produkty do koszyka' button")
             
-            time.sleep(between_steps_delay)
+            self._settle('add_to_cart', 'between_steps_delay',
+                         ready_locator=(By.CSS_SELECTOR, self.selectors.get('checkout_button',
+                                                                            'button.jsCheckoutButton[type="submit"]')))
             
-            # Fourth click: "Przejdź do zamówienia" button
+            if not proceed_to_checkout:
+                return True
+            
+            return self.proceed_to_checkout()
+            
+        except Exception as e:
+            logger.error(f"Failed to upload CSV: {e}")
+            return False
+    
+    def proceed_to_checkout(self):
+        """
+        Click 'Przejdź do zamówienia' after products were added to cart and
+        enable the new delivery address form
+        
+        Returns:
+            bool: True if checkout page opened, False otherwise
+        """
+        try:
+            checkout_selector = self.selectors.get('checkout_button',
+                'button.jsCheckoutButton[type="submit"]')
+            new_address_checkbox_id = self.selectors.get('new_address_checkbox', 'new_delivery_address')
+            
+            # "Przejdź do zamówienia" button
             checkout_button = self.wait_for_clickable(
                 By.CSS_SELECTOR,
                 checkout_selector,
@@ -246,23 +827,26 @@ class B2BExtractor(BaseExtractor):
             checkout_button.click()
             logger.info("Clicked 'Przejdź do zamówienia' button")
             
-            time.sleep(between_steps_delay)
+            self._settle('checkout', 'between_steps_delay',
+                         ready_locator=(By.ID, new_address_checkbox_id), visible=False)
             
             # Check and toggle "Wprowadź nowy adres dostawy" checkbox if not checked
             try:
-                new_address_checkbox = self.driver.find_element(
+                new_address_checkbox = self.find_element(
                     By.ID,
                     new_address_checkbox_id
                 )
                 
                 if not new_address_checkbox.is_selected():
-                    checkbox_label = self.driver.find_element(
+                    checkbox_label = self.find_element(
                         By.CSS_SELECTOR,
-                        f'label[for="{new_address_checkbox_id}"]'
+                        f'label[for="{new_address_checkbox.get_attribute("id")}"]'
                     )
                     checkbox_label.click()
                     logger.info("Checked 'Wprowadź nowy adres dostawy' checkbox")
-                    time.sleep(after_upload_delay)
+                    address_modal = self.selectors.get('address_modal', '.jsAddAddressModal')
+                    self._settle('new_address_toggle', 'after_file_upload_delay',
+                                 ready_locator=(By.CSS_SELECTOR, address_modal))
                 else:
                     logger.info("'Wprowadź nowy adres dostawy' checkbox already checked")
                     
@@ -272,7 +856,7 @@ class B2BExtractor(BaseExtractor):
             return True
             
         except Exception as e:
-            logger.error(f"Failed to upload CSV: {e}")
+            logger.error(f"Failed to proceed to checkout: {e}")
             return False
     
     def fill_delivery_address(self, address_data):
@@ -292,7 +876,6 @@ class B2BExtractor(BaseExtractor):
                 'button[type="submit"][form="user-address-form"]')
             form_fields = self.selectors.get('address_form_fields', {})
             
-            form_submit_delay = self.timing.get('form_submit_delay', 2)
             after_click_delay = self.timing.get('after_click_delay', 1)
             use_javascript = self.config.get('options', {}).get('use_javascript_for_form_filling', True)
             
@@ -313,7 +896,7 @@ class B2BExtractor(BaseExtractor):
             def fill_input(name, value):
                 try:
                     field_name = form_fields.get(name.replace('address_data[', '').replace(']', ''), name)
-                    input_element = self.driver.find_element(By.NAME, field_name)
+                    input_element = self.find_element(By.NAME, field_name)
                     input_element.clear()
                     
                     if use_javascript:
@@ -331,7 +914,7 @@ class B2BExtractor(BaseExtractor):
                     else:
                         input_element.send_keys(str(value))
                     
-                    logger.info(f"Filled {field_name}: {value}")
+                    detail_logger.info("Filled %s: %s", field_name, value)
                     return True
                 except Exception as e:
                     logger.error(f"Failed to fill {field_name}: {e}")
@@ -352,7 +935,7 @@ class B2BExtractor(BaseExtractor):
             fill_input('zip', address_data.get('zip', ''))
             fill_input('city', address_data.get('city', ''))
             
-            time.sleep(after_click_delay)
+            self._sleep(after_click_delay, 'after_click_delay')
             
             # Click "Zapisz" button
             save_button = self.wait_for_clickable(
@@ -368,7 +951,8 @@ class B2BExtractor(BaseExtractor):
             save_button.click()
             logger.info("Clicked 'Zapisz' button")
             
-            time.sleep(form_submit_delay)
+            self._settle('address_save', 'form_submit_delay',
+                         ready_locator=lambda: self.find_first(By.CSS_SELECTOR, modal_selector, mode='visible') is None)
             return True
             
         except Exception as e:
@@ -390,10 +974,12 @@ class B2BExtractor(BaseExtractor):
             bank_transfer_value = self.payment_methods.get('bank_transfer_value', '29')
             cash_on_delivery_value = self.payment_methods.get('cash_on_delivery_value', '21')
             
-            payment_delay = self.timing.get('payment_section_delay', 2)
             after_click_delay = self.timing.get('after_click_delay', 1)
             
-            time.sleep(payment_delay)
+            bank_transfer_selector = payment_selectors.get('bank_transfer_radio',
+                f'input[type="radio"][name="payment_id"][value="{bank_transfer_value}"]')
+            self._settle('payment_section', 'payment_section_delay',
+                         ready_locator=(By.CSS_SELECTOR, bank_transfer_selector), visible=False)
             
             # Convert payment_amount to float
             try:
@@ -405,81 +991,56 @@ class B2BExtractor(BaseExtractor):
                 # Order paid - select bank transfer
                 logger.info(f"Order already paid ({amount} PLN) - selecting 'Przelew 3 dni'")
                 
-                try:
-                    przelew_radio = self.driver.find_element(
-                        By.CSS_SELECTOR,
-                        payment_selectors.get('bank_transfer_radio',
-                            f'input[type="radio"][name="payment_id"][value="{bank_transfer_value}"]')
-                    )
-                    
-                    if not przelew_radio.is_selected():
-                        self.driver.execute_script("arguments[0].click();", przelew_radio)
-                        logger.info("Selected 'Przelew 3 dni' payment method")
-                        time.sleep(after_click_delay)
-                    else:
-                        logger.info("'Przelew 3 dni' payment method already selected")
-                        
-                except Exception as e:
-                    logger.error(f"Could not select 'Przelew 3 dni': {e}")
-                    # Try clicking label
-                    try:
-                        label = self.driver.find_element(
-                            By.CSS_SELECTOR,
-                            payment_selectors.get('bank_transfer_label', f'label[for="{bank_transfer_value}"]')
-                        )
-                        self.driver.execute_script("arguments[0].click();", label)
-                        logger.info("Selected 'Przelew 3 dni' using label click")
-                        time.sleep(after_click_delay)
-                    except Exception as e2:
-                        logger.error(f"Could not click 'Przelew 3 dni' label: {e2}")
-                        return False
+                # Radio first, label as fallback, resolved in one query
+                bank_transfer_chain = as_chain(bank_transfer_selector) + as_chain(
+                    payment_selectors.get('bank_transfer_label', f'label[for="{bank_transfer_value}"]'))
+                przelew = self.find_first(By.CSS_SELECTOR, bank_transfer_chain)
+                
+                if przelew is None:
+                    logger.error("Could not find 'Przelew 3 dni' radio or label")
+                    return False
+                
+                if przelew.tag_name.lower() == 'input' and przelew.is_selected():
+                    logger.info("'Przelew 3 dni' payment method already selected")
+                else:
+                    self.driver.execute_script("arguments[0].click();", przelew)
+                    logger.info("Selected 'Przelew 3 dni' payment method")
+                    self._sleep(after_click_delay, 'after_click_delay')
                         
             else:
                 # Order NOT paid - select cash on delivery
                 logger.info("Order NOT paid - selecting 'Pobranie' with empty field")
                 
+                # Radio first, label as fallback, resolved in one query
+                cash_on_delivery_chain = as_chain(payment_selectors.get('cash_on_delivery_radio',
+                    f'input[type="radio"][name="payment_id"][value="{cash_on_delivery_value}"]')) + as_chain(
+                    payment_selectors.get('cash_on_delivery_label', f'label[for="{cash_on_delivery_value}"]'))
+                pobranie = self.find_first(By.CSS_SELECTOR, cash_on_delivery_chain)
+                
+                if pobranie is None:
+                    logger.error("Could not find 'Pobranie' radio or label")
+                    return False
+                
+                if pobranie.tag_name.lower() == 'input' and pobranie.is_selected():
+                    logger.info("'Pobranie' payment method already selected")
+                else:
+                    self.driver.execute_script("arguments[0].click();", pobranie)
+                    logger.info("Selected 'Pobranie' payment method")
+                    self._sleep(after_click_delay, 'after_click_delay')
+                
+                # Make sure field is empty
                 try:
-                    pobranie_radio = self.driver.find_element(
-                        By.CSS_SELECTOR,
-                        payment_selectors.get('cash_on_delivery_radio',
-                            f'input[type="radio"][name="payment_id"][value="{cash_on_delivery_value}"]')
+                    payment_input = self.find_element(
+                        By.NAME,
+                        payment_selectors.get('cash_amount_field',
+                            f'payment_params[custom_payment_price][{cash_on_delivery_value}]')
                     )
-                    
-                    if not pobranie_radio.is_selected():
-                        self.driver.execute_script("arguments[0].click();", pobranie_radio)
-                        logger.info("Selected 'Pobranie' payment method")
-                        time.sleep(after_click_delay)
-                    else:
-                        logger.info("'Pobranie' payment method already selected")
-                    
-                    # Make sure field is empty
-                    try:
-                        payment_input = self.driver.find_element(
-                            By.NAME,
-                            payment_selectors.get('cash_amount_field',
-                                f'payment_params[custom_payment_price][{cash_on_delivery_value}]')
-                        )
-                        payment_input.clear()
-                        logger.info("Left 'Pobranie' amount field empty")
-                    except Exception as e:
-                        logger.warning(f"Could not clear payment field: {e}")
-                        
+                    payment_input.clear()
+                    logger.info("Left 'Pobranie' amount field empty")
                 except Exception as e:
-                    logger.error(f"Could not select 'Pobranie': {e}")
-                    # Try clicking label
-                    try:
-                        label = self.driver.find_element(
-                            By.CSS_SELECTOR,
-                            payment_selectors.get('cash_on_delivery_label', f'label[for="{cash_on_delivery_value}"]')
-                        )
-                        self.driver.execute_script("arguments[0].click();", label)
-                        logger.info("Selected 'Pobranie' using label click")
-                        time.sleep(after_click_delay)
-                    except Exception as e2:
-                        logger.error(f"Could not click 'Pobranie' label: {e2}")
-                        return False
-            
-            time.sleep(after_click_delay)
+                    logger.warning(f"Could not clear payment field: {e}")
+            
+            self._sleep(after_click_delay, 'after_click_delay')
             return True
             
         except Exception as e:
@@ -501,6 +1062,28 @@ class B2BExtractor(BaseExtractor):
             logger.error("B2B Hendi tab not found")
             return False
         
+        # Retries only import what the cart is missing
+        target = products
+        if self.cart_diff_settings.get('enabled'):
+            delta = self.apply_cart_delta(products)
+            if delta is not None:
+                if not delta:
+                    logger.info("Cart already matches the order")
+                    return self.open_cart_checkout()
+                products = delta
+        
+        if self.direct_import_settings.get('enabled'):
+            try:
+                products = self._import_direct_first(products, target)
+            except DirectImportRejected:
+                logger.error("No imported lines matched at B2B Hendi - not importing through the modal")
+                return False
+            if products is None:
+                logger.error("Direct import outcome unknown and cart unreadable - not importing again")
+                return False
+            if not products:
+                return self.open_cart_checkout()
+        
         # Step 2: Open import modal
         if not self.click_import_products_button():
             logger.error("Failed to open import modal")
@@ -513,9 +1096,140 @@ class B2BExtractor(BaseExtractor):
             return False
         
         # Step 4: Upload CSV
-        if not self.upload_csv_to_modal(csv_path):
+        if not self.upload_csv_to_modal(csv_path, products):
             logger.error("Failed to upload CSV")
             return False
         
         logger.info(f"Successfully imported {len(products)} products to B2B Hendi")
-        return True
\ No newline at end of file
+        return True
+    
+    def import_products_chunked(self, products, chunk_size):
+        """
+        Import a large order in chunks so the import modal never times out
+        
+        Every chunk goes through its own import up to 'Dodaj produkty do koszyka';
+        the import page is reloaded between chunks and checkout is opened once,
+        after the last chunk.
+        
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys
+            chunk_size: Maximum number of products per import
+            
+        Yields:
+            dict: Progress event per chunk ('event': 'chunk') and a final
+                  'checkout' event; stops after the first failed event
+        """
+        chunk_size = max(1, int(chunk_size))
+        total_chunks = (len(products) + chunk_size - 1) // chunk_size
+        
+        if not self.find_b2b_hendi_tab():
+            logger.error("B2B Hendi tab not found")
+            yield {"event": "chunk", "chunk": 0, "chunks": total_chunks, "success": False,
+                   "error": "B2B Hendi tab not found"}
+            return
+        
+        # Retries only import what the cart is missing
+        target = products
+        if self.cart_diff_settings.get('enabled'):
+            delta = self.apply_cart_delta(products)
+            if delta is not None:
+                products = delta
+                total_chunks = (len(products) + chunk_size - 1) // chunk_size
+            if delta == []:
+                success = self.open_cart_checkout()
+                yield {
+                    "event": "checkout",
+                    "success": success,
+                    "imported": 0,
+                    "total": 0,
+                    "cart_diff": self.last_cart_diff,
+                    **({} if success else {"error": "Failed to open checkout"})
+                }
+                return
+        
+        # Without the modal there is no timeout to chunk around
+        if self.direct_import_settings.get('enabled'):
+            started = time.monotonic()
+            try:
+                remaining = self._import_direct_first(products, target)
+            except DirectImportRejected:
+                yield {"event": "chunk", "chunk": 0, "chunks": total_chunks, "success": False,
+                       "import_report": self.last_import_report, "direct": True,
+                       "error": "No imported lines matched at B2B Hendi"}
+                return
+            if remaining is None:
+                yield {"event": "chunk", "chunk": 0, "chunks": total_chunks, "success": False,
+                       "error": "Direct import outcome unknown and cart unreadable"}
+                return
+            if not remaining:
+                yield {"event": "chunk", "chunk": 1, "chunks": 1, "products": len(products),
+                       "imported": len(products), "total": len(products),
+                       "seconds": round(time.monotonic() - started, 2), "success": True,
+                       "import_report": self.last_import_report, "direct": True}
+                success = self.open_cart_checkout()
+                yield {
+                    "event": "checkout",
+                    "success": success,
+                    "imported": len(products),
+                    "total": len(products),
+                    "cart_diff": self.last_cart_diff,
+                    **({} if success else {"error": "Failed to open checkout"})
+                }
+                return
+            products = remaining
+            total_chunks = (len(products) + chunk_size - 1) // chunk_size
+        
+        import_page_url = self.driver.current_url
+        csv_path = os.path.join(tempfile.gettempdir(), 'products_chunk.csv')
+        imported = 0
+        
+        for index in range(total_chunks):
+            chunk = products[index * chunk_size:(index + 1) * chunk_size]
+            started = time.monotonic()
+            
+            if index > 0:
+                self.navigate(import_page_url, 'import page')
+            
+            success = (
+                self.click_import_products_button()
+                and self.create_csv_from_products(chunk, csv_path) is not None
+                and self.upload_csv_to_modal(csv_path, chunk, proceed_to_checkout=False)
+            )
+            
+            if success:
+                imported += len(chunk)
+            
+            event = {
+                "event": "chunk",
+                "chunk": index + 1,
+                "chunks": total_chunks,
+                "products": len(chunk),
+                "imported": imported,
+                "total": len(products),
+                "seconds": round(time.monotonic() - started, 2),
+                "success": success,
+                "import_report": self.last_import_report
+            }
+            logger.info(f"Chunk {index + 1}/{total_chunks}: {len(chunk)} products, success={success}")
+            
+            if not success:
+                event["error"] = f"Import of chunk {index + 1}/{total_chunks} failed"
+                yield event
+                return
+            
+            yield event
+        
+        success = self.proceed_to_checkout()
+        yield {
+            "event": "checkout",
+            "success": success,
+            "imported": imported,
+            "total": len(products),
+            "cart_diff": self.last_cart_diff,
+            **({} if success else {"error": "Failed to open checkout"})
+        }
+    
+    def close(self):
+        """Persist the timing profile and close the connection"""
+        self.timing_profile.save()
+        super().close()
@@ -7,27 +7,44 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import nullcontext
 import logging
 import os
 import stat
+from .selector_chain import LOOKUP_KINDS, FIND_FIRST_SCRIPT, SelectorCache, as_chain
+from .deadline import Deadline
+from .driver_lifecycle import DriverLifecycle
 
 logger = logging.getLogger(__name__)
 
+# Per-product/per-field lines; level is set from config["logging"]["detail_level"]
+detail_logger = logging.getLogger('extractors.detail')
+
 class BaseExtractor:
     """Base class for all extractors with common Selenium functionality"""
     
-    def __init__(self, chrome_debug_port=9222, config=None):
+    # Callable(extractor) -> driver, set by a process that keeps one attachment
+    # per Chrome (see driver_broker.py); None starts a session per connect
+    driver_provider = None
+    
+    def __init__(self, chrome_debug_port=9222, config=None, deadline=None, recorder=None, timeline=None):
         self.chrome_debug_port = chrome_debug_port
         self.config = config or {}
+        self.deadline = deadline or Deadline()
+        self.recorder = recorder
+        self.timeline = timeline
         self.driver = None
+        self._owns_driver = False
         self._chrome_host = self._detect_chrome_host()
         
         # Get timing configuration
         self.timing = self.config.get('timing', {})
         self.default_timeout = self.timing.get('default_timeout', 10)
         self.element_wait_timeout = self.timing.get('element_wait_timeout', 10)
+        self.page_load_timeout = self.timing.get('page_load_timeout', 60)
+        self.script_timeout = self.timing.get('script_timeout', 30)
     
     def _detect_chrome_host(self):
         """Detect the correct Chrome host (for Docker compatibility)"""
@@ -158,26 +175,54 @@ class BaseExtractor:
             logger.error(f"Error getting chromedriver path: {e}")
             raise
         
+    def _span(self, name, kind):
+        """Timeline span for the current job, or a no-op without a timeline"""
+        return self.timeline.span(name, kind) if self.timeline is not None else nullcontext()
+    
+    def _sleep(self, seconds, what):
+        """Sleep within the deadline, shown as a sleep span on the timeline"""
+        with self._span(what, 'sleep'):
+            self.deadline.sleep(seconds, what)
+    
     def connect_to_chrome(self):
         """Connect to existing Chrome instance via remote debugging"""
+        with self._span('connect to Chrome', 'connect'):
+            return self._connect_to_chrome()
+    
+    def create_driver(self):
+        """Start a chromedriver session attached to the debug port"""
+        chrome_options = Options()
+        chrome_options.add_experimental_option(
+            "debuggerAddress", 
+            f"{self._chrome_host}:{self.chrome_debug_port}"
+        )
+        
+        logger.info("Creating Chrome WebDriver instance with automatic ChromeDriver management...")
+        
+        # Get the correct chromedriver path
+        driver_path = self._get_chromedriver_path()
+        logger.info(f"Using chromedriver at: {driver_path}")
+        
+        # Create service with the correct path
+        service = Service(driver_path)
+        return webdriver.Chrome(service=service, options=chrome_options)
+    
+    def _connect_to_chrome(self):
+        """Create (or borrow from the driver provider) the WebDriver session attached to the debug port"""
         try:
             logger.info(f"Attempting to connect to Chrome on {self._chrome_host}:{self.chrome_debug_port}...")
             
-            chrome_options = Options()
-            chrome_options.add_experimental_option(
-                "debuggerAddress", 
-                f"{self._chrome_host}:{self.chrome_debug_port}"
-            )
-            
-            logger.info("Creating Chrome WebDriver instance with automatic ChromeDriver management...")
-            
-            # Get the correct chromedriver path
-            driver_path = self._get_chromedriver_path()
-            logger.info(f"Using chromedriver at: {driver_path}")
-            
-            # Create service with the correct path
-            service = Service(driver_path)
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            if BaseExtractor.driver_provider is not None:
+                self.driver = BaseExtractor.driver_provider(self)
+            else:
+                self.driver = DriverLifecycle.for_config(self.config).acquire(self)
+                self._owns_driver = True
+            if self.recorder is not None:
+                self.recorder.attach(self.driver)
+            if self.timeline is not None:
+                self.timeline.attach(self.driver)
+            # Clicks that load a page are bounded by these too
+            self.apply_page_timeouts('connect')
             
             logger.info("Successfully connected to Chrome via remote debugging")
             return True
@@ -185,6 +230,31 @@ class BaseExtractor:
             logger.error(f"Failed to connect to Chrome: {e}", exc_info=True)
             return False
     
+    def apply_page_timeouts(self, what):
+        """
+        Limit page loads and async scripts to the remaining budget
+        
+        WebDriverWait and sleeps are clamped by the deadline; driver.get, page
+        loads started by clicks and async scripts are bound by chromedriver's
+        own timeouts (300s page load by default) unless they are set here.
+        
+        Raises:
+            DeadlineExceeded: If the budget is already spent
+        """
+        self.deadline.check(what)
+        self.driver.set_page_load_timeout(self.deadline.clamp(self.page_load_timeout, f"{what} (page load)"))
+        self.driver.set_script_timeout(self.deadline.clamp(self.script_timeout, f"{what} (script)"))
+    
+    def navigate(self, url, what='page load'):
+        """driver.get bounded by the remaining budget"""
+        self.apply_page_timeouts(what)
+        self.driver.get(url)
+    
+    def reload(self, what='page reload'):
+        """driver.refresh bounded by the remaining budget"""
+        self.apply_page_timeouts(what)
+        self.driver.refresh()
+    
     def find_tab_by_keywords(self, keywords):
         """
         Find and switch to tab matching any of the keywords
@@ -200,13 +270,14 @@ class BaseExtractor:
             return False
         
         try:
-            for window in self.driver.window_handles:
-                self.driver.switch_to.window(window)
-                title = self.driver.title.lower()
-                
-                if any(keyword.lower() in title for keyword in keywords):
-                    logger.info(f"Found tab matching keywords {keywords}: {self.driver.title}")
-                    return True
+            with self._span(f"find tab ({', '.join(keywords)})", 'tab'):
+                for window in self.driver.window_handles:
+                    self.driver.switch_to.window(window)
+                    title = self.driver.title.lower()
+                    
+                    if any(keyword.lower() in title for keyword in keywords):
+                        logger.info(f"Found tab matching keywords {keywords}: {self.driver.title}")
+                        return True
             
             logger.warning(f"Tab not found for keywords: {keywords}")
             return False
@@ -214,26 +285,85 @@ class BaseExtractor:
             logger.error(f"Error finding tab: {e}")
             return False
     
-    def wait_for_element(self, by, value, timeout=None):
+    def find_first(self, by, value, mode='present'):
         """
-        Wait for element to be present
+        Find the first element matching a selector chain in one browser call
+        
+        The candidate that matched last time on the same page is tried first,
+        so a changed selector only costs its fallbacks once.
         
         Args:
             by: Selenium By locator type
-            value: Locator value
-            timeout: Maximum wait time in seconds (uses config if not provided)
+            value: Selector string or ordered list of fallback selectors
+            mode: 'present', 'visible' or 'clickable' (visible and enabled)
             
         Returns:
             WebElement or None
         """
+        chain = as_chain(value)
+        if not chain:
+            return None
+        
+        kind = LOOKUP_KINDS.get(by)
+        if kind is None:
+            # Locator types without a DOM lookup (XPath, tag name, ...) are tried one by one
+            for candidate in chain:
+                elements = self.driver.find_elements(by, candidate)
+                if mode == 'present' and elements:
+                    return elements[0]
+                for element in elements:
+                    if element.is_displayed() and (mode != 'clickable' or element.is_enabled()):
+                        return element
+            return None
+        
+        index, element, page = self.driver.execute_script(
+            FIND_FIRST_SCRIPT, kind, chain, mode, SelectorCache.winners(by, chain)
+        )
+        if element is None:
+            return None
+        
+        if index > 0:
+            detail_logger.info("Selector fallback matched on %s: %s", page, chain[index])
+        SelectorCache.remember(by, chain, page, index)
+        return element
+    
+    def find_element(self, by, value):
+        """
+        Find an element by selector chain, raising like driver.find_element
+        
+        Raises:
+            NoSuchElementException: If no candidate matches
+        """
+        element = self.find_first(by, value)
+        if element is None:
+            raise NoSuchElementException(f"No element for {by}={value}")
+        return element
+    
+    def _wait_for_first(self, by, value, mode, timeout):
+        """Poll find_first until it returns an element or the timeout passes"""
         if timeout is None:
             timeout = self.element_wait_timeout
+        timeout = self.deadline.clamp(timeout, f"{by}={value} ({mode})")
+        
+        with self._span(f"wait {mode}: {as_chain(value)[0] if as_chain(value) else value}", 'wait'):
+            return WebDriverWait(self.driver, timeout).until(
+                lambda driver: self.find_first(by, value, mode)
+            )
+    
+    def wait_for_element(self, by, value, timeout=None):
+        """
+        Wait for element to be present
+        
+        Args:
+            by: Selenium By locator type
+            value: Locator value, or ordered list of fallback values
+            timeout: Maximum wait time in seconds (uses config if not provided)
             
+        Returns:
+            WebElement or None
+        """
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((by, value))
-            )
-            return element
+            return self._wait_for_first(by, value, 'present', timeout)
         except Exception as e:
             logger.error(f"Element not found: {by}={value}, error: {e}")
             return None
@@ -244,20 +374,14 @@ class BaseExtractor:
         
         Args:
             by: Selenium By locator type
-            value: Locator value
+            value: Locator value, or ordered list of fallback values
             timeout: Maximum wait time in seconds (uses config if not provided)
             
         Returns:
             WebElement or None
         """
-        if timeout is None:
-            timeout = self.element_wait_timeout
-            
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable((by, value))
-            )
-            return element
+            return self._wait_for_first(by, value, 'clickable', timeout)
         except Exception as e:
             logger.error(f"Element not clickable: {by}={value}, error: {e}")
             return None
@@ -265,6 +389,12 @@ class BaseExtractor:
     def close(self):
         """Close the connection (but don't close Chrome)"""
         if self.driver:
-            # We don't quit() because we're using existing Chrome
+            # We don't quit() because we're using existing Chrome; the idle
+            # chromedriver is reused or stopped by the lifecycle manager
+            if self._owns_driver:
+                # Detached in reverse attach order once the driver goes to another job;
+                # until then a failed job's flight recorder can still snapshot the tab
+                DriverLifecycle.for_config(self.config).release(self.driver, (self.timeline, self.recorder))
+                self._owns_driver = False
             self.driver = None
             logger.info("Extractor connection closed")
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+BaseLinker API Extractor
+Reads orders through the BaseLinker HTTP API (connector.php) instead of the
+panel, returning the same structure as BaseLinkerExtractor.extract_all_data
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import requests
+from .deadline import Deadline
+from .order_payload import map_order_payload
+
+logger = logging.getLogger(__name__)
+
+# getOrders order fields, in config["network_extraction"]["fields"] form
+API_FIELDS = {
+    "order_id": "order_id",
+    "products": "products",
+    "product_sku": "sku",
+    "product_quantity": "quantity",
+    "total_price": "order_total",
+    "paid_amount": "payment_done",
+    "phone": "phone",
+    "email": "email",
+    "address": {
+        "name": "delivery_fullname",
+        "company": "delivery_company",
+        "address": "delivery_address",
+        "city": "delivery_city",
+        "postal_code": "delivery_postcode"
+    },
+    "b2b_number": "extra_field_1"
+}
+
+# getOrders returns at most this many orders per call
+PAGE_SIZE = 100
+
+
+class BaseLinkerApiError(Exception):
+    """Error status returned by the BaseLinker API"""
+
+
+class BaseLinkerApiExtractor:
+    """BaseLinker order data from the HTTP API; needs no browser"""
+
+    # Time of the last API call, shared so all extractors keep to the rate limit
+    _last_call = 0.0
+    _rate_lock = threading.Lock()
+
+    def __init__(self, config=None, deadline=None, session=None):
+        self.config = config or {}
+        self.deadline = deadline or Deadline()
+        self.settings = self.config.get('baselinker_api', {})
+        self.data_processing = self.config.get('data_processing', {})
+        self.url = self.settings.get('url', 'https://api.baselinker.com/connector.php')
+        self.token = self.settings.get('token') or os.environ.get('BASELINKER_API_TOKEN', '')
+        self.timeout = self.settings.get('timeout', 20)
+        self.session = session or requests.Session()
+
+    def status_id(self):
+        """Order status to list: configured, else the one in baselinker_url (#status:26890)"""
+        if self.settings.get('status_id'):
+            return int(self.settings['status_id'])
+        match = re.search(r'status:(\d+)', self.config.get('baselinker_url', ''))
+        return int(match.group(1)) if match else None
+
+    def _throttle(self):
+        min_interval = self.settings.get('min_interval', 0.6)
+        with BaseLinkerApiExtractor._rate_lock:
+            wait = BaseLinkerApiExtractor._last_call + min_interval - time.monotonic()
+            if wait > 0:
+                self.deadline.sleep(wait, 'BaseLinker API rate limit')
+            BaseLinkerApiExtractor._last_call = time.monotonic()
+
+    def call(self, method, parameters):
+        """
+        Call one API method
+
+        Returns:
+            dict: Decoded response
+
+        Raises:
+            BaseLinkerApiError: Error status in the response
+            DeadlineExceeded: If the job's time budget is spent
+        """
+        if not self.token:
+            raise BaseLinkerApiError("BaseLinker API token not configured (baselinker_api.token)")
+
+        self._throttle()
+        self.deadline.check(f'BaseLinker API {method}')
+        response = self.session.post(
+            self.url,
+            headers={'X-BLToken': self.token},
+            data={'method': method, 'parameters': json.dumps(parameters)},
+            timeout=self.deadline.clamp(self.timeout, f'BaseLinker API {method}')
+        )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('status') != 'SUCCESS':
+            raise BaseLinkerApiError(f"{method}: {data.get('error_code')} {data.get('error_message')}")
+        return data
+
+    def iter_orders(self, status_id=None, id_from=None, max_pages=None):
+        """
+        Page through getOrders, oldest order id first
+
+        Args:
+            status_id: Only orders in this status (None for all statuses)
+            id_from: First order id to return
+            max_pages: Stop after this many calls (None for no limit)
+
+        Yields:
+            dict: Raw API order
+        """
+        parameters = {'get_unconfirmed_orders': self.settings.get('include_unconfirmed', False)}
+        if status_id is not None:
+            parameters['status_id'] = status_id
+        if id_from is None:
+            # getOrders starts at date_confirmed_from when no id is given
+            parameters['date_confirmed_from'] = int(time.time()) - int(self.settings.get('days_back', 30)) * 86400
+
+        pages = 0
+        while True:
+            if id_from is not None:
+                parameters['id_from'] = id_from
+            orders = self.call('getOrders', parameters).get('orders', [])
+            pages += 1
+            yield from orders
+
+            if len(orders) < PAGE_SIZE or (max_pages is not None and pages >= max_pages):
+                return
+            id_from = max(int(order['order_id']) for order in orders) + 1
+            parameters.pop('date_confirmed_from', None)
+
+    def to_order_data(self, order):
+        """
+        Map an API order onto the extract_all_data structure
+
+        Returns:
+            dict: order_id, b2b_number, products, payment_amount, phone, email, address,
+                  or None if the order has no products with a SKU
+        """
+        total = sum(float(product.get('price_brutto') or 0) * int(product.get('quantity') or 0)
+                    for product in order.get('products', []))
+        total += float(order.get('delivery_price') or 0)
+
+        data = map_order_payload({**order, 'order_total': round(total, 2)}, API_FIELDS, self.data_processing)
+        if data is None:
+            return None
+        return {"order_id": str(order['order_id']), **data}
+
+    def extract_all_data(self, order_id):
+        """
+        Read one order
+
+        Returns:
+            dict: Same structure as BaseLinkerExtractor.extract_all_data, or None if not found
+        """
+        orders = self.call('getOrders', {'order_id': int(order_id), 'get_unconfirmed_orders': True}).get('orders', [])
+        return self.to_order_data(orders[0]) if orders else None
+
+    def extract_orders(self, order_ids):
+        """
+        Read several orders with as few calls as possible
+
+        Ids are fetched a page at a time from the lowest one up; ids the
+        pages skip over (other statuses, gaps) are then read one by one.
+
+        Yields:
+            dict: Extracted data per order with 'success' (and 'error' on failure)
+        """
+        wanted = {str(order_id) for order_id in order_ids}
+        found = {}
+
+        if len(wanted) > 1:
+            last = max(int(order_id) for order_id in wanted)
+            max_pages = self.settings.get('max_scan_pages', 5)
+            for order in self.iter_orders(id_from=min(int(order_id) for order_id in wanted), max_pages=max_pages):
+                order_id = str(order['order_id'])
+                if order_id in wanted:
+                    found[order_id] = order
+                if int(order_id) >= last:
+                    break
+
+        for order_id in order_ids:
+            order_id = str(order_id)
+            try:
+                if order_id in found:
+                    data = self.to_order_data(found[order_id])
+                else:
+                    data = self.extract_all_data(order_id)
+            except (BaseLinkerApiError, requests.RequestException, ValueError) as e:
+                logger.error(f"BaseLinker API failed for order {order_id}: {e}")
+                yield {"order_id": order_id, "success": False, "error": str(e)}
+                continue
+
+            if data is None:
+                yield {"order_id": order_id, "success": False, "error": "Order not found or has no products"}
+            else:
+                yield {**data, "success": True}
+
+    def extract_status_orders(self, status_id=None):
+        """
+        Read every order in a status (default: the status of baselinker_url)
+
+        Yields:
+            dict: Extracted data per order with 'success'
+        """
+        status_id = status_id or self.status_id()
+        for order in self.iter_orders(status_id=status_id):
+            data = self.to_order_data(order)
+            if data is None:
+                yield {"order_id": str(order['order_id']), "success": False, "error": "Order has no products"}
+            else:
+                yield {**data, "success": True}
+
+    def close(self):
+        self.session.close()
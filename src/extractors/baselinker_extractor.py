@@ -3,27 +3,223 @@ BaseLinker Extractor
 Extracts order information from BaseLinker tab
 """
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
 import re
+import json
 import logging
-from .base_extractor import BaseExtractor
+import threading
+from .base_extractor import BaseExtractor, detail_logger
+from .sku_catalog import normalize_sku
+from .order_payload import parse_payloads, map_order_payload
 
 logger = logging.getLogger(__name__)
 
+# Keeps the bodies of the page's own fetch/XHR responses whose URL matches the
+# configured pattern in window.__blOrderPayloads (newest last, bounded)
+NETWORK_CAPTURE_SCRIPT = """
+(() => {
+    if (window.__blOrderCapture) return;
+    window.__blOrderCapture = true;
+    window.__blOrderPayloads = [];
+    const pattern = new RegExp(%(pattern)s);
+    const limit = %(limit)d;
+    const keep = (url, body) => {
+        if (!pattern.test(url)) return;
+        window.__blOrderPayloads.push({url: url, body: body});
+        if (window.__blOrderPayloads.length > limit) window.__blOrderPayloads.shift();
+    };
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function (...args) {
+            return originalFetch.apply(this, args).then(response => {
+                if (pattern.test(response.url)) {
+                    response.clone().text().then(body => keep(response.url, body), () => {});
+                }
+                return response;
+            });
+        };
+    }
+    const originalOpen = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url, ...rest) {
+        this.addEventListener('load', () => {
+            if (this.responseType === '' || this.responseType === 'text') keep(this.responseURL || String(url), this.responseText);
+        });
+        return originalOpen.call(this, method, url, ...rest);
+    };
+})();
+"""
+
 class BaseLinkerExtractor(BaseExtractor):
     """Extractor for BaseLinker order data"""
     
     BASELINKER_KEYWORDS = ["baselinker", "base", "linker"]
     
-    def __init__(self, chrome_debug_port=9222, config=None):
-        super().__init__(chrome_debug_port, config)
+    # Capture hook registered per tab ((WebDriver session, window handle) ->
+    # (DevTools identifier, script)); registrations end with the session that made them
+    _capture_registrations = {}
+    _capture_lock = threading.Lock()
+    
+    def __init__(self, chrome_debug_port=9222, config=None, deadline=None, recorder=None, timeline=None):
+        super().__init__(chrome_debug_port, config, deadline, recorder, timeline)
         self.selectors = self.config.get('baselinker_selectors', {})
         self.patterns = self.config.get('regex_patterns', {}).get('baselinker', {})
         self.data_processing = self.config.get('data_processing', {})
+        self.network_settings = self.config.get('network_extraction', {})
     
     def find_baselinker_tab(self):
         """Find and switch to BaseLinker tab"""
         keywords = self.config.get('baselinker_keywords', self.BASELINKER_KEYWORDS)
-        return self.find_tab_by_keywords(keywords)
+        found = self.find_tab_by_keywords(keywords)
+        if found and self.network_settings.get('enabled', False):
+            self.install_network_capture()
+        return found
+    
+    def install_network_capture(self):
+        """
+        Capture the order data responses of the current tab (network extraction mode)
+        
+        The hook is registered through DevTools once per tab for every document
+        it loads from now on (again only if the settings changed, replacing
+        the old registration), and injected into the current one so the order
+        pages BaseLinker opens in place are captured too. An order that was
+        already on screen before the hook existed is read from the DOM.
+        
+        Returns:
+            bool: True if the hook is installed
+        """
+        script = NETWORK_CAPTURE_SCRIPT % {
+            'pattern': json.dumps(self.network_settings.get('url_pattern', '')),
+            'limit': int(self.network_settings.get('max_payloads', 20))
+        }
+        try:
+            key = (self.driver.session_id, self.driver.current_window_handle)
+            with BaseLinkerExtractor._capture_lock:
+                registered = BaseLinkerExtractor._capture_registrations.get(key)
+                if registered is None or registered[1] != script:
+                    if registered is not None:
+                        self.driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument',
+                                                    {'identifier': registered[0]})
+                    identifier = self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                                                             {'source': script})['identifier']
+                    BaseLinkerExtractor._capture_registrations[key] = (identifier, script)
+            # No-op on a document that already has the hook
+            self.driver.execute_script(script)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not install network capture, using DOM extraction: {e}")
+            return False
+    
+    def read_network_order(self, order_id):
+        """
+        Build the order data from the captured order payload of the current tab
+        
+        Args:
+            order_id: Order id the payload must belong to
+            
+        Returns:
+            dict: Same fields as snapshot_current_order, or None if no usable payload was captured
+        """
+        try:
+            captured = self.driver.execute_script('return window.__blOrderPayloads || [];')
+        except Exception as e:
+            logger.warning(f"Could not read captured order payloads: {e}")
+            return None
+        
+        fields = self.network_settings.get('fields', {})
+        for payload in parse_payloads(captured, self.network_settings.get('url_pattern', '')):
+            data = map_order_payload(payload, fields, self.data_processing, order_id)
+            if data is not None:
+                logger.info(f"Order {order_id} read from captured payload ({len(data['products'])} products)")
+                return {"order_id": order_id, **data}
+        
+        logger.info(f"No captured payload for order {order_id}, using DOM extraction")
+        return None
+    
+    def _load(self, url, what):
+        """
+        Load url in the tab with exactly one page load
+        
+        BaseLinker URLs differ only in the fragment, and driver.get to another
+        fragment of the same page does not reload it, so the URL is swapped in
+        place (without a hashchange) and the page reloaded once.
+        """
+        if self.driver.current_url.split('#')[0] == url.split('#')[0]:
+            self.driver.execute_script('history.replaceState(history.state, "", arguments[0]);', url)
+            self.reload(what)
+        else:
+            self.navigate(url, what)
+    
+    def open_order(self, order_id):
+        """
+        Navigate the BaseLinker tab to a single order (headless worker mode)
+        
+        Args:
+            order_id: BaseLinker order id
+            
+        Returns:
+            bool: True if the order's product table loaded
+        """
+        url_template = self.config.get('baselinker_order_url', 'https://panel-g.baselinker.com/orders.php#order:{order_id}')
+        url = url_template.format(order_id=order_id)
+        
+        try:
+            if not self.find_baselinker_tab():
+                return False
+            
+            self._load(url, 'BaseLinker order')
+            
+            container_id = self.selectors.get('products_container', 'sale_items_container')
+            if self.wait_for_element(By.ID, container_id, timeout=self.default_timeout) is None:
+                logger.error(f"Order {order_id} did not load")
+                return False
+            
+            logger.info(f"Opened BaseLinker order {order_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to open BaseLinker order {order_id}: {e}")
+            return False
+    
+    def return_to_order_list(self, order_id=None, timeout=None):
+        """
+        Check the BaseLinker tab is back on the order list (baselinker_url)
+        
+        The tab is only navigated while it still shows the finished order, so
+        an order the operator has already opened is left alone.
+        
+        Args:
+            order_id: BaseLinker order id that was just completed (optional)
+            timeout: Maximum wait for the list page to load
+            
+        Returns:
+            bool: True if the tab is on the order list or already on another order
+        """
+        list_url = self.config.get('baselinker_url', '')
+        
+        try:
+            if not list_url or not self.find_baselinker_tab():
+                return False
+            
+            current_url = self.driver.current_url
+            if current_url == list_url:
+                return True
+            
+            current_order = self.extract_order_id()
+            if current_order is not None and current_order != str(order_id):
+                logger.info(f"BaseLinker tab already on order {current_order}, not resetting")
+                return True
+            
+            logger.info(f"Returning BaseLinker tab to order list: {list_url}")
+            self._load(list_url, 'BaseLinker order list')
+            
+            WebDriverWait(self.driver, self.deadline.clamp(timeout or self.default_timeout, 'order list load')).until(
+                lambda driver: driver.execute_script('return document.readyState') == 'complete'
+            )
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to return BaseLinker tab to order list: {e}")
+            return False
     
     def extract_product_data(self):
         """
@@ -35,7 +231,7 @@ class BaseLinkerExtractor(BaseExtractor):
         products = []
         try:
             container_id = self.selectors.get('products_container', 'sale_items_container')
-            container = self.driver.find_element(By.ID, container_id)
+            container = self.find_element(By.ID, container_id)
             rows = container.find_elements(By.TAG_NAME, 'tr')
             
             sku_pattern = self.patterns.get('sku', r'SKU\s*([A-Za-z0-9\-\.]+)')
@@ -49,18 +245,14 @@ class BaseLinkerExtractor(BaseExtractor):
                 sku_match = re.search(sku_pattern, text)
                 
                 if sku_match:
-                    sku = sku_match.group(1).strip()
-                    
-                    # Remove prefix if configured and present
-                    if remove_prefix and sku.startswith(remove_prefix):
-                        sku = sku[len(remove_prefix):]
+                    sku = normalize_sku(sku_match.group(1), remove_prefix)
                     
                     # Extract quantity
                     quantity_match = re.search(quantity_pattern, text)
                     
                     if quantity_match:
                         quantity = quantity_match.group(1)
-                        logger.info(f"Found product: SKU={sku}, Quantity={quantity}")
+                        detail_logger.info("Found product: SKU=%s, Quantity=%s", sku, quantity)
                         products.append({"sku": sku, "quantity": quantity})
             
             logger.info(f"Extracted {len(products)} products from BaseLinker")
@@ -70,6 +262,62 @@ class BaseLinkerExtractor(BaseExtractor):
             logger.error(f"Failed to extract product data: {e}")
             return []
     
+    def iter_product_batches(self, batch_size=50):
+        """
+        Stream product data from BaseLinker in batches (large-order mode)
+        
+        Reads the text of `batch_size` rows per browser call instead of one
+        call per row, so large orders cost a handful of round trips.
+        
+        Args:
+            batch_size: Number of table rows read per call
+            
+        Yields:
+            list: Products (dicts with 'sku' and 'quantity') from each batch
+        """
+        container_id = self.selectors.get('products_container', 'sale_items_container')
+        sku_pattern = re.compile(self.patterns.get('sku', r'SKU\s*([A-Za-z0-9\-\.]+)'))
+        quantity_pattern = re.compile(self.patterns.get('quantity', r'(\d+)\s+\d+\.\d+ PLN'))
+        remove_prefix = self.data_processing.get('remove_sku_prefix', 'H-')
+        
+        container = self.find_first(By.ID, container_id)
+        if container is None:
+            logger.error(f"Products container '{container_id}' not found")
+            return
+        
+        start = 1  # Skip header row
+        total = 0
+        
+        while True:
+            result = self.driver.execute_script("""
+                const [container, start, count] = arguments;
+                const rows = container.getElementsByTagName('tr');
+                const texts = [];
+                for (let i = start; i < Math.min(rows.length, start + count); i++) {
+                    texts.push(rows[i].innerText);
+                }
+                return {total: rows.length, texts: texts};
+            """, container, start, batch_size)
+            
+            batch = []
+            for text in result['texts']:
+                sku_match = sku_pattern.search(text)
+                quantity_match = quantity_pattern.search(text) if sku_match else None
+                
+                if quantity_match:
+                    sku = normalize_sku(sku_match.group(1), remove_prefix)
+                    batch.append({"sku": sku, "quantity": quantity_match.group(1)})
+            
+            total += len(batch)
+            if batch:
+                yield batch
+            
+            start += batch_size
+            if start >= result['total']:
+                break
+        
+        logger.info(f"Streamed {total} products from BaseLinker")
+    
     def extract_payment_amount(self):
         """
         Extract payment amount from BaseLinker.
@@ -85,7 +333,7 @@ class BaseLinkerExtractor(BaseExtractor):
             
             # Get already paid amount
             try:
-                paid_element = self.driver.find_element(By.CSS_SELECTOR, paid_selector)
+                paid_element = self.find_element(By.CSS_SELECTOR, paid_selector)
                 paid_text = paid_element.text
                 paid_match = re.search(price_pattern, paid_text)
                 paid_amount = float(paid_match.group(1).replace(',', '.')) if paid_match else 0.0
@@ -96,7 +344,7 @@ class BaseLinkerExtractor(BaseExtractor):
             
             # Get total order amount
             total_price_id = self.selectors.get('total_price', 'sale_total_price')
-            price_element = self.driver.find_element(By.ID, total_price_id)
+            price_element = self.find_element(By.ID, total_price_id)
             price_text = price_element.text
             
             # Extract number from "2081.94 PLN"
@@ -131,7 +379,7 @@ class BaseLinkerExtractor(BaseExtractor):
             phone_id = self.selectors.get('phone', 'oms_info_phone')
             remove_prefix = self.data_processing.get('remove_phone_prefix', '+48')
             
-            phone_data = self.driver.find_element(By.ID, phone_id)
+            phone_data = self.find_element(By.ID, phone_id)
             phone_number = phone_data.text.replace(' ', '')
             
             # Remove prefix if configured and present
@@ -154,7 +402,7 @@ class BaseLinkerExtractor(BaseExtractor):
         """
         try:
             email_id = self.selectors.get('email', 'oms_info_email')
-            email_data = self.driver.find_element(By.ID, email_id)
+            email_data = self.find_element(By.ID, email_id)
             email = email_data.text
             logger.info(f"Email: {email}")
             return email
@@ -174,11 +422,11 @@ class BaseLinkerExtractor(BaseExtractor):
         try:
             address_selectors = self.selectors.get('address', {})
             
-            name = self.driver.find_element(By.ID, address_selectors.get('fullname', 'oms_delivery_delivery_fullname')).text
-            company = self.driver.find_element(By.ID, address_selectors.get('company', 'oms_delivery_delivery_company')).text
-            address = self.driver.find_element(By.ID, address_selectors.get('street', 'oms_delivery_delivery_address')).text
-            city = self.driver.find_element(By.ID, address_selectors.get('city', 'oms_delivery_delivery_city')).text
-            postal_code = self.driver.find_element(By.ID, address_selectors.get('postcode', 'oms_delivery_delivery_postcode')).text
+            name = self.find_element(By.ID, address_selectors.get('fullname', 'oms_delivery_delivery_fullname')).text
+            company = self.find_element(By.ID, address_selectors.get('company', 'oms_delivery_delivery_company')).text
+            address = self.find_element(By.ID, address_selectors.get('street', 'oms_delivery_delivery_address')).text
+            city = self.find_element(By.ID, address_selectors.get('city', 'oms_delivery_delivery_city')).text
+            postal_code = self.find_element(By.ID, address_selectors.get('postcode', 'oms_delivery_delivery_postcode')).text
             
             address_data = {
                 "name": name,
@@ -206,7 +454,7 @@ class BaseLinkerExtractor(BaseExtractor):
             b2b_field_id = self.selectors.get('b2b_number_field', 'oms_info_extra_field_1')
             skip_values = self.data_processing.get('skip_b2b_number_values', ['...', ''])
             
-            b2b_element = self.driver.find_element(By.ID, b2b_field_id)
+            b2b_element = self.find_element(By.ID, b2b_field_id)
             b2b_number = b2b_element.text.strip()
             
             # Skip if in skip list
@@ -221,21 +469,125 @@ class BaseLinkerExtractor(BaseExtractor):
             logger.error(f"Failed to extract B2B number from BaseLinker: {e}")
             return None
     
-    def extract_all_data(self):
+    def extract_order_id(self):
         """
-        Extract all available data from BaseLinker tab
+        Extract BaseLinker order id from the current tab URL
         
         Returns:
-            dict: All extracted data
+            str: Order id or None if the tab is not on a single order
         """
-        if not self.find_baselinker_tab():
-            logger.error("BaseLinker tab not found")
+        try:
+            pattern = self.patterns.get('order_id', r'order[:=](\d+)')
+            match = re.search(pattern, self.driver.current_url)
+            
+            if match:
+                order_id = match.group(1)
+                logger.info(f"BaseLinker order id: {order_id}")
+                return order_id
+            
+            logger.warning("BaseLinker order id not found in URL")
+            return None
+            
+        except Exception as e:
+            logger.error(f"Failed to extract BaseLinker order id: {e}")
             return None
+    
+    def snapshot_current_order(self):
+        """
+        Read all order fields from the current tab
+        
+        Returns:
+            dict: All extracted data
+        """
+        order_id = self.extract_order_id()
+        if self.network_settings.get('enabled', False) and order_id is not None:
+            data = self.read_network_order(order_id)
+            if data is not None:
+                return data
         
         return {
+            "order_id": order_id,
+            "b2b_number": self.extract_b2b_number(),
             "products": self.extract_product_data(),
             "payment_amount": self.extract_payment_amount(),
             "phone": self.extract_phone_number(),
             "email": self.extract_email(),
             "address": self.extract_address()
-        }
\ No newline at end of file
+        }
+    
+    def extract_all_data(self):
+        """
+        Extract all available data from BaseLinker tab
+        
+        Returns:
+            dict: All extracted data
+        """
+        if not self.find_baselinker_tab():
+            logger.error("BaseLinker tab not found")
+            return None
+        
+        return self.snapshot_current_order()
+    
+    def extract_orders_in_tabs(self, order_ids, max_tabs=4, page_timeout=None):
+        """
+        Extract several orders by loading them in parallel tabs of the same Chrome
+        
+        Opens up to `max_tabs` order pages at once without waiting for each
+        load, so their network waits overlap. Each tab is then snapshotted
+        with the usual selectors and closed.
+        
+        Args:
+            order_ids: BaseLinker order ids
+            max_tabs: Maximum number of order tabs open at once
+            page_timeout: Maximum wait for an order page to load
+            
+        Yields:
+            dict: Extracted data per order with 'success' (and 'error' on failure)
+        """
+        url_template = self.config.get('baselinker_order_url', 'https://panel-g.baselinker.com/orders.php#order:{order_id}')
+        container_id = self.selectors.get('products_container', 'sale_items_container')
+        page_timeout = page_timeout or self.default_timeout
+        max_tabs = max(1, int(max_tabs))
+        order_ids = [str(order_id) for order_id in order_ids]
+        
+        original_handle = self.driver.current_window_handle
+        open_tabs = set()
+        
+        try:
+            for start in range(0, len(order_ids), max_tabs):
+                group = order_ids[start:start + max_tabs]
+                
+                # Start all loads first; location assignment returns without waiting for the page
+                tabs = []
+                for order_id in group:
+                    self.driver.switch_to.new_window('tab')
+                    if self.network_settings.get('enabled', False):
+                        self.install_network_capture()
+                    self.driver.execute_script('window.location.href = arguments[0];',
+                                               url_template.format(order_id=order_id))
+                    tabs.append((order_id, self.driver.current_window_handle))
+                    open_tabs.add(self.driver.current_window_handle)
+                
+                for order_id, handle in tabs:
+                    self.driver.switch_to.window(handle)
+                    
+                    if self.wait_for_element(By.ID, container_id, timeout=page_timeout) is None:
+                        result = {"order_id": order_id, "success": False, "error": "Order page did not load"}
+                    else:
+                        result = {**self.snapshot_current_order(), "order_id": order_id, "success": True}
+                    
+                    self.driver.close()
+                    open_tabs.discard(handle)
+                    BaseLinkerExtractor._capture_registrations.pop((self.driver.session_id, handle), None)
+                    logger.info(f"Extracted order {order_id} from tab (success={result['success']})")
+                    yield result
+        finally:
+            # Close tabs left open by an error and go back to the operator's tab
+            for handle in open_tabs:
+                BaseLinkerExtractor._capture_registrations.pop((self.driver.session_id, handle), None)
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception:
+                    pass
+            self.driver.switch_to.window(original_handle)
@@ -0,0 +1,107 @@
+"""
+Cart Diff
+Compares the B2B Hendi cart with the products of an order so a retry only
+imports or adjusts what is missing
+"""
+import re
+
+
+def parse_quantity(value):
+    """First whole number in a quantity as read from a page or order (e.g. '3 szt.' -> 3), 0 if none"""
+    match = re.search(r'\d+', str(value))
+    return int(match.group(0)) if match else 0
+
+
+def cart_key(sku):
+    """Key SKUs are compared by"""
+    return str(sku).strip().upper()
+
+
+def diff_cart(products, cart_lines, remove_extra=False):
+    """
+    Work out the delta between the cart and the wanted products
+
+    Importing a SKU that is already in the cart adds to its quantity, so
+    missing quantities are imported and only lines above target are adjusted.
+
+    Args:
+        products: Target list of dicts with 'sku' and 'quantity' keys
+        cart_lines: Cart lines as read from the page, dicts with 'sku' and 'quantity'
+        remove_extra: Also remove cart lines the order does not contain
+
+    Returns:
+        dict: 'add' (products to import, with the missing quantity), 'adjust'
+              (cart lines to set to 'quantity', 0 removes them), 'extra' (lines
+              not in the order), 'unchanged' count and 'cart_lines' count
+    """
+    wanted = {}
+    skus = {}
+    for product in products:
+        key = cart_key(product['sku'])
+        wanted[key] = wanted.get(key, 0) + parse_quantity(product['quantity'])
+        skus.setdefault(key, product['sku'])
+
+    in_cart = {}
+    cart_skus = {}
+    for line in cart_lines:
+        key = cart_key(line['sku'])
+        in_cart[key] = in_cart.get(key, 0) + parse_quantity(line['quantity'])
+        cart_skus.setdefault(key, line['sku'])
+
+    add, adjust, extra = [], [], []
+    unchanged = 0
+
+    for key, quantity in wanted.items():
+        have = in_cart.get(key, 0)
+        if have < quantity:
+            add.append({'sku': skus[key], 'quantity': quantity - have})
+        elif have > quantity:
+            adjust.append({'sku': cart_skus[key], 'quantity': quantity, 'cart_quantity': have})
+        else:
+            unchanged += 1
+
+    for key, have in in_cart.items():
+        if key in wanted:
+            continue
+        extra.append({'sku': cart_skus[key], 'cart_quantity': have})
+        if remove_extra:
+            adjust.append({'sku': cart_skus[key], 'quantity': 0, 'cart_quantity': have})
+
+    return {
+        'add': add,
+        'adjust': adjust,
+        'extra': extra,
+        'unchanged': unchanged,
+        'cart_lines': len(in_cart)
+    }
+
+
+def cart_quantities(lines):
+    """Total quantity per SKU key of products or cart lines"""
+    quantities = {}
+    for line in lines:
+        key = cart_key(line['sku'])
+        quantities[key] = quantities.get(key, 0) + parse_quantity(line['quantity'])
+    return quantities
+
+
+def missing_from_cart(products, before, after):
+    """
+    Check an add-to-cart against the cart read before and after it
+
+    Args:
+        products: Products that were added, dicts with 'sku' and 'quantity'
+        before: Cart lines before adding
+        after: Cart lines after adding
+
+    Returns:
+        list: Products whose quantity did not (fully) arrive, with the missing quantity
+    """
+    had = cart_quantities(before)
+    has = cart_quantities(after)
+    missing = []
+    for key, quantity in cart_quantities(products).items():
+        arrived = has.get(key, 0) - had.get(key, 0)
+        if arrived < quantity:
+            missing.append({'sku': key, 'quantity': quantity - arrived})
+    return missing
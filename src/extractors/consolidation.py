@@ -0,0 +1,80 @@
+"""
+Consolidation
+Merges the products of several BaseLinker orders into one B2B import and
+keeps track of which order each quantity belongs to
+"""
+from .cart_diff import parse_quantity
+from .sku_catalog import normalize_sku
+
+
+def consolidate_orders(orders, remove_prefix='H-'):
+    """
+    Sum quantities per normalised SKU across orders
+
+    Args:
+        orders: List of dicts with 'order_id' and 'products' (dicts with 'sku' and 'quantity')
+        remove_prefix: SKU prefix stripped before merging (data_processing.remove_sku_prefix)
+
+    Returns:
+        dict: 'products' for one import (first-seen SKU order) and 'allocation',
+              one row per SKU with the quantity each order contributed
+    """
+    lines = {}
+
+    for order in orders:
+        order_id = str(order.get('order_id'))
+        for product in order.get('products') or []:
+            sku = normalize_sku(product['sku'], remove_prefix)
+            quantity = parse_quantity(product['quantity'])
+            if not sku or quantity <= 0:
+                continue
+
+            line = lines.setdefault(sku.upper(), {'sku': sku, 'quantity': 0, 'orders': {}})
+            line['quantity'] += quantity
+            line['orders'][order_id] = line['orders'].get(order_id, 0) + quantity
+
+    return {
+        'products': [{'sku': line['sku'], 'quantity': line['quantity']} for line in lines.values()],
+        'allocation': [
+            {
+                'sku': line['sku'],
+                'quantity': line['quantity'],
+                'orders': [{'order_id': order_id, 'quantity': quantity}
+                           for order_id, quantity in line['orders'].items()]
+            }
+            for line in lines.values()
+        ]
+    }
+
+
+def allocation_report(allocation, import_report=None):
+    """
+    Per-order view of a consolidated import
+
+    Args:
+        allocation: 'allocation' from consolidate_orders
+        import_report: B2B import preview report (optional), used to flag
+                       lines that were not imported as requested
+
+    Returns:
+        list: One dict per order with its lines and the import status of each
+    """
+    statuses = {}
+    if import_report:
+        statuses = {str(row['sku']).strip().upper(): row['status'] for row in import_report['rows']}
+
+    orders = {}
+    for line in allocation:
+        status = statuses.get(line['sku'].upper(), 'matched' if import_report else None)
+        for share in line['orders']:
+            order = orders.setdefault(share['order_id'], {'order_id': share['order_id'], 'lines': [], 'issues': 0})
+            order['lines'].append({
+                'sku': line['sku'],
+                'quantity': share['quantity'],
+                'consolidated_quantity': line['quantity'],
+                'status': status
+            })
+            if status not in (None, 'matched'):
+                order['issues'] += 1
+
+    return list(orders.values())
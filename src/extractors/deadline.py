@@ -0,0 +1,86 @@
+"""
+Deadline
+Time budget for one API call, shared by the coordinator and every extractor wait
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised at a step boundary when the call's time budget is used up"""
+
+    def __init__(self, step, budget):
+        self.step = step
+        self.budget = budget
+        super().__init__(f"Time budget of {budget}s ran out during '{step}'")
+
+
+class Deadline:
+    """Absolute deadline; waits and sleeps are clamped to the time that is left"""
+
+    def __init__(self, budget=None):
+        """
+        Args:
+            budget: Seconds available, or None/0 for no deadline
+        """
+        self.budget = budget or None
+        self.started = time.monotonic()
+        self._expires_at = self.started + self.budget if self.budget else None
+        self.last_wait = None
+
+    def remaining(self):
+        """Seconds left, or None without a deadline"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def clamp(self, seconds, what):
+        """
+        Limit a wait to the remaining budget
+
+        Args:
+            seconds: Wanted wait
+            what: Description of the wait, kept for the overrun report
+
+        Returns:
+            float: Wait to use (0 once the budget is spent)
+        """
+        remaining = self.remaining()
+        if remaining is None or seconds is None or seconds <= remaining:
+            return seconds
+        self.last_wait = what
+        return remaining
+
+    def sleep(self, seconds, what='sleep'):
+        """time.sleep clamped to the remaining budget"""
+        seconds = self.clamp(seconds, what)
+        if seconds:
+            time.sleep(seconds)
+
+    def check(self, step):
+        """
+        Raise if the budget is already spent, so the next step is not started
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self.expired:
+            raise DeadlineExceeded(step, self.budget)
+
+    def report(self, step):
+        """Describe an overrun for API responses"""
+        return {
+            "step": step,
+            "budget": self.budget,
+            "elapsed": round(self.elapsed(), 2),
+            "waiting_for": self.last_wait
+        }
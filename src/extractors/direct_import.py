@@ -0,0 +1,274 @@
+"""
+Direct Import
+Submits the B2B Hendi product import over HTTP with the browser's session
+cookies instead of clicking through the import modal
+"""
+import json
+import logging
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class DirectImportError(Exception):
+    """Response the direct import does not recognise; the UI path takes over"""
+
+
+class DirectImportUncertain(DirectImportError):
+    """The add-to-cart request was sent but its outcome is unknown; the cart must be checked"""
+
+
+class DirectImportRejected(DirectImportError):
+    """The import preview was rejected (e.g. no SKU matched); the import modal would get the same answer"""
+
+
+class FormParser(HTMLParser):
+    """Collects the forms of a page: action, method, submitted fields and submit button classes"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = {}
+        self._form = None
+        self._select = None
+        self._textarea = None
+
+    def _owner(self, attrs):
+        """Form a control belongs to (its form attribute or the enclosing form)"""
+        form_id = attrs.get('form')
+        if form_id:
+            return self.forms.setdefault(form_id, {'action': '', 'method': 'post', 'fields': [], 'buttons': []})
+        return self._form
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or '' for name, value in attrs}
+
+        if tag == 'form':
+            form_id = attrs.get('id') or f"form-{len(self.forms)}"
+            self._form = self.forms.setdefault(form_id, {'action': '', 'method': 'post', 'fields': [], 'buttons': []})
+            self._form['action'] = attrs.get('action', '')
+            self._form['method'] = (attrs.get('method') or 'get').lower()
+            return
+
+        form = self._owner(attrs)
+        if form is None:
+            return
+
+        if tag == 'button' or (tag == 'input' and attrs.get('type', '').lower() == 'submit'):
+            form['buttons'].append(attrs.get('class', ''))
+            return
+
+        name = attrs.get('name')
+        if tag == 'input' and name:
+            kind = attrs.get('type', 'text').lower()
+            if kind in ('checkbox', 'radio') and 'checked' not in attrs:
+                return
+            if kind in ('file', 'image', 'reset', 'button'):
+                return
+            form['fields'].append((name, attrs.get('value', 'on' if kind in ('checkbox', 'radio') else '')))
+        elif tag == 'select' and name:
+            self._select = {'form': form, 'name': name, 'first': None, 'selected': None}
+        elif tag == 'option' and self._select is not None:
+            value = attrs.get('value', '')
+            if self._select['first'] is None:
+                self._select['first'] = value
+            if 'selected' in attrs:
+                self._select['selected'] = value
+        elif tag == 'textarea' and name:
+            self._textarea = {'form': form, 'name': name, 'text': ''}
+
+    def handle_data(self, data):
+        if self._textarea is not None:
+            self._textarea['text'] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        elif tag == 'select' and self._select is not None:
+            value = self._select['selected'] if self._select['selected'] is not None else self._select['first']
+            if value is not None:
+                self._select['form']['fields'].append((self._select['name'], value))
+            self._select = None
+        elif tag == 'textarea' and self._textarea is not None:
+            self._textarea['form']['fields'].append((self._textarea['name'], self._textarea['text']))
+            self._textarea = None
+
+
+class TableParser(HTMLParser):
+    """Collects table body rows: cell texts and the classes used on the row and inside it"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'tr':
+            self._row = {'cells': [], 'classes': set()}
+        if self._row is None:
+            return
+        self._row['classes'].update((attrs.get('class') or '').split())
+        if tag == 'td':
+            self._cell = []
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'td' and self._cell is not None:
+            self._row['cells'].append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            if self._row['cells']:
+                self.rows.append(self._row)
+            self._row = None
+
+
+def _response_html(text):
+    """HTML of a response, which may be JSON carrying it under 'html' or 'content'"""
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data.get('html') or data.get('content') or ''
+    except ValueError:
+        pass
+    return text
+
+
+def parse_table_rows(html):
+    """
+    Table rows with cells of an HTML page (or of a JSON response carrying HTML)
+
+    Returns:
+        list: Dicts with 'cells' (cell texts) and 'classes' (set of class names on the row and its descendants)
+    """
+    parser = TableParser()
+    parser.feed(_response_html(html))
+    parser.close()
+    return parser.rows
+
+
+def parse_forms(html):
+    """
+    Forms of an HTML page (or of a JSON response carrying HTML under 'html')
+
+    Returns:
+        dict: Form id -> {'action', 'method', 'fields' [(name, value)], 'buttons' [class strings]}
+    """
+    html = _response_html(html)
+
+    parser = FormParser()
+    parser.feed(html)
+    parser.close()
+    return parser.forms
+
+
+class DirectImport:
+    """HTTP replay of the import modal: upload, confirmations and add to cart"""
+
+    _session = None
+    _session_lock = threading.Lock()
+    _lock = threading.Lock()
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.timeout = settings.get('timeout', 15)
+
+    @classmethod
+    def session(cls):
+        """Connection-pooled HTTP session shared by all direct imports"""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4))
+                session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=4))
+                cls._session = session
+            return cls._session
+
+    def _submit(self, form, base_url, headers, files=None):
+        url = urljoin(base_url, form['action'] or base_url)
+        session = self.session()
+        if form['method'] == 'get' and files is None:
+            response = session.get(url, params=form['fields'], headers=headers, timeout=self.timeout)
+        else:
+            response = session.post(url, data=form['fields'], files=files, headers=headers, timeout=self.timeout)
+
+        logger.info(f"Direct import: {form['method'].upper()} {url} -> {response.status_code}")
+        if response.status_code != 200:
+            raise DirectImportError(f"HTTP {response.status_code} from {url}")
+        login_marker = self.settings.get('login_url_marker', 'login')
+        if login_marker and login_marker in response.url:
+            raise DirectImportError(f"Session not accepted, redirected to {response.url}")
+        return response
+
+    def _add_to_cart_form(self, forms):
+        button_class = self.settings.get('add_to_cart_button_class', 'jsManyProductsToCart')
+        for form in forms.values():
+            if any(button_class in classes.split() for classes in form['buttons']):
+                return form
+        return None
+
+    def run(self, page, cookies, csv_bytes, csv_name='products.csv', check_preview=None):
+        """
+        Submit the import form with the CSV and confirm it up to 'add to cart'
+
+        Args:
+            page: Import form as read from the B2B tab ('url', 'user_agent',
+                  'form' with action/method/fields and 'file_field')
+            cookies: Browser cookies (dicts with name, value, domain, path)
+            csv_bytes: CSV file content
+            csv_name: File name sent with the upload
+            check_preview: Callable(html) given the upload response, which holds
+                           the import preview; returning False stops the import
+
+        Returns:
+            bool: True once the add-to-cart request was answered; the caller
+                  checks the cart to see what was added
+
+        Raises:
+            DirectImportError: Transport, session or unexpected response before
+                               the add-to-cart step (nothing was added, the UI path can run)
+            DirectImportRejected: check_preview rejected the preview (nothing was added)
+            DirectImportUncertain: Unexpected response to the add-to-cart step
+        """
+        form_id = self.settings.get('form_id', 'import-form')
+        headers = {'User-Agent': page.get('user_agent', ''), 'Referer': page['url']}
+
+        with self._lock:
+            session = self.session()
+            session.cookies.clear()
+            for cookie in cookies:
+                session.cookies.set(cookie['name'], cookie['value'],
+                                    domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+            try:
+                response = self._submit(page['form'], page['url'], headers,
+                                        files={page['file_field']: (csv_name, csv_bytes, 'text/csv')})
+                if check_preview is not None and check_preview(response.text) is False:
+                    raise DirectImportRejected("Import preview rejected")
+
+                # Each confirmation returns the import form again until the add-to-cart form shows up
+                for step in range(int(self.settings.get('max_confirm_steps', 3)) + 1):
+                    forms = parse_forms(response.text)
+                    add_to_cart = self._add_to_cart_form(forms)
+                    if add_to_cart is not None:
+                        break
+                    if form_id not in forms or step == int(self.settings.get('max_confirm_steps', 3)):
+                        raise DirectImportError(f"Neither '{form_id}' nor the add-to-cart form in response")
+                    response = self._submit(forms[form_id], response.url, headers)
+
+                try:
+                    self._submit(add_to_cart, response.url, headers)
+                except (DirectImportError, requests.RequestException) as e:
+                    raise DirectImportUncertain(str(e)) from e
+                return True
+            except requests.RequestException as e:
+                raise DirectImportError(str(e)) from e
+            finally:
+                session.cookies.clear()
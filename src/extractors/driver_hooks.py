@@ -0,0 +1,39 @@
+"""
+Driver Hooks
+Wraps a WebDriver's execute() for per-job observers (flight recorder, timeline)
+and undoes the wrap when the job lets go of the driver
+"""
+
+
+def wrap_execute(driver, make_wrapper):
+    """
+    Install make_wrapper(original_execute) as the driver's execute
+
+    Returns:
+        tuple: Handle for restore_execute
+    """
+    original = driver.execute
+    wrapper = make_wrapper(original)
+    handle = (driver, original, wrapper, 'execute' in driver.__dict__)
+    driver.execute = wrapper
+    return handle
+
+
+def restore_execute(handle):
+    """
+    Undo wrap_execute
+
+    Wrappers stack, so observers detach in the reverse order they attached;
+    a wrapper with another one installed on top of it is left in place.
+
+    Returns:
+        bool: Whether the driver was restored
+    """
+    driver, original, wrapper, had_own = handle
+    if driver.__dict__.get('execute') is not wrapper:
+        return False
+    if had_own:
+        driver.execute = original
+    else:
+        del driver.execute
+    return True
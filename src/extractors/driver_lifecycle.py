@@ -0,0 +1,420 @@
+"""
+Driver Lifecycle
+Tracks every chromedriver process this app starts, reuses idle sessions, stops
+them after an idle timeout or when over the process/memory caps, and reaps
+chromedriver processes left behind by earlier runs
+
+Each process records the chromedriver pids it started in its own file under
+data/chromedriver_pids, so reaping only ever touches chromedrivers this app
+started, never ones belonging to other applications.
+
+Only chromedriver is ever stopped: the process is terminated directly instead
+of quitting the session, so the user's Chrome (attached via debuggerAddress)
+stays open.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # RSS falls back to /proc on Linux; orphan reaping needs psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data',
+    'chromedriver_pids'
+)
+
+
+def process_rss(pid):
+    """Resident memory of a process in bytes, or None if unknown"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def process_started(pid):
+    """Start time of a process (to tell a recorded pid from a reused one), or None if unknown"""
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+def stop_process(process, timeout=5):
+    """Terminate a chromedriver Popen, killing it if it does not exit"""
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except Exception:
+        process.kill()
+
+
+class DriverLifecycle:
+    """Process-wide registry of chromedriver services started by the extractors"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, settings=None):
+        self._entries = {}  # id(driver) -> entry
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stop = threading.Event()
+        self._starting = 0
+        self.started_total = 0
+        self.stopped_total = 0
+        self.reused_total = 0
+        self.orphans_reaped = 0
+        self.apply_settings(settings or {})
+        # pid -> start time of every chromedriver this process started and has not stopped
+        self._recorded = {}
+        self._pid_file = os.path.join(self.pids_path, f"{os.getpid()}.json")
+
+    def apply_settings(self, settings):
+        self.max_processes = settings.get('max_processes', 4)
+        self.max_rss_bytes = int(settings.get('max_rss_mb', 600) * 1024 * 1024)
+        self.idle_timeout = settings.get('idle_timeout', 120)
+        self.reap_interval = settings.get('reap_interval', 30)
+        self.reap_orphans_enabled = settings.get('reap_orphans', True)
+        self.pids_path = settings.get('pids_path') or DEFAULT_PIDS_PATH
+
+    @classmethod
+    def for_config(cls, config):
+        """
+        Get the shared lifecycle manager, reaping orphans and starting the timer on first use
+
+        Args:
+            config: Full application config
+
+        Returns:
+            DriverLifecycle: Shared instance
+        """
+        settings = (config or {}).get('driver_lifecycle', {})
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(settings)
+                if cls._instance.reap_orphans_enabled:
+                    cls._instance.reap_orphans()
+                cls._instance.start_reaper()
+            else:
+                cls._instance.apply_settings(settings)
+            return cls._instance
+
+    def _entry_pid(self, entry):
+        process = getattr(entry['service'], 'process', None)
+        return process.pid if process is not None else None
+
+    def _alive(self, entry):
+        # Without a process handle (e.g. a remote driver) it is assumed alive
+        process = getattr(entry['service'], 'process', None)
+        return process is None or process.poll() is None
+
+    def acquire(self, extractor):
+        """
+        Get a driver attached to the extractor's Chrome, reusing an idle session when possible
+
+        Args:
+            extractor: BaseExtractor whose create_driver() starts a new session
+
+        Returns:
+            WebDriver
+        """
+        address = (extractor._chrome_host, extractor.chrome_debug_port)
+
+        with self._lock:
+            for entry in self._entries.values():
+                if entry['in_use'] or entry['address'] != address or not self._alive(entry):
+                    continue
+                entry['in_use'] = True
+                driver = entry['driver']
+                break
+            else:
+                driver = None
+
+        if driver is not None:
+            try:
+                driver.window_handles
+                # The previous job's flight recorder/timeline stop observing this driver
+                for observer in entry['observers']:
+                    observer.detach(driver)
+                entry['observers'] = []
+                self.reused_total += 1
+                return driver
+            except Exception as e:
+                logger.info(f"Idle chromedriver session no longer answers, replacing it: {e}")
+                self._stop_entry(id(driver))
+
+        self.enforce_caps(reserve=1)
+
+        with self._lock:
+            self._starting += 1
+        try:
+            driver = extractor.create_driver()
+        finally:
+            with self._lock:
+                self._starting -= 1
+
+        with self._lock:
+            entry = {
+                'driver': driver,
+                'service': getattr(driver, 'service', None),
+                'address': address,
+                'started': time.time(),
+                'last_used': time.time(),
+                'in_use': True,
+                'observers': []
+            }
+            self._entries[id(driver)] = entry
+            pid = self._entry_pid(entry)
+            if pid is not None:
+                self._recorded[pid] = process_started(pid)
+                self._save_pids()
+            self.started_total += 1
+        return driver
+
+    def release(self, driver, observers=()):
+        """
+        Mark a driver idle; it is reused or stopped later
+
+        Args:
+            driver: Driver from acquire()
+            observers: Objects with detach(driver) (the job's timeline and flight
+                       recorder, innermost last) that still wrap the driver; they
+                       are detached when the driver is handed to the next job
+        """
+        with self._lock:
+            entry = self._entries.get(id(driver))
+            if entry is not None:
+                entry['in_use'] = False
+                entry['last_used'] = time.time()
+                entry['observers'] = [observer for observer in observers if observer is not None]
+
+    def _save_pids(self):
+        """Write this process's recorded pids (called with the lock held)"""
+        try:
+            if not self._recorded:
+                if os.path.exists(self._pid_file):
+                    os.remove(self._pid_file)
+                return
+            os.makedirs(self.pids_path, exist_ok=True)
+            tmp_path = f"{self._pid_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'owner': os.getpid(),
+                    'owner_started': process_started(os.getpid()),
+                    'drivers': {str(pid): started for pid, started in self._recorded.items()}
+                }, f)
+            os.replace(tmp_path, self._pid_file)
+        except OSError as e:
+            logger.warning(f"Could not record chromedriver pids: {e}")
+
+    def _forget_pid(self, pid):
+        with self._lock:
+            if self._recorded.pop(pid, 'missing') != 'missing':
+                self._save_pids()
+
+    def _stop_entry(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        stop_process(getattr(entry['service'], 'process', None))
+        self._forget_pid(self._entry_pid(entry))
+        self.stopped_total += 1
+        logger.info(f"Stopped chromedriver (pid {self._entry_pid(entry)})")
+
+    def _idle_oldest_first(self):
+        with self._lock:
+            idle = [(entry['last_used'], key) for key, entry in self._entries.items() if not entry['in_use']]
+        return [key for _, key in sorted(idle)]
+
+    def total_rss(self):
+        with self._lock:
+            pids = [self._entry_pid(entry) for entry in self._entries.values()]
+        return sum(process_rss(pid) or 0 for pid in pids if pid is not None)
+
+    def enforce_caps(self, reserve=0):
+        """
+        Stop idle drivers, oldest first, until the process and RSS caps hold
+
+        Args:
+            reserve: Processes about to be started
+
+        Raises:
+            RuntimeError: If the caps cannot be met because every driver is in use
+        """
+        for key in self._idle_oldest_first():
+            if len(self._entries) + reserve <= self.max_processes and self.total_rss() <= self.max_rss_bytes:
+                return
+            self._stop_entry(key)
+
+        if len(self._entries) + reserve > self.max_processes:
+            raise RuntimeError(f"Chromedriver cap reached: {len(self._entries)} of {self.max_processes} in use")
+        if self.total_rss() > self.max_rss_bytes:
+            raise RuntimeError(f"Chromedriver memory cap of {self.max_rss_bytes // (1024 * 1024)} MB reached")
+
+    def reap(self):
+        """Drop exited drivers and stop the ones idle for longer than idle_timeout"""
+        now = time.time()
+        with self._lock:
+            dead = [key for key, entry in self._entries.items() if not self._alive(entry)]
+            expired = [key for key, entry in self._entries.items()
+                       if not entry['in_use'] and now - entry['last_used'] > self.idle_timeout]
+            dead_pids = [self._entry_pid(self._entries[key]) for key in dead]
+            for key in dead:
+                del self._entries[key]
+
+        for pid in dead_pids:
+            self._forget_pid(pid)
+
+        for key in expired:
+            if key not in dead:
+                self._stop_entry(key)
+
+        try:
+            self.enforce_caps()
+        except RuntimeError as e:
+            logger.warning(str(e))
+
+    def _stop_recorded(self, pid, started):
+        """Stop a recorded chromedriver if the pid still belongs to it"""
+        try:
+            proc = psutil.Process(pid)
+            if not proc.name().lower().startswith('chromedriver'):
+                return False
+            if started is not None and abs(proc.create_time() - started) > 1:
+                return False
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except psutil.TimeoutExpired:
+                proc.kill()
+            return True
+        except psutil.Error:
+            return False
+
+    def _earlier_runs(self):
+        """Pid files of processes that have exited: {path: {pid: start time}}"""
+        runs = {}
+        if not os.path.isdir(self.pids_path):
+            return runs
+        for entry in os.scandir(self.pids_path):
+            if not entry.name.endswith('.json') or entry.path == self._pid_file:
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                owner, owner_started = int(data['owner']), data.get('owner_started')
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            # Another instance of the app (web server, broker, worker) still owns these
+            alive_since = process_started(owner)
+            if alive_since is not None and (owner_started is None or abs(alive_since - owner_started) <= 1):
+                continue
+            runs[entry.path] = {int(pid): started for pid, started in data.get('drivers', {}).items()}
+        return runs
+
+    def reap_orphans(self):
+        """
+        Stop chromedriver processes this app started but no longer tracks: ones
+        recorded by this process that fell out of the registry, and ones recorded
+        by earlier runs that have exited
+
+        Returns:
+            int: Number of processes stopped
+        """
+        if psutil is None:
+            logger.info("psutil not installed, skipping chromedriver orphan reaping")
+            return 0
+
+        reaped = 0
+        with self._lock:
+            candidates = list(self._recorded.items())
+        for pid, started in candidates:
+            with self._lock:
+                tracked = {self._entry_pid(entry) for entry in self._entries.values()}
+                # A driver being registered right now is recorded but not tracked yet
+                if pid in tracked or self._starting or pid not in self._recorded:
+                    continue
+            if self._stop_recorded(pid, started):
+                reaped += 1
+            self._forget_pid(pid)
+
+        for path, drivers in self._earlier_runs().items():
+            for pid, started in drivers.items():
+                if self._stop_recorded(pid, started):
+                    reaped += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        if reaped:
+            logger.info(f"Reaped {reaped} orphaned chromedriver process(es)")
+        self.orphans_reaped += reaped
+        return reaped
+
+    def start_reaper(self):
+        """Reap on a timer in a daemon thread"""
+        if self._reaper is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.reap_interval):
+                try:
+                    self.reap()
+                    if self.reap_orphans_enabled:
+                        self.reap_orphans()
+                except Exception as e:
+                    logger.error(f"Chromedriver reaper failed: {e}", exc_info=True)
+
+        self._reaper = threading.Thread(target=run, name='chromedriver-reaper', daemon=True)
+        self._reaper.start()
+
+    def shutdown(self):
+        """Stop the timer and every tracked chromedriver (Chrome itself stays open)"""
+        self._stop.set()
+        for key in list(self._entries):
+            self._stop_entry(key)
+
+    def snapshot(self):
+        """Counts and limits for the API"""
+        with self._lock:
+            entries = list(self._entries.values())
+        in_use = sum(1 for entry in entries if entry['in_use'])
+        return {
+            'processes': len(entries),
+            'in_use': in_use,
+            'idle': len(entries) - in_use,
+            'rss_mb': round(self.total_rss() / (1024 * 1024), 1),
+            'max_processes': self.max_processes,
+            'max_rss_mb': self.max_rss_bytes // (1024 * 1024),
+            'started_total': self.started_total,
+            'stopped_total': self.stopped_total,
+            'reused_total': self.reused_total,
+            'orphans_reaped': self.orphans_reaped,
+            'orphan_reaping': psutil is not None and self.reap_orphans_enabled
+        }
@@ -0,0 +1,329 @@
+"""
+Flight Recorder
+Ring buffer of the last WebDriver commands of a job, dumped with a DOM snapshot
+and screenshot when the job fails
+
+Customer data is removed by deny-list, not allow-list (unlike the page corpus):
+typed text and script arguments, form values, the page title and the elements
+matched by the customer-data selectors (extractors/pii.py, extended through
+corpus.extra_pii_selectors) are masked, while the rest of the page text, such
+as error messages and product rows, is kept for diagnosing the failure. Text
+of the order page outside those selectors (e.g. notes or message history) is
+stored as shown, so records are as sensitive as the order pages themselves.
+"""
+from collections import deque
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+from .driver_hooks import restore_execute, wrap_execute
+from .pii import pii_selectors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data',
+    'flight_records'
+)
+
+# Command parameters kept in the buffer (scripts and arguments are shortened)
+RECORDED_PARAMS = ('using', 'value', 'url', 'name', 'handle', 'type')
+MAX_SCRIPT_CHARS = 80
+MAX_ARGS_CHARS = 300
+
+# Commands whose text parameters are what was typed into the page
+TYPING_COMMANDS = ('sendKeysToElement', 'sendKeysToActiveElement')
+# Failed result fields holding customer data
+REDACTED_RESULT_KEYS = ('phone', 'email', 'address', 'address_data')
+
+# Serialises the page with the title, form values and customer-data elements
+# masked (digits -> 0, letters -> x); arguments[0] are the customer-data selectors
+MASKED_SOURCE_SCRIPT = """
+const root = document.documentElement.cloneNode(true);
+const mask = text => text.replace(/[0-9]/g, '0').replace(/\\p{L}/gu, 'x');
+root.querySelectorAll('title').forEach(title => { title.textContent = mask(title.textContent); });
+root.querySelectorAll('input[value]').forEach(input => input.setAttribute('value', mask(input.getAttribute('value'))));
+root.querySelectorAll('textarea').forEach(textarea => { textarea.textContent = mask(textarea.textContent); });
+for (const selector of arguments[0]) {
+    try {
+        root.querySelectorAll(selector).forEach(element => {
+            const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT);
+            for (let node = walker.nextNode(); node; node = walker.nextNode()) node.nodeValue = mask(node.nodeValue);
+        });
+    } catch (e) {
+        // selector not valid as CSS
+    }
+}
+return '<!DOCTYPE html>\\n' + root.outerHTML;
+"""
+
+# Blurs form fields and customer-data elements for the screenshot; removed right after
+HIDE_STYLE_SCRIPT = """
+const style = document.createElement('style');
+style.id = 'flight-recorder-mask';
+style.textContent = ['input', 'textarea', 'select', ...arguments[0]].join(', ') + ' { filter: blur(8px) !important; }';
+document.head.appendChild(style);
+"""
+SHOW_STYLE_SCRIPT = "document.getElementById('flight-recorder-mask')?.remove();"
+
+
+def _short_json(value, limit):
+    """JSON-encode a value for the buffer, replacing elements and truncating"""
+    text = json.dumps(value, ensure_ascii=False, default=lambda obj: f"<{type(obj).__name__}>")
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _redact(value):
+    """Replace strings (e.g. address values passed to a script) with their length"""
+    if isinstance(value, str):
+        return f"<{len(value)} chars>"
+    if isinstance(value, (list, tuple)):
+        return [_redact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    return value
+
+
+def summarize_params(params, command=None):
+    """Keep the parts of a command's parameters that identify what it did, without typed text"""
+    if not params:
+        return None
+
+    summary = {key: params[key] for key in RECORDED_PARAMS if key in params}
+    if command in TYPING_COMMANDS:
+        text = params.get('text')
+        if text is None:
+            text = ''.join(params.get('value') or [])
+        summary.pop('value', None)
+        summary['text'] = _redact(text)
+    if 'script' in params:
+        summary['script'] = ' '.join(params['script'].split())[:MAX_SCRIPT_CHARS]
+        summary['args'] = _short_json(_redact(params.get('args', [])), MAX_ARGS_CHARS)
+    return summary or None
+
+
+def redact_result(result):
+    """Copy of a failed result without its customer data fields"""
+    if not isinstance(result, dict):
+        return result
+    return {key: ('<redacted>' if key in REDACTED_RESULT_KEYS and value else value) for key, value in result.items()}
+
+
+class FlightRecorder:
+    """Records the last N driver commands of one job"""
+
+    def __init__(self, settings=None, job=None, pii=None):
+        self.settings = settings or {}
+        self.job = job
+        self.pii = pii or []
+        self.started = time.time()
+        self._commands = deque(maxlen=self.settings.get('max_commands', 200))
+        self._marks = []
+        # Last attached driver, whose tab is snapshotted on failure
+        self._driver = None
+        self._attached = {}  # id(driver) -> wrap_execute handle
+
+    @classmethod
+    def from_config(cls, config, job=None):
+        """
+        Create a recorder for a job
+
+        Returns:
+            FlightRecorder: Recorder, or None if the flight recorder is disabled
+        """
+        settings = (config or {}).get('flight_recorder', {})
+        if not settings.get('enabled', True):
+            return None
+        return cls(settings, job, pii_selectors(config))
+
+    def attach(self, driver):
+        """Record every command sent through the driver from now on"""
+        if id(driver) in self._attached:
+            return
+
+        commands = self._commands
+
+        def make_wrapper(original):
+            def execute(driver_command, params=None):
+                start = time.monotonic()
+                error = None
+                try:
+                    return original(driver_command, params)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {str(e).strip().splitlines()[0] if str(e).strip() else ''}"
+                    raise
+                finally:
+                    commands.append({
+                        'at': round(time.time() - self.started, 3),
+                        'command': driver_command,
+                        'params': summarize_params(params, driver_command),
+                        'ms': round((time.monotonic() - start) * 1000, 1),
+                        'error': error
+                    })
+            return execute
+
+        self._attached[id(driver)] = wrap_execute(driver, make_wrapper)
+        self._driver = driver
+
+    def detach(self, driver=None):
+        """Stop recording on a driver (every attached driver by default) and restore it"""
+        for key in (list(self._attached) if driver is None else [id(driver)]):
+            handle = self._attached.pop(key, None)
+            if handle is not None:
+                restore_execute(handle)
+        if driver is None or driver is self._driver:
+            self._driver = None
+
+    def mark(self, step):
+        """Note the start of a coordinator step, to line commands up with steps"""
+        self._marks.append({'at': round(time.time() - self.started, 3), 'step': step})
+
+    def commands(self):
+        return list(self._commands)
+
+    def dump(self, reason, result=None):
+        """
+        Write the buffer, a gzipped DOM snapshot and a screenshot of the active tab
+
+        Args:
+            reason: Failure description
+            result: Failed result dict (optional, stored alongside)
+
+        Returns:
+            str: Name of the record, or None if nothing was written
+        """
+        store = FlightRecordStore.for_settings(self.settings)
+        driver = self._driver
+        self.detach()
+
+        record = {
+            'job': self.job,
+            'reason': reason,
+            'started': self.started,
+            'failed_at': time.time(),
+            'marks': self._marks,
+            'commands': self.commands(),
+            'result': redact_result(result)
+        }
+
+        page_source = None
+        screenshot = None
+        if driver is not None:
+            try:
+                # The title is left out: it can carry the customer's name
+                record['url'] = driver.current_url
+                page_source = driver.execute_script(MASKED_SOURCE_SCRIPT, self.pii)
+                if self.settings.get('screenshot', True):
+                    driver.execute_script(HIDE_STYLE_SCRIPT, self.pii)
+                    try:
+                        screenshot = driver.get_screenshot_as_png()
+                    finally:
+                        driver.execute_script(SHOW_STYLE_SCRIPT)
+            except Exception as e:
+                record['snapshot_error'] = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+
+        return store.save(self.job, record, page_source, screenshot)
+
+
+class FlightRecordStore:
+    """Directory of flight records, capped in total size with oldest-first eviction"""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path=DEFAULT_RECORDS_PATH, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, settings):
+        """Get the shared store for the configured path"""
+        path = settings.get('path') or DEFAULT_RECORDS_PATH
+        max_bytes = int(settings.get('max_total_mb', 200) * 1024 * 1024)
+
+        with cls._instances_lock:
+            store = cls._instances.get(path)
+            if store is None:
+                store = cls(path, max_bytes)
+                cls._instances[path] = store
+            else:
+                store.max_bytes = max_bytes
+        return store
+
+    def save(self, job, record, page_source=None, screenshot=None):
+        """Write one record and evict the oldest ones beyond the size cap"""
+        safe_job = re.sub(r'[^A-Za-z0-9_-]+', '_', str(job or 'job'))[:40]
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{safe_job}"
+        record_dir = os.path.join(self.path, name)
+
+        with self._lock:
+            try:
+                os.makedirs(record_dir, exist_ok=True)
+                with open(os.path.join(record_dir, 'record.json'), 'w', encoding='utf-8') as f:
+                    json.dump(record, f, ensure_ascii=False, indent=2, default=str)
+                if page_source is not None:
+                    with gzip.open(os.path.join(record_dir, 'dom.html.gz'), 'wt', encoding='utf-8') as f:
+                        f.write(page_source)
+                if screenshot is not None:
+                    with open(os.path.join(record_dir, 'screenshot.png'), 'wb') as f:
+                        f.write(screenshot)
+            except OSError as e:
+                logger.error(f"Failed to write flight record {name}: {e}")
+                return None
+
+            self._evict()
+
+        logger.info(f"Flight record saved: {record_dir}")
+        return name
+
+    def _dir_size(self, record_dir):
+        total = 0
+        for entry in os.scandir(record_dir):
+            if entry.is_file():
+                total += entry.stat().st_size
+        return total
+
+    def _evict(self):
+        """Remove oldest records until the store fits in max_bytes"""
+        records = sorted(entry.name for entry in os.scandir(self.path) if entry.is_dir())
+        sizes = {name: self._dir_size(os.path.join(self.path, name)) for name in records}
+        total = sum(sizes.values())
+
+        # The newest record is always kept
+        while total > self.max_bytes and len(records) > 1:
+            oldest = records.pop(0)
+            shutil.rmtree(os.path.join(self.path, oldest), ignore_errors=True)
+            total -= sizes[oldest]
+            logger.info(f"Evicted flight record {oldest}")
+
+    def list(self):
+        """List records, newest first"""
+        if not os.path.isdir(self.path):
+            return []
+
+        records = []
+        for entry in sorted(os.scandir(self.path), key=lambda e: e.name, reverse=True):
+            if not entry.is_dir():
+                continue
+            files = sorted(os.listdir(entry.path))
+            records.append({
+                'name': entry.name,
+                'files': files,
+                'bytes': self._dir_size(entry.path)
+            })
+        return records
+
+    def file_path(self, name, filename):
+        """Resolve a file inside a record, or None if it does not exist"""
+        for part in (name, filename):
+            if os.path.basename(part) != part or '/' in part or '\\' in part or part.startswith('.'):
+                return None
+        path = os.path.join(self.path, name, filename)
+        return path if os.path.isfile(path) else None
@@ -2,30 +2,373 @@
 Order Coordinator
 Orchestrates data extraction from BaseLinker and B2B Hendi
 """
+from contextlib import contextmanager, nullcontext
 import logging
+import threading
+import time
 from .baselinker_extractor import BaseLinkerExtractor
+from .baselinker_api import BaseLinkerApiExtractor
 from .b2b_extractor import B2BExtractor
+from .sku_catalog import SkuCatalog
+from .deadline import Deadline, DeadlineExceeded
+from .flight_recorder import FlightRecorder
+from .timeline import Timeline, TimelineStore
+from .consolidation import consolidate_orders, allocation_report
 
 logger = logging.getLogger(__name__)
 
 class OrderCoordinator:
     """Coordinates extraction from multiple sources"""
     
-    def __init__(self, chrome_debug_port=9222, config=None):
+    # Background tab reset per Chrome debug port; the next order waits for it
+    _prewarm_threads = {}
+    _prewarm_lock = threading.Lock()
+    
+    # Lock the pre-warm thread holds while it drives the tabs, set by a process
+    # whose jobs share one WebDriver session (see driver_broker.py)
+    prewarm_guard = None
+    
+    def __init__(self, chrome_debug_port=9222, config=None, order_store=None, deadline=None):
         self.chrome_debug_port = chrome_debug_port
         self.config = config or {}
+        self.order_store = order_store
+        self.deadline_budget = deadline
+        self.deadline = Deadline()
+        self.deadline_step = None
+        self.recorder = None
+        self.timeline = None
         self.baselinker_extractor = None
         self.b2b_extractor = None
+        self.step_timings = {}
+    
+    @staticmethod
+    def build_address_data(address, email):
+        """
+        Convert an address (as extracted from BaseLinker or edited in the UI)
+        into B2B Hendi address form fields
+        
+        Args:
+            address: Dict with company, phone, address, city, postal_code
+            email: Email address
+            
+        Returns:
+            dict: Address data for fill_delivery_address
+        """
+        return {
+            'name': address.get('company', ''),
+            'phone': address.get('phone', ''),
+            'email': email,
+            'street': address.get('address', ''),
+            'street_no': '.',
+            'street_flat': '',
+            'zip': address.get('postal_code', ''),
+            'city': address.get('city', '')
+        }
+    
+    @contextmanager
+    def _timed(self, step):
+        """
+        Record wall-clock duration of a step in self.step_timings
+        
+        Refuses to start the step once the deadline has passed and remembers
+        the step during which the budget ran out.
+        """
+        if self.deadline.expired:
+            self.deadline_step = self.deadline_step or step
+            raise DeadlineExceeded(self.deadline_step, self.deadline.budget)
+        
+        if self.recorder is not None:
+            self.recorder.mark(step)
+        
+        span = self.timeline.span(step, 'step') if self.timeline is not None else nullcontext()
+        start = time.monotonic()
+        try:
+            with span:
+                yield
+        finally:
+            self.step_timings[step] = round(time.monotonic() - start, 3)
+            if self.deadline.expired and self.deadline_step is None:
+                self.deadline_step = step
+    
+    def _start_job(self, kind, order_id=None):
+        """
+        Start the time budget, flight recorder and timeline for one call
+        
+        Args:
+            kind: Flow name in config["deadlines"] ('extract', 'complete', ...)
+            order_id: BaseLinker order id, used to label flight records (optional)
+        """
+        budget = self.deadline_budget
+        if budget is None:
+            budget = self.config.get('deadlines', {}).get(kind)
+        self.deadline = Deadline(float(budget) if budget else None)
+        self.deadline_step = None
+        self.step_timings = {}
+        self.recorder = FlightRecorder.from_config(
+            self.config, job=f"{kind}-{order_id}" if order_id else kind
+        )
+        self.timeline = Timeline(kind, order_id)
+        TimelineStore.add(self.timeline)
+    
+    def _apply_deadline(self, result):
+        """Replace a failure's error with the step that ran out of budget"""
+        if result.get("success", True) or not self.deadline.expired:
+            return result
+        
+        step = self.deadline_step or 'unknown'
+        result["error"] = f"Time budget of {self.deadline.budget:g}s ran out during '{step}'"
+        result["deadline_exceeded"] = self.deadline.report(step)
+        logger.error(f"{result['error']} (waiting for: {self.deadline.last_wait})")
+        return result
+    
+    @staticmethod
+    def _is_final_event(event):
+        """Whether a streamed event ends its job"""
+        return event.get("event") in ("done", "error") or event.get("success") is False
+    
+    def _finish_job(self, result, final=True):
+        """
+        Report deadline overruns, close the timeline and dump the flight recorder for a failed result
+        
+        Args:
+            result: Result dict (or streamed event)
+            final: Whether this is the last result of the job
+            
+        Returns:
+            dict: The result, with 'timeline_id' and, on failure, 'flight_record'
+        """
+        self._apply_deadline(result)
+        
+        if final and self.timeline is not None:
+            # Detached before the recorder, which was attached to the driver first
+            self.timeline.finish(result.get("success", True))
+            result["timeline_id"] = self.timeline.id
+        
+        # Failures before any browser work (e.g. SKU validation) have nothing to record
+        if result.get("success", True) or self.recorder is None or not self.recorder.commands():
+            if final and self.recorder is not None:
+                # Leave the driver unwrapped for the next job that reuses it
+                self.recorder.detach()
+            return result
+        
+        recorder, self.recorder = self.recorder, None
+        record = recorder.dump(result.get("error") or "failed", result)
+        if record:
+            result["flight_record"] = record
+        return result
+    
+    def _wait_for_prewarm_within_deadline(self):
+        """Wait for a running pre-warm, but not beyond the call's deadline"""
+        with self._timed('prewarm_wait'):
+            self.wait_for_prewarm(
+                self.chrome_debug_port,
+                self.deadline.clamp(self._prewarm_wait_timeout(), 'prewarm')
+            )
+    
+    def _record_run(self, order_id, kind, result, products=None, address=None):
+        """Record an extraction or completion in the order store, if configured"""
+        if self.order_store is None:
+            return
+        
+        if result.get('awaiting_confirmation'):
+            outcome = 'awaiting_confirmation'
+        else:
+            outcome = 'success' if result.get('success') else 'failed'
+        
+        # A checkout's number only counts once the operator has submitted it (see OrderStore.confirm)
+        self.order_store.record_run(
+            order_id,
+            kind,
+            outcome,
+            products=products,
+            address=address,
+            b2b_number=result.get('b2b_number'),
+            step_timings=self.step_timings,
+            error=result.get('error'),
+            draft_b2b_number=result.get('draft_b2b_number')
+        )
+    
+    def start_prewarm(self, order_id=None, include_b2b=True):
+        """
+        Reset the tabs for the next order in a background thread
+        
+        Puts the B2B tab back on the import page and the BaseLinker tab back on
+        the order list, so neither load is on the next order's critical path.
+        
+        Args:
+            order_id: BaseLinker order id that was just completed (optional)
+            include_b2b: Also move the B2B tab; False while it shows a checkout
+                         the operator still has to submit
+            
+        Returns:
+            threading.Thread: Pre-warm thread, or None if disabled
+        """
+        if not self.config.get('prewarm', {}).get('enabled', True):
+            return None
+        
+        with OrderCoordinator._prewarm_lock:
+            thread = OrderCoordinator._prewarm_threads.get(self.chrome_debug_port)
+            if thread is not None and thread.is_alive():
+                return thread
+            
+            thread = threading.Thread(
+                target=self._prewarm, args=(order_id, include_b2b),
+                name=f"prewarm-{self.chrome_debug_port}", daemon=True
+            )
+            OrderCoordinator._prewarm_threads[self.chrome_debug_port] = thread
+            thread.start()
+        return thread
+    
+    @classmethod
+    def wait_for_prewarm(cls, chrome_debug_port, timeout=None):
+        """Block until a running pre-warm for this Chrome has finished"""
+        thread = cls._prewarm_threads.get(chrome_debug_port)
+        if thread is not None and thread is not threading.current_thread() and thread.is_alive():
+            logger.info("Waiting for tab pre-warm to finish...")
+            thread.join(timeout)
+    
+    def _prewarm_wait_timeout(self):
+        """Upper bound on waiting for a pre-warm (B2B and BaseLinker steps plus delay)"""
+        settings = self.config.get('prewarm', {})
+        return settings.get('delay', 0) + 2 * settings.get('timeout', 15) + 10
+    
+    def _prewarm(self, order_id, include_b2b=True):
+        """Pre-warm the tabs (runs in the background thread)"""
+        settings = self.config.get('prewarm', {})
+        timeout = settings.get('timeout', 15)
+        started = time.monotonic()
+        
+        time.sleep(settings.get('delay', 0))
+        
+        with OrderCoordinator.prewarm_guard or nullcontext():
+            b2b_ready, baselinker_ready = self._prewarm_tabs(order_id, include_b2b, timeout)
+        
+        logger.info(f"Tab pre-warm done in {time.monotonic() - started:.2f}s "
+                    f"(B2B ready: {b2b_ready}, BaseLinker ready: {baselinker_ready})")
+    
+    def _prewarm_tabs(self, order_id, include_b2b, timeout):
+        """Reset the tabs; returns whether the B2B and BaseLinker tabs are ready"""
+        settings = self.config.get('prewarm', {})
+        b2b_ready = False
+        if include_b2b:
+            b2b_extractor = B2BExtractor(self.chrome_debug_port, self.config)
+            try:
+                if b2b_extractor.connect_to_chrome():
+                    b2b_ready = b2b_extractor.prewarm_import_page(settings.get('b2b_import_page_url'), timeout)
+            except Exception as e:
+                logger.error(f"B2B pre-warm failed: {e}")
+            finally:
+                b2b_extractor.close()
+        
+        baselinker_ready = False
+        baselinker_extractor = BaseLinkerExtractor(self.chrome_debug_port, self.config)
+        try:
+            if baselinker_extractor.connect_to_chrome():
+                baselinker_ready = baselinker_extractor.return_to_order_list(order_id, timeout)
+        except Exception as e:
+            logger.error(f"BaseLinker pre-warm failed: {e}")
+        finally:
+            baselinker_extractor.close()
+        
+        return b2b_ready, baselinker_ready
+    
+    def filter_unprocessed(self, order_ids):
+        """
+        Skip BaseLinker orders that already have a B2B order
+        
+        Args:
+            order_ids: List of BaseLinker order ids
+            
+        Returns:
+            list: Order ids still to process
+        """
+        if self.order_store is None:
+            return list(order_ids)
+        
+        remaining = self.order_store.filter_unprocessed(order_ids)
+        skipped = len(order_ids) - len(remaining)
+        if skipped:
+            logger.info(f"Skipping {skipped} orders that already have a B2B number")
+        return remaining
+    
+    def validate_products(self, products):
+        """
+        Validate and normalise SKUs against the local B2B Hendi catalog
+        
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys
+            
+        Returns:
+            dict: Validation result, or None if the catalog is disabled
+        """
+        catalog = SkuCatalog.for_config(self.config)
+        if catalog is None:
+            return None
+        
+        remove_prefix = self.config.get('data_processing', {}).get('remove_sku_prefix', 'H-')
+        try:
+            return catalog.validate_products(products, remove_prefix)
+        except Exception as e:
+            logger.error(f"SKU catalog validation failed, skipping: {e}")
+            return None
+    
+    def _check_products(self, products):
+        """
+        Run catalog validation before any browser work
+        
+        Returns:
+            tuple: (products to import, error result or None)
+        """
+        validation = self.validate_products(products)
+        if validation is None:
+            return products, None
+        
+        block_unknown = self.config.get('sku_catalog', {}).get('block_unknown', True)
+        if not validation['valid'] and block_unknown:
+            if validation['unknown']:
+                error = f"Unknown SKUs at B2B Hendi: {', '.join(item['sku'] for item in validation['unknown'])}"
+            else:
+                error = f"SKUs not validated: {validation['error']}"
+            return products, {
+                "success": False,
+                "error": error,
+                "sku_validation": validation
+            }
+        
+        return validation['products'], None
+    
+    @staticmethod
+    def _import_error(import_report):
+        """Error message for a failed import, using the preview report when available"""
+        if import_report and import_report['matched'] + import_report['quantity_changed'] == 0:
+            return "No imported lines matched at B2B Hendi"
+        return "Failed to import products"
     
     def extract_all_order_data(self):
         """
-        Extract all order data from BaseLinker
+        Extract all order data from BaseLinker and record it in the order store
         
         Returns:
             dict: Complete order data
         """
+        self._start_job('extract')
+        order_data = self._extract_order_data()
+        self._finish_job(order_data)
+        order_data["step_timings"] = self.step_timings
+        
+        self._record_run(
+            order_data.get("order_id"), 'extract', order_data,
+            products=order_data.get("products"), address=order_data.get("address")
+        )
+        return order_data
+    
+    def _extract_order_data(self):
+        """Extract order data from the BaseLinker tab"""
         order_data = {
             "success": False,
+            "order_id": None,
+            "b2b_number": None,
+            "already_processed": False,
             "products": [],
             "payment_amount": None,
             "phone": None,
@@ -34,17 +377,24 @@ class OrderCoordinator:
         }
         
         try:
+            self._wait_for_prewarm_within_deadline()
+            
             # Initialize BaseLinker extractor with config
-            self.baselinker_extractor = BaseLinkerExtractor(self.chrome_debug_port, self.config)
+            self.baselinker_extractor = BaseLinkerExtractor(self.chrome_debug_port, self.config,
+                                                   self.deadline, self.recorder, self.timeline)
             
             # Connect to Chrome
-            if not self.baselinker_extractor.connect_to_chrome():
+            with self._timed('connect'):
+                connected = self.baselinker_extractor.connect_to_chrome()
+            
+            if not connected:
                 order_data["error"] = "Could not connect to Chrome"
                 return order_data
             
             # Extract data from BaseLinker
             logger.info("Extracting data from BaseLinker...")
-            baselinker_data = self.baselinker_extractor.extract_all_data()
+            with self._timed('extract'):
+                baselinker_data = self.baselinker_extractor.extract_all_data()
             
             if not baselinker_data:
                 order_data["error"] = "BaseLinker tab not found"
@@ -52,11 +402,7 @@ class OrderCoordinator:
                 return order_data
             
             # Populate order data
-            order_data["products"] = baselinker_data.get("products", [])
-            order_data["payment_amount"] = baselinker_data.get("payment_amount")
-            order_data["phone"] = baselinker_data.get("phone")
-            order_data["email"] = baselinker_data.get("email")
-            order_data["address"] = baselinker_data.get("address")
+            self._populate_order_data(order_data, baselinker_data)
             
             order_data["success"] = True
             logger.info("Order data extraction completed successfully")
@@ -71,6 +417,160 @@ class OrderCoordinator:
         
         return order_data
     
+    def _populate_order_data(self, order_data, baselinker_data):
+        """Copy extracted BaseLinker fields into order_data, flag processed orders and validate SKUs"""
+        order_data["order_id"] = baselinker_data.get("order_id")
+        order_data["b2b_number"] = baselinker_data.get("b2b_number")
+        order_data["already_processed"] = bool(order_data["b2b_number"]) or (
+            self.order_store is not None and self.order_store.is_processed(order_data["order_id"])
+        )
+        order_data["products"] = baselinker_data.get("products", [])
+        order_data["payment_amount"] = baselinker_data.get("payment_amount")
+        order_data["phone"] = baselinker_data.get("phone")
+        order_data["email"] = baselinker_data.get("email")
+        order_data["address"] = baselinker_data.get("address")
+        
+        validation = self.validate_products(order_data["products"])
+        if validation is not None:
+            order_data["products"] = validation["products"]
+            order_data["sku_validation"] = validation
+    
+    def extract_orders(self, order_ids):
+        """
+        Extract several BaseLinker orders concurrently in parallel tabs
+        
+        Orders that already have a B2B number are skipped before any page is
+        opened; at most parallel_extraction.max_tabs orders load at once.
+        With baselinker_api enabled the orders are read through the API instead.
+        
+        Args:
+            order_ids: List of BaseLinker order ids
+            
+        Returns:
+            dict: success flag, extracted 'orders', 'skipped' order ids and step_timings
+        """
+        self._start_job('extract_orders')
+        
+        order_ids = [str(order_id) for order_id in order_ids]
+        pending = self.filter_unprocessed(order_ids)
+        pending_ids = set(pending)
+        result = {
+            "success": False,
+            "orders": [],
+            "skipped": [order_id for order_id in order_ids if order_id not in pending_ids]
+        }
+        
+        if pending:
+            self._extract_orders(pending, result)
+            self._finish_job(result)
+        else:
+            result["success"] = True
+        
+        result["step_timings"] = self.step_timings
+        return result
+    
+    def _collect_orders(self, extracted_orders, result):
+        """Populate, record and append extracted orders to result["orders"]"""
+        for extracted in extracted_orders:
+            order_data = {"success": extracted["success"]}
+            if extracted["success"]:
+                self._populate_order_data(order_data, extracted)
+            else:
+                order_data.update(order_id=extracted["order_id"], error=extracted.get("error"))
+            
+            self._record_run(order_data["order_id"], 'extract', order_data,
+                             products=order_data.get("products"), address=order_data.get("address"))
+            result["orders"].append(order_data)
+    
+    def _extract_orders_api(self, extract, result):
+        """
+        Extract orders through the BaseLinker API into result["orders"]
+        
+        Args:
+            extract: Callable(BaseLinkerApiExtractor) yielding extracted orders
+            result: Result dict to fill
+        """
+        api = BaseLinkerApiExtractor(self.config, self.deadline)
+        try:
+            with self._timed('extract'):
+                self._collect_orders(extract(api), result)
+            result["success"] = True
+            logger.info(f"Extracted {len(result['orders'])} orders through the BaseLinker API")
+        except Exception as e:
+            logger.error(f"Error during BaseLinker API extraction: {e}", exc_info=True)
+            result["error"] = str(e)
+        finally:
+            api.close()
+    
+    def extract_status_orders(self, status_id=None):
+        """
+        Extract every order in a BaseLinker status through the API
+        
+        Args:
+            status_id: BaseLinker status id (default: the status of baselinker_url)
+            
+        Returns:
+            dict: success flag, extracted 'orders' (orders with a B2B number
+                  are left out and listed in 'skipped') and step_timings
+        """
+        self._start_job('extract_orders')
+        result = {"success": False, "orders": [], "skipped": []}
+        
+        def unprocessed(api):
+            for extracted in api.extract_status_orders(status_id):
+                if extracted.get("b2b_number") or not self.filter_unprocessed([extracted["order_id"]]):
+                    result["skipped"].append(extracted["order_id"])
+                    continue
+                yield extracted
+        
+        self._extract_orders_api(unprocessed, result)
+        self._finish_job(result)
+        result["step_timings"] = self.step_timings
+        return result
+    
+    def _extract_orders(self, order_ids, result):
+        """Extract orders in parallel tabs (or through the BaseLinker API) into result["orders"]"""
+        if self.config.get('baselinker_api', {}).get('enabled'):
+            self._extract_orders_api(lambda api: api.extract_orders(order_ids), result)
+            return
+        
+        settings = self.config.get('parallel_extraction', {})
+        
+        try:
+            self._wait_for_prewarm_within_deadline()
+            
+            self.baselinker_extractor = BaseLinkerExtractor(self.chrome_debug_port, self.config,
+                                                   self.deadline, self.recorder, self.timeline)
+            
+            with self._timed('connect'):
+                connected = self.baselinker_extractor.connect_to_chrome()
+            
+            if not connected:
+                result["error"] = "Could not connect to Chrome"
+                return
+            
+            if not self.baselinker_extractor.find_baselinker_tab():
+                result["error"] = "BaseLinker tab not found"
+                return
+            
+            with self._timed('extract'):
+                self._collect_orders(self.baselinker_extractor.extract_orders_in_tabs(
+                    order_ids,
+                    max_tabs=settings.get('max_tabs', 4),
+                    page_timeout=settings.get('page_timeout', 20)
+                ), result)
+            
+            result["success"] = True
+            logger.info(f"Extracted {len(result['orders'])} orders in parallel tabs")
+            
+        except Exception as e:
+            logger.error(f"Error during parallel order extraction: {e}", exc_info=True)
+            result["error"] = str(e)
+        
+        finally:
+            if self.baselinker_extractor:
+                self.baselinker_extractor.close()
+    
     def import_products_to_b2b(self, products):
         """
         Import products to B2B Hendi
@@ -81,9 +581,22 @@ class OrderCoordinator:
         Returns:
             dict: Result
         """
+        self._start_job('complete')
+        return self._finish_job(self._import_products(products))
+    
+    def _import_products(self, products):
+        """Run the B2B import step"""
         try:
+            # Validate SKUs locally before touching the browser
+            products, error = self._check_products(products)
+            if error:
+                return error
+            
+            self._wait_for_prewarm_within_deadline()
+            
             # Initialize B2B extractor with config
-            self.b2b_extractor = B2BExtractor(self.chrome_debug_port, self.config)
+            self.b2b_extractor = B2BExtractor(self.chrome_debug_port, self.config,
+                                                   self.deadline, self.recorder, self.timeline)
             
             # Connect to Chrome
             if not self.b2b_extractor.connect_to_chrome():
@@ -93,17 +606,22 @@ class OrderCoordinator:
                 }
             
             # Import products
-            success = self.b2b_extractor.import_products(products)
+            with self._timed('import'):
+                success = self.b2b_extractor.import_products(products)
+            import_report = self.b2b_extractor.last_import_report
             
             if success:
                 return {
                     "success": True,
-                    "message": f"Successfully imported {len(products)} products to B2B Hendi"
+                    "message": f"Successfully imported {len(products)} products to B2B Hendi",
+                    "import_report": import_report,
+                    "cart_diff": self.b2b_extractor.last_cart_diff
                 }
             else:
                 return {
                     "success": False,
-                    "error": "Failed to import products"
+                    "error": self._import_error(import_report),
+                    "import_report": import_report
                 }
                 
         except Exception as e:
@@ -117,7 +635,7 @@ class OrderCoordinator:
             if self.b2b_extractor:
                 self.b2b_extractor.close()
     
-    def complete_order_with_address(self, products, address_data, payment_amount=None):
+    def complete_order_with_address(self, products, address_data, payment_amount=None, order_id=None):
         """
         Complete order: import products, fill delivery address, and select payment method
         
@@ -125,16 +643,82 @@ class OrderCoordinator:
             products: List of dicts with 'sku' and 'quantity' keys
             address_data: Dict with address fields
             payment_amount: Payment amount (optional)
+            order_id: BaseLinker order id to link the B2B order to (optional)
             
         Returns:
             dict: Result
         """
+        self._start_job('complete', order_id)
+        result = self._complete_order(products, address_data, payment_amount)
+        self._finish_job(result)
+        result["step_timings"] = self.step_timings
+        
+        self._record_run(order_id, 'complete', result, products=products, address=address_data)
+        if result.get("success"):
+            # The B2B tab stays on the checkout until the operator submits it
+            self.start_prewarm(order_id, include_b2b=False)
+        return result
+    
+    def import_consolidated(self, orders, address_data=None, payment_amount=None):
+        """
+        Import the products of several orders as one B2B import
+        
+        Quantities are summed per normalised SKU, so N orders cost one import
+        flow and one checkout instead of N.
+        
+        Args:
+            orders: Extracted orders, dicts with 'order_id' and 'products'
+            address_data: Delivery address to complete the order with (optional;
+                          without it the products are only imported)
+            payment_amount: Payment amount (optional)
+            
+        Returns:
+            dict: Result with 'consolidated_products' and 'allocation', the
+                  lines of each order and their import status
+        """
+        self._start_job('consolidated')
+        
+        remove_prefix = self.config.get('data_processing', {}).get('remove_sku_prefix', 'H-')
+        merged = consolidate_orders(orders, remove_prefix)
+        logger.info(f"Consolidated {len(orders)} orders into {len(merged['products'])} SKUs")
+        
+        if not merged['products']:
+            result = {"success": False, "error": "No products in the selected orders"}
+        elif address_data:
+            result = self._complete_order(merged['products'], address_data, payment_amount)
+        else:
+            result = self._import_products(merged['products'])
+        self._finish_job(result)
+        
+        result["consolidated_products"] = merged['products']
+        result["allocation"] = allocation_report(merged['allocation'], result.get("import_report"))
+        result["step_timings"] = self.step_timings
+        
+        for order in orders:
+            self._record_run(order.get('order_id'), 'consolidated', result, products=order.get('products'))
+        if result.get("success") and address_data:
+            self.start_prewarm(include_b2b=False)
+        return result
+    
+    def _complete_order(self, products, address_data, payment_amount):
+        """Run the B2B import, address and payment steps"""
         try:
+            # Validate SKUs locally before touching the browser
+            products, error = self._check_products(products)
+            if error:
+                return error
+            
+            self._wait_for_prewarm_within_deadline()
+            
             # Initialize B2B extractor with config
-            self.b2b_extractor = B2BExtractor(self.chrome_debug_port, self.config)
+            self.b2b_extractor = B2BExtractor(self.chrome_debug_port, self.config,
+                                                   self.deadline, self.recorder, self.timeline)
             
             # Connect to Chrome
-            if not self.b2b_extractor.connect_to_chrome():
+            with self._timed('connect'):
+                connected = self.b2b_extractor.connect_to_chrome()
+            
+            if not connected:
                 return {
                     "success": False,
                     "error": "Could not connect to Chrome"
@@ -142,17 +726,21 @@ class OrderCoordinator:
             
             # Import products
             logger.info("Importing products...")
-            success = self.b2b_extractor.import_products(products)
+            with self._timed('import'):
+                success = self.b2b_extractor.import_products(products)
+            import_report = self.b2b_extractor.last_import_report
             
             if not success:
                 return {
                     "success": False,
-                    "error": "Failed to import products"
+                    "error": self._import_error(import_report),
+                    "import_report": import_report
                 }
             
             # Fill delivery address
             logger.info("Filling delivery address...")
-            success = self.b2b_extractor.fill_delivery_address(address_data)
+            with self._timed('address'):
+                success = self.b2b_extractor.fill_delivery_address(address_data)
             
             if not success:
                 return {
@@ -162,7 +750,8 @@ class OrderCoordinator:
             
             # Select payment method
             logger.info("Selecting payment method...")
-            success = self.b2b_extractor.select_payment_method(payment_amount)
+            with self._timed('payment'):
+                success = self.b2b_extractor.select_payment_method(payment_amount)
             
             if not success:
                 return {
@@ -172,7 +761,13 @@ class OrderCoordinator:
             
             return {
                 "success": True,
-                "message": f"Order completed: {len(products)} products imported, address filled, and payment method selected"
+                "message": f"Checkout ready: {len(products)} products imported, address filled, and payment method "
+                           f"selected; submit the order in B2B Hendi and confirm it",
+                "import_report": import_report,
+                "cart_diff": self.b2b_extractor.last_cart_diff,
+                # The checkout is left for the operator to submit
+                "awaiting_confirmation": True,
+                "draft_b2b_number": self.b2b_extractor.extract_b2b_number()
             }
                 
         except Exception as e:
@@ -184,4 +779,148 @@ class OrderCoordinator:
         
         finally:
             if self.b2b_extractor:
-                self.b2b_extractor.close()
\ No newline at end of file
+                self.b2b_extractor.close()
+    
+    def stream_large_order_extraction(self):
+        """
+        Extract a large order from BaseLinker, streaming products in batches
+        
+        Yields:
+            dict: 'products' events with each batch, then a 'done' event with
+                  payment, contact and address data (or an 'error' event)
+        """
+        batch_size = self.config.get('large_order', {}).get('extract_batch_size', 50)
+        self._start_job('large_extract')
+        
+        for event in self._stream_large_order_extraction(batch_size):
+            yield self._finish_job(event, final=self._is_final_event(event))
+    
+    def _stream_large_order_extraction(self, batch_size):
+        """Stream product batches and contact data from the BaseLinker tab"""
+        try:
+            self._wait_for_prewarm_within_deadline()
+            
+            self.baselinker_extractor = BaseLinkerExtractor(self.chrome_debug_port, self.config,
+                                                   self.deadline, self.recorder, self.timeline)
+            
+            if not self.baselinker_extractor.connect_to_chrome():
+                yield {"event": "error", "success": False, "error": "Could not connect to Chrome"}
+                return
+            
+            if not self.baselinker_extractor.find_baselinker_tab():
+                yield {"event": "error", "success": False, "error": "BaseLinker tab not found"}
+                return
+            
+            count = 0
+            for batch in self.baselinker_extractor.iter_product_batches(batch_size):
+                count += len(batch)
+                validation = self.validate_products(batch)
+                if validation is not None:
+                    batch = validation["products"]
+                yield {
+                    "event": "products",
+                    "products": batch,
+                    "count": count,
+                    "sku_validation": validation
+                }
+            
+            yield {
+                "event": "done",
+                "success": True,
+                "count": count,
+                "payment_amount": self.baselinker_extractor.extract_payment_amount(),
+                "phone": self.baselinker_extractor.extract_phone_number(),
+                "email": self.baselinker_extractor.extract_email(),
+                "address": self.baselinker_extractor.extract_address()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error during large order extraction: {e}", exc_info=True)
+            yield {"event": "error", "success": False, "error": str(e)}
+        
+        finally:
+            if self.baselinker_extractor:
+                self.baselinker_extractor.close()
+    
+    def stream_large_order_import(self, products, address_data=None, payment_amount=None, order_id=None):
+        """
+        Import a large order in chunks, optionally completing address and payment
+        
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys
+            address_data: Dict with address fields (optional)
+            payment_amount: Payment amount (optional)
+            order_id: BaseLinker order id to record the run under (optional)
+            
+        Yields:
+            dict: Progress events per chunk, then a 'done' event (or an 'error' event)
+        """
+        self._start_job('large_import', order_id)
+        last_event = {}
+        
+        for event in self._stream_large_order_import(products, address_data, payment_amount):
+            last_event = self._finish_job(event, final=self._is_final_event(event))
+            yield last_event
+        
+        self._record_run(order_id, 'complete', last_event, products=products, address=address_data)
+        if last_event.get("success") and address_data:
+            self.start_prewarm(order_id, include_b2b=False)
+    
+    def _stream_large_order_import(self, products, address_data, payment_amount):
+        """Run the chunked import, address and payment steps"""
+        chunk_size = self.config.get('large_order', {}).get('chunk_size', 40)
+        
+        products, error = self._check_products(products)
+        if error:
+            yield {"event": "error", **error}
+            return
+        
+        try:
+            self._wait_for_prewarm_within_deadline()
+            
+            self.b2b_extractor = B2BExtractor(self.chrome_debug_port, self.config,
+                                                   self.deadline, self.recorder, self.timeline)
+            
+            with self._timed('connect'):
+                connected = self.b2b_extractor.connect_to_chrome()
+            
+            if not connected:
+                yield {"event": "error", "success": False, "error": "Could not connect to Chrome"}
+                return
+            
+            with self._timed('large_import'):
+                for event in self.b2b_extractor.import_products_chunked(products, chunk_size):
+                    yield event
+                    if not event["success"]:
+                        return
+            
+            if address_data:
+                logger.info("Filling delivery address...")
+                with self._timed('address'):
+                    success = self.b2b_extractor.fill_delivery_address(address_data)
+                if not success:
+                    yield {"event": "error", "success": False, "error": "Failed to fill delivery address"}
+                    return
+                
+                logger.info("Selecting payment method...")
+                with self._timed('payment'):
+                    success = self.b2b_extractor.select_payment_method(payment_amount)
+                if not success:
+                    yield {"event": "error", "success": False, "error": "Failed to select payment method"}
+                    return
+            
+            yield {
+                "event": "done",
+                "success": True,
+                "message": f"Large order completed: {len(products)} products imported in chunks of {chunk_size}",
+                "awaiting_confirmation": bool(address_data),
+                "draft_b2b_number": self.b2b_extractor.extract_b2b_number() if address_data else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Error importing large order: {e}", exc_info=True)
+            yield {"event": "error", "success": False, "error": str(e)}
+        
+        finally:
+            if self.b2b_extractor:
+                self.b2b_extractor.close()
@@ -0,0 +1,125 @@
+"""
+Order Payload
+Maps the JSON the BaseLinker order page loads over XHR onto the structure the
+DOM extractors return, using the field paths in config["network_extraction"]
+"""
+import json
+import re
+from .sku_catalog import normalize_sku
+
+
+def lookup(data, path):
+    """
+    Read a dotted path ('order.products', 'items.0.sku') from nested dicts and lists
+
+    Returns:
+        Value at the path, or None if any step is missing
+    """
+    if not path:
+        return None
+    for key in path.split('.'):
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _amount(value):
+    match = re.search(r'[\d,]+\.?\d*', _text(value))
+    return float(match.group(0).replace(',', '.')) if match else 0.0
+
+
+def parse_payloads(captured, url_pattern):
+    """
+    Decode captured responses whose URL matches url_pattern
+
+    Args:
+        captured: List of dicts with 'url' and 'body' from the page hook
+        url_pattern: Regex the order data request URL must match
+
+    Returns:
+        list: Decoded JSON bodies, newest first
+    """
+    pattern = re.compile(url_pattern) if url_pattern else None
+    payloads = []
+    for response in reversed(captured or []):
+        if pattern is not None and not pattern.search(response.get('url', '')):
+            continue
+        try:
+            payloads.append(json.loads(response.get('body') or ''))
+        except ValueError:
+            continue
+    return payloads
+
+
+def map_order_payload(payload, fields, data_processing=None, order_id=None):
+    """
+    Map one order payload onto the DOM extractors' result structure
+
+    Args:
+        payload: Decoded JSON body
+        fields: Field paths from config["network_extraction"]["fields"]
+        data_processing: config["data_processing"] (SKU/phone prefixes, skipped B2B numbers)
+        order_id: Expected order id; payloads for another order are rejected
+
+    Returns:
+        dict: products, payment_amount, phone, email, address and b2b_number,
+              or None if the payload is not this order or has no products
+    """
+    data_processing = data_processing or {}
+
+    if order_id is not None and fields.get('order_id'):
+        if _text(lookup(payload, fields['order_id'])) != str(order_id):
+            return None
+
+    items = lookup(payload, fields.get('products'))
+    if isinstance(items, dict):
+        items = list(items.values())
+    if not isinstance(items, list) or not items:
+        return None
+
+    remove_sku_prefix = data_processing.get('remove_sku_prefix', 'H-')
+    products = []
+    for item in items:
+        sku = _text(lookup(item, fields.get('product_sku', 'sku')))
+        quantity = _text(lookup(item, fields.get('product_quantity', 'quantity')))
+        if sku and quantity:
+            products.append({"sku": normalize_sku(sku, remove_sku_prefix), "quantity": quantity})
+    if not products:
+        return None
+
+    # Same rule as extract_payment_amount: the paid amount only when fully paid
+    total = _amount(lookup(payload, fields.get('total_price')))
+    paid = _amount(lookup(payload, fields.get('paid_amount')))
+    payment_amount = str(paid) if paid >= total and paid > 0 else "0"
+
+    phone = _text(lookup(payload, fields.get('phone'))).replace(' ', '')
+    remove_phone_prefix = data_processing.get('remove_phone_prefix', '+48')
+    if remove_phone_prefix and phone.startswith(remove_phone_prefix):
+        phone = phone[len(remove_phone_prefix):]
+
+    address_fields = fields.get('address', {})
+    address = {key: _text(lookup(payload, address_fields.get(key)))
+               for key in ('name', 'company', 'address', 'city', 'postal_code')}
+
+    b2b_number = _text(lookup(payload, fields.get('b2b_number')))
+    if b2b_number in data_processing.get('skip_b2b_number_values', ['...', '']):
+        b2b_number = None
+
+    return {
+        "b2b_number": b2b_number,
+        "products": products,
+        "payment_amount": payment_amount,
+        "phone": phone or None,
+        "email": _text(lookup(payload, fields.get('email'))) or None,
+        "address": address
+    }
@@ -0,0 +1,19 @@
+"""
+Customer Data
+Selectors of the page elements that hold customer data, shared by everything
+that stores page content (the page corpus and the flight recorder)
+"""
+from .selector_chain import as_chain
+
+
+def pii_selectors(config):
+    """CSS selectors of elements holding customer data, from the configured BaseLinker and B2B selectors"""
+    selectors = config.get('baselinker_selectors', {})
+    ids = [selectors.get('phone', 'oms_info_phone'), selectors.get('email', 'oms_info_email')]
+    ids.extend(selectors.get('address', {}).values())
+    # Every candidate of a fallback chain, since any of them may be the one on the page
+    css = [f'#{element_id}' for value in ids for element_id in as_chain(value)]
+    # The B2B delivery address form
+    css.extend(as_chain(config.get('b2b_selectors', {}).get('address_modal', '.jsAddAddressModal')))
+    css.extend(config.get('corpus', {}).get('extra_pii_selectors', []))
+    return css
@@ -0,0 +1,96 @@
+"""
+Selector Chains
+Ordered selector fallbacks resolved in one browser call, with a per-page cache
+of the selector that matched last time
+"""
+from selenium.webdriver.common.by import By
+import threading
+
+# Selenium locator -> lookup used by FIND_FIRST_SCRIPT
+LOOKUP_KINDS = {
+    By.ID: 'id',
+    By.NAME: 'name',
+    By.CLASS_NAME: 'class',
+    By.CSS_SELECTOR: 'css'
+}
+
+# Returns [index, element, page] for the first candidate that satisfies the mode,
+# or [null, null, page]; the cached winner for the page is tried first
+FIND_FIRST_SCRIPT = """
+const [kind, candidates, mode, winners] = arguments;
+const page = location.pathname;
+const preferred = winners[page];
+const order = [...candidates.keys()];
+if (preferred !== undefined && preferred < candidates.length) {
+    order.splice(order.indexOf(preferred), 1);
+    order.unshift(preferred);
+}
+for (const i of order) {
+    const value = candidates[i];
+    let element = null;
+    try {
+        if (kind === 'id') {
+            element = document.getElementById(value);
+        } else if (kind === 'name') {
+            element = document.getElementsByName(value)[0] || null;
+        } else if (kind === 'class') {
+            element = document.getElementsByClassName(value)[0] || null;
+        } else {
+            element = document.querySelector(value);
+        }
+    } catch (e) {
+        continue;  // invalid selector in config
+    }
+    if (!element) {
+        continue;
+    }
+    if (mode !== 'present') {
+        const visible = !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length);
+        if (!visible || (mode === 'clickable' && element.disabled)) {
+            continue;
+        }
+    }
+    return [i, element, page];
+}
+return [null, null, page];
+"""
+
+
+def as_chain(value):
+    """
+    Normalise a configured selector to an ordered list of candidates
+
+    Args:
+        value: Selector string or list of selector strings
+
+    Returns:
+        list: Non-empty candidate selectors
+    """
+    if isinstance(value, (list, tuple)):
+        return [candidate for candidate in value if candidate]
+    return [value] if value else []
+
+
+class SelectorCache:
+    """Remembers, per page path, which candidate of a selector chain matched"""
+
+    _winners = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def winners(cls, by, chain):
+        """Get page path -> winning candidate index for a chain"""
+        with cls._lock:
+            return dict(cls._winners.get((by, tuple(chain)), {}))
+
+    @classmethod
+    def remember(cls, by, chain, page, index):
+        """Record the candidate that matched on a page"""
+        with cls._lock:
+            cls._winners.setdefault((by, tuple(chain)), {})[page] = index
+
+    @classmethod
+    def clear(cls):
+        """Forget all learned winners"""
+        with cls._lock:
+            cls._winners.clear()
@@ -0,0 +1,227 @@
+"""
+SKU Catalog
+Local index of B2B Hendi SKUs used to validate products before any browser work
+"""
+import csv
+import difflib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sku(sku, remove_prefix='H-'):
+    """
+    Normalise a SKU the way BaseLinker SKUs are sent to B2B Hendi
+
+    Args:
+        sku: Raw SKU (e.g. 'H-123456 ')
+        remove_prefix: Prefix removed when present (config data_processing.remove_sku_prefix)
+
+    Returns:
+        str: SKU without whitespace and prefix
+    """
+    sku = str(sku).strip()
+    if remove_prefix and sku.startswith(remove_prefix):
+        sku = sku[len(remove_prefix):]
+    return sku
+
+
+class SkuCatalog:
+    """In-memory SKU index loaded from a Hendi product export, reloaded when the file changes"""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path, settings=None):
+        self.path = path
+        self.settings = settings or {}
+        self._index = {}
+        self._buckets = {}
+        self._mtime = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_config(cls, config):
+        """
+        Get the shared catalog for the configured export file
+
+        Args:
+            config: Full application config
+
+        Returns:
+            SkuCatalog: Shared catalog, or None if the catalog is disabled
+        """
+        settings = (config or {}).get('sku_catalog', {})
+        path = settings.get('path')
+        if not settings.get('enabled', False) or not path:
+            return None
+
+        with cls._instances_lock:
+            catalog = cls._instances.get(path)
+            if catalog is None:
+                catalog = cls(path, settings)
+                cls._instances[path] = catalog
+            else:
+                catalog.settings = settings
+        return catalog
+
+    @staticmethod
+    def _key(sku):
+        """Lookup key for a SKU (case-insensitive)"""
+        return sku.upper()
+
+    def _ensure_loaded(self):
+        """
+        (Re)load the export when its modification time changed
+
+        Returns:
+            bool: True if an index is available (possibly the last good one)
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            self.error = f"SKU catalog file unavailable: {e}"
+            if self._mtime is not None:
+                logger.warning(f"{self.error}, keeping last index")
+            return self._mtime is not None
+
+        if mtime == self._mtime:
+            return True
+
+        with self._lock:
+            if mtime == self._mtime:
+                return True
+            try:
+                self._load(mtime)
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                self.error = f"SKU catalog file unreadable: {e}"
+                logger.error(self.error)
+                return self._mtime is not None
+        self.error = None
+        return True
+
+    def _load(self, mtime):
+        """Read the export into a dict index plus prefix buckets for suggestions"""
+        sku_column = self.settings.get('sku_column', 'SKU')
+        encoding = self.settings.get('encoding', 'utf-8-sig')
+        delimiter = self.settings.get('delimiter')
+        remove_prefix = self.settings.get('remove_prefix', '')
+
+        index = {}
+        buckets = {}
+
+        with open(self.path, 'r', newline='', encoding=encoding) as f:
+            if not delimiter:
+                try:
+                    delimiter = csv.Sniffer().sniff(f.read(4096), delimiters=',;\t|').delimiter
+                except csv.Error:
+                    # One column, or nothing the sniffer can decide on
+                    delimiter = csv.excel.delimiter
+                f.seek(0)
+
+            for row in csv.DictReader(f, delimiter=delimiter):
+                sku = normalize_sku(row.get(sku_column) or '', remove_prefix)
+                if not sku:
+                    continue
+                key = self._key(sku)
+                index[key] = sku
+                buckets.setdefault(key[:2], []).append(key)
+
+        self._index = index
+        self._buckets = buckets
+        self._mtime = mtime
+        logger.info(f"SKU catalog loaded: {len(index)} SKUs from {self.path}")
+
+    def __len__(self):
+        return len(self._index)
+
+    def lookup(self, sku):
+        """
+        Find the catalog form of a SKU
+
+        Returns:
+            str: Catalog SKU or None if unknown
+        """
+        self._ensure_loaded()
+        return self._index.get(self._key(sku))
+
+    def suggest(self, sku, limit=3):
+        """
+        Suggest close catalog matches for an unknown SKU
+
+        Searches SKUs sharing the first two characters first and falls back to
+        the whole catalog only when that bucket has nothing close.
+
+        Returns:
+            list: Up to `limit` catalog SKUs
+        """
+        key = self._key(sku)
+        cutoff = float(self.settings.get('suggestion_cutoff', 0.6))
+
+        candidates = self._buckets.get(key[:2], [])
+        matches = difflib.get_close_matches(key, candidates, n=limit, cutoff=cutoff)
+        if not matches:
+            matches = difflib.get_close_matches(key, self._index.keys(), n=limit, cutoff=cutoff)
+
+        return [self._index[match] for match in matches]
+
+    def validate_products(self, products, remove_prefix='H-'):
+        """
+        Normalise product SKUs and check them against the catalog
+
+        Args:
+            products: List of dicts with 'sku' and 'quantity' keys
+            remove_prefix: SKU prefix removed before lookup
+
+        Returns:
+            dict: valid flag, normalised products, and unknown SKUs with suggestions;
+                  not valid, with 'error', when the catalog could not be loaded
+        """
+        loaded = self._ensure_loaded()
+        normalized = []
+        unknown = []
+
+        for product in products:
+            sku = normalize_sku(product.get('sku', ''), remove_prefix)
+
+            if loaded:
+                catalog_sku = self._index.get(self._key(sku))
+                if catalog_sku is None:
+                    unknown.append({
+                        'sku': sku,
+                        'suggestions': self.suggest(sku)
+                    })
+                else:
+                    sku = catalog_sku
+
+            normalized.append({**product, 'sku': sku})
+
+        if unknown:
+            logger.warning(f"Unknown SKUs in catalog: {', '.join(item['sku'] for item in unknown)}")
+
+        result = {
+            'valid': loaded and not unknown,
+            'catalog_loaded': loaded,
+            'catalog_size': len(self._index),
+            'products': normalized,
+            'unknown': unknown
+        }
+        if not loaded:
+            result['error'] = self.error or 'SKU catalog not loaded'
+        return result
+
+    def status(self):
+        """Get catalog status for display"""
+        loaded = self._ensure_loaded()
+        status = {
+            'enabled': True,
+            'path': self.path,
+            'loaded': loaded,
+            'size': len(self._index)
+        }
+        if self.error:
+            status['error'] = self.error
+        return status
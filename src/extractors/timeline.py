@@ -0,0 +1,152 @@
+"""
+Timeline
+Structured spans of one extract/import/complete job (steps, connects, tab
+switches, clicks, sleeps and waits) for the UI waterfall
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+import time
+import uuid
+
+from .driver_hooks import restore_execute, wrap_execute
+
+# Driver commands drawn as their own spans; executeScript only when it clicks
+COMMAND_SPANS = {
+    'clickElement': 'click',
+    'get': 'page_load',
+    'refresh': 'page_load',
+    'switchToWindow': 'tab',
+    'newWindow': 'tab'
+}
+
+
+class Timeline:
+    """Spans of one job, offsets in seconds from the job start"""
+
+    def __init__(self, kind, order_id=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.order_id = order_id
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self.duration = None
+        self.success = None
+        self.spans = []
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._attached = {}  # id(driver) -> wrap_execute handle
+
+    def _offset(self):
+        return time.monotonic() - self._start
+
+    @contextmanager
+    def span(self, name, kind):
+        """
+        Time a block as a span
+
+        Args:
+            name: Label shown in the waterfall
+            kind: step, connect, tab, click, page_load, sleep, wait or settle
+        """
+        with self._lock:
+            span = {'name': name, 'kind': kind, 'start': round(self._offset(), 3),
+                    'duration': None, 'depth': self._depth}
+            self.spans.append(span)
+            self._depth += 1
+        try:
+            yield span
+        finally:
+            with self._lock:
+                self._depth -= 1
+                span['duration'] = round(self._offset() - span['start'], 3)
+
+    def attach(self, driver):
+        """Add spans for clicks, page loads and tab switches sent through the driver"""
+        if id(driver) in self._attached:
+            return
+
+        def make_wrapper(original):
+            def execute(driver_command, params=None):
+                kind = COMMAND_SPANS.get(driver_command)
+                if kind is None and driver_command in ('executeScript', 'w3cExecuteScript') \
+                        and '.click()' in (params or {}).get('script', ''):
+                    kind = 'click'
+                if kind is None:
+                    return original(driver_command, params)
+
+                name = 'click' if kind == 'click' else driver_command
+                if params and params.get('url'):
+                    name = f"{name} {params['url'][:80]}"
+                with self.span(name, kind):
+                    return original(driver_command, params)
+            return execute
+
+        self._attached[id(driver)] = wrap_execute(driver, make_wrapper)
+
+    def detach(self, driver=None):
+        """Stop adding spans for a driver (every attached driver by default) and restore it"""
+        for key in (list(self._attached) if driver is None else [id(driver)]):
+            handle = self._attached.pop(key, None)
+            if handle is not None:
+                restore_execute(handle)
+
+    def finish(self, success):
+        """Mark the job finished (may be called again by streaming jobs)"""
+        self.detach()
+        self.duration = round(self._offset(), 3)
+        self.success = bool(success)
+
+    def totals(self):
+        """Seconds per span kind, counting only spans that are not nested in the same kind"""
+        totals = {}
+        open_kinds = []
+        for span in self.spans:
+            while open_kinds and open_kinds[-1][0] >= span['depth']:
+                open_kinds.pop()
+            if span['duration'] is not None and span['kind'] not in (kind for _, kind in open_kinds):
+                totals[span['kind']] = round(totals.get(span['kind'], 0) + span['duration'], 3)
+            open_kinds.append((span['depth'], span['kind']))
+        return totals
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'order_id': self.order_id,
+            'started_at': self.started_at,
+            'duration': self.duration if self.duration is not None else round(self._offset(), 3),
+            'success': self.success
+        }
+
+    def to_dict(self):
+        with self._lock:
+            spans = [dict(span) for span in self.spans]
+        return {**self.summary(), 'spans': spans, 'totals': self.totals()}
+
+
+class TimelineStore:
+    """Most recent job timelines kept in memory"""
+
+    _timelines = OrderedDict()
+    _lock = threading.Lock()
+    max_timelines = 50
+
+    @classmethod
+    def add(cls, timeline):
+        with cls._lock:
+            cls._timelines[timeline.id] = timeline
+            while len(cls._timelines) > cls.max_timelines:
+                cls._timelines.popitem(last=False)
+
+    @classmethod
+    def get(cls, timeline_id):
+        with cls._lock:
+            return cls._timelines.get(timeline_id)
+
+    @classmethod
+    def recent(cls):
+        """Summaries of stored timelines, newest first"""
+        with cls._lock:
+            timelines = list(cls._timelines.values())
+        return [timeline.summary() for timeline in reversed(timelines)]
@@ -0,0 +1,211 @@
+"""
+Timing Profile
+Learns how long B2B transitions take and tunes step delays from rolling p95 values
+"""
+from collections import deque
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'config',
+    'timing_profile.json'
+)
+
+
+class TimingProfile:
+    """Rolling window of observed step durations, persisted as a tuned timing profile"""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path=DEFAULT_PROFILE_PATH, settings=None):
+        self.path = path
+        self._samples = {}
+        self._defaults = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.apply_settings(settings or {})
+        self._load()
+
+    @classmethod
+    def for_config(cls, config):
+        """
+        Get the shared profile for the configured path
+
+        Extractors are created per request, so the profile is cached per path
+        to keep observations in memory between requests.
+
+        Args:
+            config: Full application config
+
+        Returns:
+            TimingProfile: Shared profile instance
+        """
+        settings = (config or {}).get('timing_profile', {})
+        path = settings.get('profile_path') or DEFAULT_PROFILE_PATH
+
+        with cls._instances_lock:
+            profile = cls._instances.get(path)
+            if profile is None:
+                profile = cls(path, settings)
+                cls._instances[path] = profile
+            else:
+                profile.apply_settings(settings)
+        return profile
+
+    def apply_settings(self, settings):
+        """Apply (possibly changed) limits from config"""
+        self.enabled = settings.get('enabled', True)
+        self.window_size = max(1, int(settings.get('window_size', 50)))
+        self.percentile = float(settings.get('percentile', 95))
+        self.headroom = float(settings.get('headroom', 1.2))
+        self.min_samples = max(1, int(settings.get('min_samples', 5)))
+        self.min_delay = float(settings.get('min_delay', 0.3))
+        self.max_delay = float(settings.get('max_delay', 5))
+        self.poll_interval = float(settings.get('poll_interval', 0.1))
+
+        with self._lock:
+            for step, samples in self._samples.items():
+                if samples.maxlen != self.window_size:
+                    self._samples[step] = deque(samples, maxlen=self.window_size)
+
+    def _load(self):
+        """Load persisted samples from disk"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            for step, entry in data.get('steps', {}).items():
+                self._samples[step] = deque(entry.get('samples', []), maxlen=self.window_size)
+                if entry.get('default') is not None:
+                    self._defaults[step] = entry['default']
+
+            logger.info(f"Timing profile loaded: {len(self._samples)} steps from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load timing profile, starting empty: {e}")
+
+    def record(self, step, seconds):
+        """
+        Record how long a step took to become ready
+
+        Args:
+            step: Step name (e.g. 'import_continue_1')
+            seconds: Observed duration in seconds
+        """
+        with self._lock:
+            samples = self._samples.get(step)
+            if samples is None:
+                samples = deque(maxlen=self.window_size)
+                self._samples[step] = samples
+            samples.append(round(seconds, 3))
+            self._dirty = True
+
+    def _percentile(self, samples):
+        """Nearest-rank percentile of samples"""
+        ordered = sorted(samples)
+        rank = math.ceil(self.percentile / 100 * len(ordered))
+        return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+    def _tuned(self, samples):
+        """Tuned delay for samples, capped by the safety limits"""
+        value = self._percentile(samples) * self.headroom
+        return round(min(max(value, self.min_delay), self.max_delay), 3)
+
+    def delay_for(self, step, default):
+        """
+        Get the delay to use for a step
+
+        Args:
+            step: Step name
+            default: Configured delay from config["timing"]
+
+        Returns:
+            float: Tuned delay, or the configured delay when tuning is disabled
+                   or there are not enough observations yet
+        """
+        with self._lock:
+            self._defaults[step] = default
+            samples = self._samples.get(step)
+
+            if not self.enabled or not samples or len(samples) < self.min_samples:
+                return default
+
+            return self._tuned(samples)
+
+    def snapshot(self):
+        """
+        Get the current profile for display
+
+        Returns:
+            dict: Settings and per-step samples count, p95, tuned and default delay
+        """
+        with self._lock:
+            steps = {}
+            for step, samples in sorted(self._samples.items()):
+                if not samples:
+                    continue
+                ready = len(samples) >= self.min_samples
+                steps[step] = {
+                    'count': len(samples),
+                    'p95': self._percentile(samples),
+                    'delay': self._tuned(samples) if ready else None,
+                    'default': self._defaults.get(step)
+                }
+
+            return {
+                'enabled': self.enabled,
+                'percentile': self.percentile,
+                'min_samples': self.min_samples,
+                'min_delay': self.min_delay,
+                'max_delay': self.max_delay,
+                'steps': steps
+            }
+
+    def save(self):
+        """Persist the profile to disk if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            data = {
+                'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'steps': {
+                    step: {
+                        'samples': list(samples),
+                        'p95': self._percentile(samples),
+                        'delay': self._tuned(samples),
+                        'default': self._defaults.get(step)
+                    }
+                    for step, samples in self._samples.items() if samples
+                }
+            }
+            self._dirty = False
+
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Timing profile saved to {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to save timing profile: {e}")
+
+    def reset(self):
+        """Forget all observations and remove the persisted profile"""
+        with self._lock:
+            self._samples.clear()
+            self._dirty = False
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        logger.info("Timing profile reset")
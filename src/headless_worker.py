@@ -0,0 +1,215 @@
+"""
+Headless Worker
+Processes a queue of BaseLinker orders unattended in a headless Chrome started
+from a snapshot of the operator's logged-in profile
+
+The worker never submits a B2B order: it stops at the first checkout it
+prepares, which the operator reviews, submits and confirms
+(POST /api/orders/<id>/confirm) before the next run. B2B Hendi keeps one cart
+per account, so going on would pile the next order into the same checkout.
+
+Usage:
+    python headless_worker.py 12345 12346
+    python headless_worker.py --orders-file overnight.txt
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from chrome_manager import ChromeManager
+from order_store import OrderStore
+from logging_setup import setup_logging
+from extractors import OrderCoordinator, BaseLinkerExtractor
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+
+def load_config(path=CONFIG_PATH):
+    """Load the shared application config"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class HeadlessWorker:
+    """Runs the extract -> import -> address -> payment flow for queued orders without a visible browser"""
+
+    def __init__(self, config, order_store=None):
+        self.config = config
+        self.settings = config.get('headless_worker', {})
+        self.port = self.settings.get('port', 9223)
+        self.order_store = order_store
+        self.chrome_manager = ChromeManager()
+        self.process = None
+        self.snapshot_dir = None
+
+        # Extractors attach to the worker's Chrome, not the operator's
+        self.worker_config = {**config, 'chrome_debug_port': self.port}
+        self.worker_config['options'] = {**config.get('options', {}), 'auto_detect_chrome_host': False}
+
+    def start(self):
+        """Snapshot the operator's profile and launch headless Chrome on it"""
+        self.snapshot_dir = self.settings.get('profile_snapshot_dir') or os.path.join(
+            tempfile.gettempdir(), f'b2b-headless-profile-{self.port}'
+        )
+        self.chrome_manager.snapshot_profile(self.config.get('chrome_user_data_dir', ''), self.snapshot_dir)
+        self.process = self.chrome_manager.launch_headless(self.config, self.snapshot_dir)
+
+    def stop(self):
+        """Stop headless Chrome (the profile snapshot is kept for the next run)"""
+        if self.process is None:
+            return
+
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except Exception:
+            self.process.kill()
+        self.process = None
+        logger.info("Headless Chrome stopped")
+
+    def _open_order(self, order_id):
+        """Point the worker's BaseLinker tab at an order"""
+        OrderCoordinator.wait_for_prewarm(self.port)
+        extractor = BaseLinkerExtractor(self.port, self.worker_config)
+        try:
+            return extractor.connect_to_chrome() and extractor.open_order(order_id)
+        finally:
+            extractor.close()
+
+    def process_order(self, order_id):
+        """
+        Extract one BaseLinker order and place it at B2B Hendi
+
+        Args:
+            order_id: BaseLinker order id
+
+        Returns:
+            dict: Result with order_id, status ('awaiting_confirmation', 'skipped', 'failed') and details
+        """
+        order_id = str(order_id)
+
+        if self.order_store is not None:
+            if self.order_store.is_processed(order_id):
+                return {"order_id": order_id, "status": "skipped", "reason": "already processed"}
+            stored = self.order_store.get_order(order_id)
+            if stored and stored.get('draft_b2b_number'):
+                return {"order_id": order_id, "status": "skipped", "draft_b2b_number": stored['draft_b2b_number'],
+                        "reason": "checkout awaiting confirmation"}
+
+        if not self._open_order(order_id):
+            return {"order_id": order_id, "status": "failed", "error": "Could not open order in BaseLinker"}
+
+        coordinator = OrderCoordinator(self.port, self.worker_config, order_store=self.order_store)
+        order_data = coordinator.extract_all_order_data()
+
+        if not order_data.get("success"):
+            return {"order_id": order_id, "status": "failed", "error": order_data.get("error")}
+
+        if order_data.get("already_processed"):
+            return {"order_id": order_id, "status": "skipped", "b2b_number": order_data.get("b2b_number"),
+                    "reason": "already processed"}
+
+        extracted_address = order_data.get("address") or {}
+        address = {**extracted_address, "phone": order_data.get("phone") or ''}
+        email = order_data.get("email") or ''
+
+        if not order_data.get("products") or not address.get("company") or not address["phone"] or not email:
+            return {"order_id": order_id, "status": "failed", "error": "Incomplete order data"}
+
+        result = coordinator.complete_order_with_address(
+            order_data["products"],
+            OrderCoordinator.build_address_data(address, email),
+            order_data.get("payment_amount"),
+            order_id=order_data.get("order_id") or order_id
+        )
+
+        if not result.get("success"):
+            return {"order_id": order_id, "status": "failed", "error": result.get("error")}
+
+        # Left on the checkout for the operator; the order store keeps it unprocessed until confirmed
+        return {"order_id": order_id, "status": "awaiting_confirmation",
+                "draft_b2b_number": result.get("draft_b2b_number"), "step_timings": result.get("step_timings")}
+
+    def run(self, order_ids):
+        """
+        Process a queue of orders in one headless Chrome session, up to the first prepared checkout
+
+        Args:
+            order_ids: BaseLinker order ids
+
+        Returns:
+            list: Per-order results; orders after the checkout are 'not_started'
+        """
+        results = []
+        self.start()
+        try:
+            for index, order_id in enumerate(order_ids):
+                try:
+                    result = self.process_order(order_id)
+                except Exception as e:
+                    logger.error(f"Order {order_id} failed: {e}", exc_info=True)
+                    result = {"order_id": str(order_id), "status": "failed", "error": str(e)}
+
+                logger.info(f"Order {order_id}: {result['status']}")
+                results.append(result)
+
+                if result['status'] == 'awaiting_confirmation':
+                    remaining = order_ids[index + 1:]
+                    if remaining:
+                        logger.info(f"Stopping: {len(remaining)} orders wait until the checkout of "
+                                    f"order {order_id} is submitted and confirmed")
+                    results.extend({"order_id": str(pending), "status": "not_started",
+                                    "reason": f"checkout of order {order_id} awaiting confirmation"}
+                                   for pending in remaining)
+                    break
+        finally:
+            self.stop()
+        return results
+
+
+def read_order_ids(args):
+    """Collect order ids from the command line and/or a file (one per line, # comments)"""
+    order_ids = list(args.order_ids)
+    if args.orders_file:
+        with open(args.orders_file, 'r', encoding='utf-8') as f:
+            order_ids.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return order_ids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Process BaseLinker orders in a headless Chrome')
+    parser.add_argument('order_ids', nargs='*', help='BaseLinker order ids')
+    parser.add_argument('--orders-file', help='File with one order id per line')
+    parser.add_argument('--config', default=CONFIG_PATH, help='Path to config.json')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    setup_logging(config)
+
+    order_ids = read_order_ids(args)
+    if not order_ids:
+        parser.error('no order ids given')
+
+    order_store = OrderStore.from_config(config)
+    awaiting = order_store.awaiting_confirmation()
+    if awaiting:
+        # Their checkout still holds the account's cart
+        logger.error(f"Confirm or discard the checkouts of orders "
+                     f"{', '.join(order['order_id'] for order in awaiting)} before the next run")
+        return 1
+
+    pending = order_store.filter_unprocessed(order_ids)
+    logger.info(f"Headless worker: {len(pending)} of {len(order_ids)} orders to process")
+
+    results = HeadlessWorker(config, order_store).run(pending)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    return 0 if all(result['status'] != 'failed' for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
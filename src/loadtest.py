@@ -0,0 +1,485 @@
+"""
+Load Test
+Runs the Flask app against a fake Chrome (DevTools endpoint + WebDriver) and
+simulates several operators polling the UI endpoints while submitting orders,
+then reports latency percentiles per endpoint and server thread saturation
+
+The fake browser finds no page elements, so order submissions go through the
+connect / tab / wait paths of the real extractors and fail after their element
+waits: the load they put on the app matches a slow order, not a completed one.
+
+Usage:
+    python loadtest.py --operators 8 --duration 120
+    python loadtest.py --operators 4 --order-interval 15 --json report.json
+"""
+import argparse
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import requests
+from werkzeug.serving import make_server
+import app as app_module
+from order_store import OrderStore
+from extractors import base_extractor
+from extractors.selector_chain import FIND_FIRST_SCRIPT
+
+SAMPLE_ORDER = {
+    "products": [{"sku": "LOADTEST-1", "quantity": 2}, {"sku": "LOADTEST-2", "quantity": 1}],
+    "address": {
+        "company": "Load Test Sp. z o.o.",
+        "phone": "500100200",
+        "address": "Testowa 1",
+        "city": "Warszawa",
+        "postal_code": "00-001"
+    },
+    "email": "loadtest@example.com",
+    "payment_amount": "123.45"
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class FakeDevTools:
+    """Answers /json and /json/version like a Chrome with a BaseLinker and a B2B Hendi tab"""
+
+    def __init__(self, tabs):
+        self.tabs = tabs
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        devtools = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') == '/json/version':
+                    body = {"Browser": "Chrome/LoadTest", "webSocketDebuggerUrl": ""}
+                elif self.path.rstrip('/') in ('/json', '/json/list'):
+                    body = [{"id": tab_id, "type": "page", **tab} for tab_id, tab in devtools.tabs.items()]
+                else:
+                    self.send_error(404)
+                    return
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        self._driver.execute('switchToWindow', {'handle': handle})
+
+    def new_window(self, type_hint=None):
+        handle = self._driver.execute('newWindow', {'type': type_hint})['value']['handle']
+        self.window(handle)
+
+
+class FakeDriver:
+    """
+    WebDriver stand-in with per-command latency
+
+    Every call goes through execute() so the flight recorder and timeline wrap
+    it like a real driver. Element lookups never match.
+    """
+
+    _handles = itertools.count(1)
+
+    def __init__(self, tabs, command_latency=0.05, service=None, options=None):
+        self.command_latency = command_latency
+        self.tabs = {tab_id: dict(tab) for tab_id, tab in tabs.items()}
+        self.current_window_handle = next(iter(self.tabs))
+        self.switch_to = FakeSwitchTo(self)
+
+    def _tab(self):
+        return self.tabs[self.current_window_handle]
+
+    def execute(self, driver_command, params=None):
+        params = params or {}
+        time.sleep(random.uniform(0.5, 1.5) * self.command_latency)
+
+        if driver_command == 'switchToWindow':
+            self.current_window_handle = params['handle']
+        elif driver_command == 'newWindow':
+            handle = f"loadtest-{next(self._handles)}"
+            self.tabs[handle] = {"title": "New Tab", "url": "about:blank"}
+            return {'value': {'handle': handle, 'type': 'tab'}}
+        elif driver_command == 'closeWindow':
+            self.tabs.pop(self.current_window_handle, None)
+        elif driver_command == 'get':
+            self._tab()['url'] = params['url']
+        elif driver_command in ('executeScript', 'w3cExecuteScript'):
+            if params.get('script') == FIND_FIRST_SCRIPT:
+                return {'value': [None, None, '/']}
+        return {'value': None}
+
+    @property
+    def window_handles(self):
+        self.execute('getWindowHandles')
+        return list(self.tabs)
+
+    @property
+    def current_url(self):
+        self.execute('getCurrentUrl')
+        return self._tab()['url']
+
+    @property
+    def title(self):
+        self.execute('getTitle')
+        return self._tab()['title']
+
+    @property
+    def page_source(self):
+        self.execute('getPageSource')
+        return '<html><body></body></html>'
+
+    def get(self, url):
+        self.execute('get', {'url': url})
+
+    def refresh(self):
+        self.execute('refresh')
+
+    def execute_script(self, script, *args):
+        return self.execute('executeScript', {'script': script, 'args': list(args)})['value']
+
+    def find_elements(self, by, value):
+        self.execute('findElements', {'using': by, 'value': value})
+        return []
+
+    def get_screenshot_as_png(self):
+        self.execute('screenshot')
+        return b''
+
+    def close(self):
+        self.execute('closeWindow')
+
+    def quit(self):
+        pass
+
+
+class InFlightMiddleware:
+    """WSGI middleware counting requests in progress (until their body is fully sent)"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.in_flight = 0
+        self.by_endpoint = Counter()
+        self._lock = threading.Lock()
+
+    def _enter(self, endpoint):
+        with self._lock:
+            self.in_flight += 1
+            self.by_endpoint[endpoint] += 1
+
+    def _exit(self, endpoint):
+        with self._lock:
+            self.in_flight -= 1
+            self.by_endpoint[endpoint] -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return self.in_flight, dict(self.by_endpoint)
+
+    def __call__(self, environ, start_response):
+        endpoint = f"{environ['REQUEST_METHOD']} {environ.get('PATH_INFO', '')}"
+        self._enter(endpoint)
+        try:
+            body = self.wsgi_app(environ, start_response)
+        except Exception:
+            self._exit(endpoint)
+            raise
+        return self._body(body, endpoint)
+
+    def _body(self, body, endpoint):
+        try:
+            yield from body
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            self._exit(endpoint)
+
+
+class SaturationMonitor:
+    """Samples in-flight requests and live threads at a fixed interval"""
+
+    def __init__(self, middleware, interval=0.25):
+        self.middleware = middleware
+        self.interval = interval
+        self.samples = []
+        self.endpoint_peaks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            in_flight, by_endpoint = self.middleware.snapshot()
+            self.samples.append((in_flight, threading.active_count()))
+            for endpoint, count in by_endpoint.items():
+                self.endpoint_peaks[endpoint] = max(self.endpoint_peaks[endpoint], count)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self):
+        if not self.samples:
+            return {}
+        in_flight = [sample[0] for sample in self.samples]
+        threads = [sample[1] for sample in self.samples]
+        return {
+            "samples": len(self.samples),
+            "in_flight_peak": max(in_flight),
+            "in_flight_mean": round(sum(in_flight) / len(in_flight), 2),
+            "threads_peak": max(threads),
+            "threads_mean": round(sum(threads) / len(threads), 2),
+            "endpoint_in_flight_peak": dict(self.endpoint_peaks)
+        }
+
+
+class LatencyStats:
+    """Client-side latency samples per endpoint"""
+
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._errors = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, ok):
+        with self._lock:
+            self._samples[endpoint].append(seconds)
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def report(self):
+        with self._lock:
+            samples = {endpoint: sorted(values) for endpoint, values in self._samples.items()}
+            errors = dict(self._errors)
+
+        report = {}
+        for endpoint, values in sorted(samples.items()):
+            report[endpoint] = {
+                "count": len(values),
+                "errors": errors.get(endpoint, 0),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1)
+            }
+        return report
+
+
+class SimulatedOperator:
+    """One operator's UI: status and log polling timers plus periodic order submissions"""
+
+    def __init__(self, index, base_url, stats, stop, args):
+        self.index = index
+        self.base_url = base_url
+        self.stats = stats
+        self.stop = stop
+        self.args = args
+        self.threads = [
+            threading.Thread(target=self._poll, args=('GET', '/api/status', args.status_interval), daemon=True),
+            threading.Thread(target=self._poll, args=('GET', '/api/logs', args.logs_interval), daemon=True)
+        ]
+        if args.order_interval > 0:
+            self.threads.append(threading.Thread(target=self._submit_orders, daemon=True))
+
+    def _request(self, session, method, path, payload=None):
+        start = time.monotonic()
+        ok = False
+        try:
+            response = session.request(method, self.base_url + path, json=payload, timeout=self.args.request_timeout)
+            # Read streamed bodies to the end so the latency covers the whole response
+            response.content
+            ok = response.status_code < 500
+            return response
+        except requests.exceptions.RequestException:
+            return None
+        finally:
+            self.stats.add(f"{method} {path}", time.monotonic() - start, ok)
+
+    def _poll(self, method, path, interval):
+        """Like the UI's setInterval: fire every interval, or right away if the last call overran"""
+        session = requests.Session()
+        # Operators do not open the UI in the same instant
+        next_at = time.monotonic() + random.uniform(0, interval)
+        while not self.stop.wait(max(0, next_at - time.monotonic())):
+            next_at += interval
+            self._request(session, method, path)
+
+    def _submit_orders(self):
+        session = requests.Session()
+        order_ids = itertools.count(self.index * 100000 + 1)
+        delay = random.uniform(0, self.args.order_interval)
+        while not self.stop.wait(delay):
+            payload = {**SAMPLE_ORDER, "order_id": str(next(order_ids)), "deadline": self.args.order_deadline}
+            self._request(session, 'POST', '/api/extract-order', {"deadline": self.args.order_deadline})
+            self._request(session, 'POST', '/api/complete-order', payload)
+            delay = self.args.order_interval * random.uniform(0.8, 1.2)
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def join(self, timeout):
+        for thread in self.threads:
+            thread.join(timeout)
+
+
+def build_tabs(config):
+    """Tabs of the fake Chrome, matching the configured keywords"""
+    order_url = config.get('baselinker_order_url', 'https://panel-g.baselinker.com/orders.php#order:{order_id}')
+    return {
+        "baselinker": {"title": "BaseLinker - Zamówienie", "url": order_url.format(order_id='1000001')},
+        "b2b": {"title": "B2B Hendi - Import", "url": config.get('b2b_hendi_url', 'https://b2b.hendi.com/')}
+    }
+
+
+def install_fake_browser(devtools, tabs, args, workdir):
+    """Point the app at the fake Chrome and keep its stores out of the real data directory"""
+    overrides = {
+        "chrome_debug_port": devtools.port,
+        "options": {"auto_detect_chrome_host": False},
+        "timing": {"default_timeout": args.driver_wait, "element_wait_timeout": args.driver_wait},
+        "order_store": {"path": os.path.join(workdir, 'orders.db')},
+        "flight_recorder": {"path": os.path.join(workdir, 'flight_records')},
+        # Fake drivers have no chromedriver process, so there is nothing to reap
+        "driver_lifecycle": {"reap_orphans": False},
+        # The fake browser is patched into this process, so jobs must run here
+        "driver_broker": {"enabled": False}
+    }
+    # Wrap rather than replace, so every request still pays for reading config.json
+    original_load_config = app_module.load_config
+    app_module.load_config = lambda: app_module.merge_config(original_load_config(), overrides)
+    app_module.order_store = OrderStore.from_config(app_module.load_config())
+    app_module.browser_jobs.order_store = app_module.order_store
+
+    base_extractor.webdriver.Chrome = lambda service=None, options=None: FakeDriver(tabs, args.command_latency)
+    base_extractor.BaseExtractor._get_chromedriver_path = lambda self: 'chromedriver'
+
+
+def print_report(report):
+    print(f"\n{report['operators']} operators, {report['duration']}s\n")
+    print(f"{'endpoint':<28}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, row in report['latency'].items():
+        print(f"{endpoint:<28}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+
+    saturation = report['saturation']
+    if saturation:
+        print(f"\nIn-flight requests: peak {saturation['in_flight_peak']}, mean {saturation['in_flight_mean']}")
+        print(f"Threads: peak {saturation['threads_peak']}, mean {saturation['threads_mean']}")
+        for endpoint, peak in sorted(saturation['endpoint_in_flight_peak'].items()):
+            print(f"  {endpoint:<40} peak in flight {peak}")
+
+
+def run(args):
+    """
+    Run one load test
+
+    Returns:
+        dict: Report with per-endpoint latency percentiles and saturation samples
+    """
+    workdir = tempfile.mkdtemp(prefix='b2b-loadtest-')
+    tabs = build_tabs(app_module.load_config())
+    devtools = FakeDevTools(tabs)
+    devtools.start()
+    install_fake_browser(devtools, tabs, args, workdir)
+
+    middleware = InFlightMiddleware(app_module.app.wsgi_app)
+    app_module.app.wsgi_app = middleware
+    server = make_server('127.0.0.1', args.port, app_module.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stats = LatencyStats()
+    monitor = SaturationMonitor(middleware)
+    stop = threading.Event()
+    operators = [SimulatedOperator(i, base_url, stats, stop, args) for i in range(args.operators)]
+
+    monitor.start()
+    for operator in operators:
+        operator.start()
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for operator in operators:
+            operator.join(args.request_timeout)
+        monitor.stop()
+        server.shutdown()
+        devtools.stop()
+
+    return {
+        "operators": args.operators,
+        "duration": args.duration,
+        "workdir": workdir,
+        "latency": stats.report(),
+        "saturation": monitor.report()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the API with simulated operators and a fake Chrome')
+    parser.add_argument('--operators', type=int, default=5, help='Concurrent operators (UI clients)')
+    parser.add_argument('--duration', type=float, default=60, help='Test length in seconds')
+    parser.add_argument('--status-interval', type=float, default=5, help='Seconds between /api/status polls')
+    parser.add_argument('--logs-interval', type=float, default=2, help='Seconds between /api/logs polls')
+    parser.add_argument('--order-interval', type=float, default=30,
+                        help='Seconds between order submissions per operator (0 disables orders)')
+    parser.add_argument('--order-deadline', type=float, default=30, help='Time budget sent with each order call')
+    parser.add_argument('--command-latency', type=float, default=0.05, help='Mean fake WebDriver command latency')
+    parser.add_argument('--driver-wait', type=float, default=2, help='Element wait timeout used by the extractors')
+    parser.add_argument('--request-timeout', type=float, default=120, help='Client request timeout')
+    parser.add_argument('--port', type=int, default=0, help='Port for the app under test (0 picks a free one)')
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Logging Setup
+Queue-backed logging with a background writer, rotation and gzip archives
+"""
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import sys
+
+DETAIL_LOGGER_NAME = 'extractors.detail'
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Level used to switch per-product/per-field lines off entirely
+OFF_LEVEL = logging.CRITICAL + 10
+
+
+def _gzip_namer(name):
+    """Name rotated segments with a .gz suffix"""
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source, dest):
+    """Compress the rotated segment and remove the plain file"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def get_log_file(config):
+    """Get path of the active log file"""
+    return config.get('logging', {}).get('file', 'app.log')
+
+
+def _parse_level(value, default=logging.INFO):
+    """Convert level name from config to a logging level"""
+    if not value:
+        return default
+    name = str(value).upper()
+    if name == 'OFF':
+        return OFF_LEVEL
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else default
+
+
+def create_file_handler(config):
+    """
+    Create the rotating file handler described by config["logging"]
+
+    Rotates by time when 'rotate_when' is set (e.g. 'midnight'), otherwise by
+    size. Rotated segments are gzipped when 'compress' is enabled.
+
+    Args:
+        config: Full application config
+
+    Returns:
+        logging.Handler: Configured file handler
+    """
+    log_config = config.get('logging', {})
+    log_file = get_log_file(config)
+    backup_count = int(log_config.get('backup_count', 5))
+    rotate_when = log_config.get('rotate_when', '')
+
+    if rotate_when:
+        handler = TimedRotatingFileHandler(
+            log_file,
+            when=rotate_when,
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+    else:
+        handler = RotatingFileHandler(
+            log_file,
+            maxBytes=int(log_config.get('max_bytes', 5 * 1024 * 1024)),
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+
+    if log_config.get('compress', True):
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+
+    return handler
+
+
+def apply_log_levels(config):
+    """
+    Apply log levels from config to the running loggers
+
+    Args:
+        config: Full application config
+    """
+    root_level = _parse_level(config.get('options', {}).get('log_level'))
+    detail_level = _parse_level(config.get('logging', {}).get('detail_level'), root_level)
+
+    logging.getLogger().setLevel(root_level)
+    logging.getLogger(DETAIL_LOGGER_NAME).setLevel(detail_level)
+
+
+def setup_logging(config):
+    """
+    Route all logging through a queue drained by a background writer thread
+
+    Request threads only enqueue records; formatting and file I/O happen on
+    the listener thread.
+
+    Args:
+        config: Full application config
+
+    Returns:
+        QueueListener: Started listener (stopped automatically at exit)
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    file_handler = create_file_handler(config)
+    file_handler.setFormatter(formatter)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    apply_log_levels(config)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
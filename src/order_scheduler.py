@@ -0,0 +1,388 @@
+"""
+Order Scheduler
+Queues B2B submissions and runs them by priority class (express and paid
+before cash on delivery), round-robin between operators within a class, under
+per-site token-bucket rate limits and concurrency caps
+
+A job that leaves a checkout for the operator to submit holds its sites until
+it is confirmed or discarded: B2B Hendi has one cart per account, so the next
+import would land in the same checkout.
+"""
+from collections import deque, OrderedDict
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLASSES = ['express', 'paid', 'cod']
+
+# Sites each job kind touches
+JOB_SITES = {
+    'complete': ('b2b',),
+    'extract': ('baselinker',)
+}
+
+# Job states that are not finished
+ACTIVE_STATUSES = ('queued', 'running', 'awaiting_confirmation')
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now or time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def take(self, now=None):
+        self._refill(now or time.monotonic())
+        self.tokens -= 1
+
+
+class SiteLimit:
+    """Rate limit and concurrency cap of one site"""
+
+    def __init__(self, settings):
+        self.bucket = TokenBucket(settings.get('rate_per_minute', 6) / 60.0, settings.get('burst', 2))
+        self.max_concurrent = max(1, int(settings.get('max_concurrent', 1)))
+        self.running = 0
+        # Id of the job whose checkout awaits confirmation
+        self.held_by = None
+
+    def wait_time(self, now):
+        """Seconds until a job may start here, None while the concurrency cap is reached or the site is held"""
+        if self.held_by is not None or self.running >= self.max_concurrent:
+            return None
+        return self.bucket.wait_time(now)
+
+
+def classify(order, settings=None):
+    """
+    Priority class of an order
+
+    Args:
+        order: Job parameters; 'priority' overrides, 'express' or a delivery
+               method matching express_keywords marks express, a non-zero
+               payment_amount (as extract_payment_amount reports) marks paid
+        settings: config["order_scheduler"]
+
+    Returns:
+        str: Priority class
+    """
+    settings = settings or {}
+    classes = settings.get('classes', DEFAULT_CLASSES)
+    if order.get('priority') in classes:
+        return order['priority']
+
+    delivery_method = str(order.get('delivery_method') or '').lower()
+    keywords = settings.get('express_keywords', ['express', 'ekspres', 'kurier 24', 'same day'])
+    if order.get('express') or any(keyword in delivery_method for keyword in keywords):
+        return 'express'
+
+    try:
+        paid = float(str(order.get('payment_amount') or 0).replace(',', '.')) > 0
+    except ValueError:
+        paid = False
+    return 'paid' if paid else 'cod'
+
+
+class OrderScheduler:
+    """Priority queue with operator fairness feeding a runner (e.g. OrderCoordinator runs) from worker threads"""
+
+    def __init__(self, settings, runner):
+        """
+        Args:
+            settings: config["order_scheduler"]
+            runner: Callable(job) -> result dict, called on a worker thread
+        """
+        self.settings = settings
+        self.runner = runner
+        self.classes = settings.get('classes', DEFAULT_CLASSES)
+        self.sites = {name: SiteLimit(site) for name, site in settings.get('sites', {
+            'b2b': {'rate_per_minute': 6, 'burst': 2, 'max_concurrent': 1},
+            'baselinker': {'rate_per_minute': 30, 'burst': 5, 'max_concurrent': 1}
+        }).items()}
+        self.promote_after = settings.get('promote_after', 900)
+
+        # class -> operator -> deque of jobs, and the operator rotation per class
+        self._queues = {name: OrderedDict() for name in self.classes}
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._waits = {name: deque(maxlen=200) for name in self.classes}
+        self._condition = threading.Condition()
+        self._workers = []
+        self._stopped = False
+
+    def start(self):
+        """Start the worker threads"""
+        for index in range(max(1, int(self.settings.get('workers', 1)))):
+            worker = threading.Thread(target=self._work, name=f'order-scheduler-{index}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def submit(self, params, operator='default', kind='complete'):
+        """
+        Queue a job
+
+        Args:
+            params: Runner parameters (for 'complete': products, address_data,
+                    payment_amount, order_id; plus optional priority/express/delivery_method)
+            operator: Who submitted it; operators share each class round-robin
+            kind: Job kind, decides which site limits apply (see JOB_SITES)
+
+        Returns:
+            dict: Public view of the queued job
+        """
+        priority = classify(params, self.settings)
+        job = {
+            "id": str(next(self._ids)),
+            "kind": kind,
+            "order_id": params.get('order_id'),
+            "operator": operator or 'default',
+            "priority": priority,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "_queued": time.monotonic(),
+            "_params": params
+        }
+
+        with self._condition:
+            self._queues[priority].setdefault(job['operator'], deque()).append(job)
+            self._jobs[job['id']] = job
+            self._trim_finished()
+            self._condition.notify()
+
+        logger.info(f"Queued job {job['id']} (order {job['order_id']}, {priority}, operator {job['operator']})")
+        return self._public(job)
+
+    def cancel(self, job_id):
+        """Remove a job that has not started; returns False if it is unknown or already running"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != 'queued':
+                return False
+            queue = self._queues[job['priority']].get(job['operator'])
+            if queue is not None and job in queue:
+                queue.remove(job)
+            job['status'] = 'cancelled'
+            job['finished_at'] = time.time()
+            return True
+
+    def job(self, job_id):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job is not None else None
+
+    def wait(self, job_id, timeout=None):
+        """
+        Block until a job has run
+
+        Returns:
+            dict: Public view of the job (still queued or running if the timeout passed), or None if unknown
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._jobs.get(job_id, {}).get('status') not in ('queued', 'running'), timeout
+            )
+            job = self._jobs.get(job_id)
+            return self._public(job) if job is not None else None
+
+    def holder(self, site):
+        """Public view of the job holding a site until its checkout is confirmed, or None"""
+        with self._condition:
+            limit = self.sites.get(site)
+            if limit is None or limit.held_by is None:
+                return None
+            return self._public(self._jobs[limit.held_by])
+
+    def awaiting_job(self, order_id):
+        """Id of the job whose checkout for an order awaits confirmation, or None"""
+        with self._condition:
+            for job in self._jobs.values():
+                if job['status'] == 'awaiting_confirmation' and str(job['order_id']) == str(order_id):
+                    return job['id']
+        return None
+
+    def release(self, job_id, outcome):
+        """
+        Release the sites held by a job once the operator has dealt with its checkout
+
+        Args:
+            job_id: Job awaiting confirmation
+            outcome: 'confirmed' (the order was submitted) or 'discarded'
+
+        Returns:
+            dict: Public view of the job, or None if it is not awaiting confirmation
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != 'awaiting_confirmation':
+                return None
+            for site in self.sites.values():
+                if site.held_by == job_id:
+                    site.held_by = None
+            job['status'] = outcome
+            job['released_at'] = time.time()
+            self._condition.notify_all()
+
+        logger.info(f"Job {job_id} (order {job['order_id']}) {outcome}")
+        return self._public(job)
+
+    def _trim_finished(self):
+        keep = self.settings.get('keep_finished', 200)
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - keep)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _public(job):
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    def _effective_class(self, job, now):
+        """Class index of a job, raised one class per promote_after seconds waited so nothing starves"""
+        index = self.classes.index(job['priority'])
+        if self.promote_after:
+            index -= int((now - job['_queued']) // self.promote_after)
+        return max(0, index)
+
+    def _next_job(self, now):
+        """
+        Pick the next runnable job, or the seconds to wait until one may become runnable
+
+        Returns:
+            tuple: (job, None) or (None, wait seconds or None to wait for a change)
+        """
+        candidates = []
+        for name in self.classes:
+            for operator, queue in self._queues[name].items():
+                if queue:
+                    candidates.append((self._effective_class(queue[0], now), name, operator, queue[0]))
+
+        # Best class first; within it the operator rotation order of the queue dict
+        candidates.sort(key=lambda candidate: candidate[0])
+        shortest_wait = None
+        for _, name, operator, job in candidates:
+            waits = [self.sites[site].wait_time(now) for site in JOB_SITES.get(job['kind'], ()) if site in self.sites]
+            if any(wait is None for wait in waits):
+                continue
+            wait = max(waits, default=0.0)
+            if wait > 0:
+                shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+                continue
+
+            queue = self._queues[name][operator]
+            queue.popleft()
+            # Move this operator to the back of the rotation
+            self._queues[name].move_to_end(operator)
+            if not queue:
+                del self._queues[name][operator]
+            return job, None
+
+        return None, shortest_wait
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+                    job, wait = self._next_job(time.monotonic())
+                    if job is not None:
+                        break
+                    self._condition.wait(wait)
+
+                now = time.monotonic()
+                sites = [self.sites[site] for site in JOB_SITES.get(job['kind'], ()) if site in self.sites]
+                for site in sites:
+                    site.bucket.take(now)
+                    site.running += 1
+                job['status'] = 'running'
+                job['started_at'] = time.time()
+                job['wait_seconds'] = round(now - job['_queued'], 3)
+                self._waits[job['priority']].append(job['wait_seconds'])
+
+            logger.info(f"Running job {job['id']} (order {job['order_id']}) after {job['wait_seconds']}s in queue")
+            try:
+                result = self.runner(job)
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {e}", exc_info=True)
+                result = {"success": False, "error": str(e)}
+
+            with self._condition:
+                for site in sites:
+                    site.running -= 1
+                if result.get('success') and result.get('awaiting_confirmation'):
+                    # Nothing else may use these sites until the checkout is confirmed or discarded
+                    for site in sites:
+                        site.held_by = job['id']
+                    job['status'] = 'awaiting_confirmation'
+                else:
+                    job['status'] = 'completed' if result.get('success') else 'failed'
+                job['finished_at'] = time.time()
+                job['result'] = result
+                self._condition.notify_all()
+
+    def snapshot(self):
+        """
+        Queue state for the API
+
+        Returns:
+            dict: Depth per class and operator, running jobs, wait-time
+                  percentiles per class, oldest queued age and site limits
+        """
+        def percentile(values, fraction):
+            values = sorted(values)
+            return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+        with self._condition:
+            now = time.monotonic()
+            classes = {}
+            for name in self.classes:
+                queued = [job for queue in self._queues[name].values() for job in queue]
+                classes[name] = {
+                    "depth": len(queued),
+                    "by_operator": {operator: len(queue) for operator, queue in self._queues[name].items()},
+                    "oldest_wait": round(max((now - job['_queued'] for job in queued), default=0), 1),
+                    "wait_p50": percentile(self._waits[name], 0.5),
+                    "wait_p95": percentile(self._waits[name], 0.95)
+                }
+            return {
+                "depth": sum(entry["depth"] for entry in classes.values()),
+                "classes": classes,
+                "running": [self._public(job) for job in self._jobs.values() if job['status'] == 'running'],
+                "awaiting_confirmation": [self._public(job) for job in self._jobs.values()
+                                          if job['status'] == 'awaiting_confirmation'],
+                "sites": {
+                    name: {
+                        "running": site.running,
+                        "max_concurrent": site.max_concurrent,
+                        "held_by": site.held_by,
+                        "tokens": round(min(site.bucket.burst, site.bucket.tokens), 2),
+                        "next_token_in": round(site.bucket.wait_time(now), 2)
+                    }
+                    for name, site in self.sites.items()
+                },
+                "recent": [self._public(job) for job in list(self._jobs.values())[-20:]
+                           if job['status'] not in ACTIVE_STATUSES]
+            }
@@ -0,0 +1,287 @@
+"""
+Order Store
+Embedded SQLite history of extractions and completions, linking BaseLinker orders to B2B orders
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'orders.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    b2b_number TEXT,
+    draft_b2b_number TEXT,
+    products TEXT,
+    address_hash TEXT,
+    outcome TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_b2b_number ON orders (b2b_number);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id TEXT,
+    kind TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    b2b_number TEXT,
+    step_timings TEXT,
+    error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_order_id ON runs (order_id);
+"""
+
+# Columns added after the first release, created on stores opened by an older version
+MIGRATIONS = {
+    'orders': {'draft_b2b_number': 'TEXT'}
+}
+
+
+def hash_address(address):
+    """
+    Stable hash of an address, so repeated deliveries can be matched without storing it
+
+    Args:
+        address: Dict with address fields
+
+    Returns:
+        str: SHA-256 hex digest, or None if no address
+    """
+    if not address:
+        return None
+    normalized = {key: str(value).strip().lower() for key, value in address.items() if value}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class OrderStore:
+    """SQLite order history with an in-memory set of processed orders for O(1) skips"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+        # BaseLinker order ids that already have a B2B number
+        self._processed = {
+            row['order_id']
+            for row in self._conn.execute('SELECT order_id FROM orders WHERE b2b_number IS NOT NULL')
+        }
+        logger.info(f"Order store opened: {path} ({len(self._processed)} processed orders)")
+
+    def _migrate(self):
+        """Add columns missing from a store created by an older version"""
+        for table, columns in MIGRATIONS.items():
+            existing = {row['name'] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+            for column, column_type in columns.items():
+                if column not in existing:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+
+    @classmethod
+    def from_config(cls, config):
+        """Create the store at the configured path"""
+        path = (config or {}).get('order_store', {}).get('path') or DEFAULT_DB_PATH
+        return cls(path)
+
+    def is_processed(self, order_id):
+        """Check whether a BaseLinker order already has a B2B order (O(1), no query)"""
+        return order_id is not None and str(order_id) in self._processed
+
+    def filter_unprocessed(self, order_ids):
+        """
+        Drop orders that already have a B2B number
+
+        Args:
+            order_ids: Iterable of BaseLinker order ids
+
+        Returns:
+            list: Order ids still to process, in the original order
+        """
+        return [order_id for order_id in order_ids if not self.is_processed(order_id)]
+
+    def record_run(self, order_id, kind, outcome, products=None, address=None,
+                   b2b_number=None, step_timings=None, error=None, draft_b2b_number=None):
+        """
+        Record an extraction or completion and update the order it belongs to
+
+        Args:
+            order_id: BaseLinker order id (may be None if it could not be read)
+            kind: 'extract', 'complete' or 'consolidated'
+            outcome: 'success', 'failed' or 'awaiting_confirmation'
+            products: List of products (optional)
+            address: Address dict, stored only as a hash (optional)
+            b2b_number: Confirmed B2B order number; marks the order processed (optional)
+            step_timings: Dict of step name -> seconds (optional)
+            error: Error message (optional)
+            draft_b2b_number: Number shown on a checkout that has not been
+                              submitted yet; does not mark the order processed (optional)
+        """
+        now = time.time()
+        order_id = str(order_id) if order_id is not None else None
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    'INSERT INTO runs (order_id, kind, outcome, b2b_number, step_timings, error, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (order_id, kind, outcome, b2b_number,
+                     json.dumps(step_timings) if step_timings else None, error, now)
+                )
+
+                if order_id is not None:
+                    self._conn.execute(
+                        'INSERT INTO orders (order_id, b2b_number, draft_b2b_number, products, address_hash, '
+                        'outcome, created_at, updated_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT (order_id) DO UPDATE SET '
+                        'b2b_number = COALESCE(excluded.b2b_number, orders.b2b_number), '
+                        'draft_b2b_number = COALESCE(excluded.draft_b2b_number, orders.draft_b2b_number), '
+                        'products = COALESCE(excluded.products, orders.products), '
+                        'address_hash = COALESCE(excluded.address_hash, orders.address_hash), '
+                        'outcome = excluded.outcome, '
+                        'updated_at = excluded.updated_at',
+                        (order_id, b2b_number, draft_b2b_number, json.dumps(products) if products else None,
+                         hash_address(address), f"{kind}:{outcome}", now, now)
+                    )
+
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to record {kind} run for order {order_id}: {e}")
+                return
+
+            if order_id is not None and b2b_number:
+                self._processed.add(order_id)
+
+    def confirm(self, order_id, b2b_number=None):
+        """
+        Mark an order as placed once the operator has submitted its B2B checkout
+
+        Args:
+            order_id: BaseLinker order id
+            b2b_number: B2B order number (default: the draft number recorded at checkout)
+
+        Returns:
+            str: The confirmed B2B number, or None if the order is unknown or has no number
+        """
+        order_id = str(order_id)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT draft_b2b_number FROM orders WHERE order_id = ?', (order_id,)
+            ).fetchone()
+            b2b_number = b2b_number or (row['draft_b2b_number'] if row else None)
+            if row is None or not b2b_number:
+                return None
+
+            try:
+                self._conn.execute(
+                    'UPDATE orders SET b2b_number = ?, draft_b2b_number = NULL, outcome = ?, updated_at = ? '
+                    'WHERE order_id = ?',
+                    (str(b2b_number), 'complete:confirmed', now, order_id)
+                )
+                self._conn.execute(
+                    'INSERT INTO runs (order_id, kind, outcome, b2b_number, created_at) VALUES (?, ?, ?, ?, ?)',
+                    (order_id, 'confirm', 'success', str(b2b_number), now)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to confirm order {order_id}: {e}")
+                return None
+
+            self._processed.add(order_id)
+
+        logger.info(f"Order {order_id} confirmed as B2B order {b2b_number}")
+        return str(b2b_number)
+
+    def discard(self, order_id):
+        """
+        Forget the draft checkout of an order the operator abandoned
+
+        Returns:
+            bool: False if the order is unknown
+        """
+        order_id = str(order_id)
+        now = time.time()
+
+        with self._lock:
+            try:
+                cursor = self._conn.execute(
+                    'UPDATE orders SET draft_b2b_number = NULL, outcome = ?, updated_at = ? WHERE order_id = ?',
+                    ('complete:discarded', now, order_id)
+                )
+                if cursor.rowcount:
+                    self._conn.execute(
+                        'INSERT INTO runs (order_id, kind, outcome, created_at) VALUES (?, ?, ?, ?)',
+                        (order_id, 'confirm', 'discarded', now)
+                    )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to discard order {order_id}: {e}")
+                return False
+        return bool(cursor.rowcount)
+
+    def _order_from_row(self, row):
+        """Convert an orders row into a dict"""
+        order = dict(row)
+        order['products'] = json.loads(order['products']) if order['products'] else []
+        return order
+
+    def get_order(self, order_id):
+        """
+        Get an order with its run history
+
+        Returns:
+            dict: Order with 'runs', or None if unknown
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM orders WHERE order_id = ?', (str(order_id),)).fetchone()
+            if row is None:
+                return None
+            runs = self._conn.execute(
+                'SELECT * FROM runs WHERE order_id = ? ORDER BY created_at', (str(order_id),)
+            ).fetchall()
+
+        order = self._order_from_row(row)
+        order['runs'] = [
+            {**dict(run), 'step_timings': json.loads(run['step_timings']) if run['step_timings'] else {}}
+            for run in runs
+        ]
+        return order
+
+    def find_by_b2b_number(self, b2b_number):
+        """Get the order linked to a B2B order number, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM orders WHERE b2b_number = ?', (str(b2b_number),)).fetchone()
+        return self._order_from_row(row) if row else None
+
+    def awaiting_confirmation(self):
+        """Get orders whose checkout was prepared but not yet confirmed or discarded"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM orders WHERE draft_b2b_number IS NOT NULL ORDER BY updated_at'
+            ).fetchall()
+        return [self._order_from_row(row) for row in rows]
+
+    def recent_orders(self, limit=50):
+        """Get most recently updated orders"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM orders ORDER BY updated_at DESC LIMIT ?', (int(limit),)
+            ).fetchall()
+        return [self._order_from_row(row) for row in rows]
@@ -0,0 +1,208 @@
+"""
+Request Profiler
+Opt-in sampling profiler for single API requests: samples the request
+thread's stack, splits wall-clock time into Python, WebDriver/HTTP I/O and
+sleeps, and keeps the profiles on disk for download and comparison
+"""
+from collections import Counter
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'profiles')
+
+# Frames that mark a sample as waiting on the browser or the network
+IO_MODULES = ('selenium', 'urllib3', 'requests', 'http/client', 'http\\client', 'socket', 'ssl',
+              'multiprocessing/connection', 'multiprocessing\\connection')
+
+# Functions that only sleep (deadline and settle waits end in time.sleep)
+SLEEP_FUNCTIONS = {('deadline.py', 'sleep'), ('support/wait.py', 'until'), ('support\\wait.py', 'until')}
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def classify_stack(frames):
+    """
+    Category of one sample
+
+    Args:
+        frames: Frames from the outermost to the innermost
+
+    Returns:
+        str: 'sleep', 'io' or 'python'
+    """
+    for frame in reversed(frames):
+        filename = frame.f_code.co_filename.replace('\\', '/')
+        if any(filename.endswith(suffix) and frame.f_code.co_name == name for suffix, name in SLEEP_FUNCTIONS):
+            return 'sleep'
+        if any(f"/{module}" in filename for module in IO_MODULES):
+            return 'io'
+    return 'python'
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval from a background thread"""
+
+    def __init__(self, thread_id, interval=0.005, max_depth=60):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.categories = Counter()
+        self.samples = 0
+        self.started = None
+        self.cpu_started = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                frames.append(frame)
+                frame = frame.f_back
+            frames.reverse()
+
+            self.stacks[';'.join(_frame_label(item) for item in frames)] += 1
+            self.categories[classify_stack(frames)] += 1
+            self.samples += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop sampling; call from the profiled thread so its CPU time is measured
+
+        Returns:
+            dict: Wall and CPU seconds, samples per category and folded stacks
+        """
+        wall = time.perf_counter() - self.started
+        cpu = time.thread_time() - self.cpu_started
+        self._stop.set()
+        self._thread.join()
+
+        return {
+            'wall_seconds': round(wall, 4),
+            'cpu_seconds': round(cpu, 4),
+            # Waiting on the browser, network, locks or sleeps
+            'off_cpu_seconds': round(max(0.0, wall - cpu), 4),
+            'interval': self.interval,
+            'samples': self.samples,
+            # Share of wall time, estimated from the samples
+            'categories': {name: round(count / self.samples, 3) for name, count in self.categories.items()}
+            if self.samples else {},
+            'top_stacks': [{'stack': stack, 'samples': count} for stack, count in self.stacks.most_common(20)],
+            'folded': [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        }
+
+
+class ProfileStore:
+    """Directory of request profiles, keeping the newest max_files"""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path=DEFAULT_PROFILES_PATH, max_files=100):
+        self.path = path
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_settings(cls, settings):
+        """Get the shared store for the configured path"""
+        path = settings.get('path') or DEFAULT_PROFILES_PATH
+        max_files = int(settings.get('max_files', 100))
+
+        with cls._instances_lock:
+            store = cls._instances.get(path)
+            if store is None:
+                store = cls(path, max_files)
+                cls._instances[path] = store
+            else:
+                store.max_files = max_files
+        return store
+
+    def new_name(self, endpoint):
+        """File name for a profile of endpoint, known before the profile is written"""
+        safe_endpoint = re.sub(r'[^A-Za-z0-9_-]+', '_', endpoint.strip('/'))[:40] or 'root'
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{safe_endpoint}.json"
+
+    def save(self, name, profile):
+        """Write one profile and drop the oldest beyond max_files"""
+        with self._lock:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                with open(os.path.join(self.path, name), 'w', encoding='utf-8') as f:
+                    json.dump(profile, f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                logger.error(f"Failed to write profile {name}: {e}")
+                return None
+
+            names = sorted(entry for entry in os.listdir(self.path) if entry.endswith('.json'))
+            for old in names[:max(0, len(names) - self.max_files)]:
+                os.remove(os.path.join(self.path, old))
+
+        logger.info(f"Request profile saved: {name} ({profile['wall_seconds']}s wall)")
+        return name
+
+    def list(self):
+        """Summaries of the stored profiles, newest first"""
+        if not os.path.isdir(self.path):
+            return []
+
+        profiles = []
+        for name in sorted(os.listdir(self.path), reverse=True):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.path, name), 'r', encoding='utf-8') as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profiles.append({
+                'name': name,
+                **{key: profile.get(key) for key in ('method', 'endpoint', 'status', 'started_at', 'wall_seconds',
+                                                      'cpu_seconds', 'off_cpu_seconds', 'samples', 'categories')}
+            })
+        return profiles
+
+    def file_path(self, name):
+        """Resolve a stored profile, or None if it does not exist"""
+        if os.path.basename(name) != name or name.startswith('.') or not name.endswith('.json'):
+            return None
+        path = os.path.join(self.path, name)
+        return path if os.path.isfile(path) else None
+
+
+def wants_profile(settings, requested):
+    """
+    Whether to profile a request
+
+    Args:
+        settings: config["profiling"]
+        requested: The request asked for a profile (header or query parameter)
+
+    Returns:
+        bool: True if profiling is enabled, requested and picked by the sample rate
+    """
+    if not requested or not settings.get('enabled', False):
+        return False
+    return random.random() < float(settings.get('sample_rate', 1.0))
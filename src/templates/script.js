@@ -1,5 +1,9 @@
 let statusInterval;
 let logsInterval;
+let checkoutInterval;
+let largeOrderThreshold = 50;
+let currentOrderId = null;
+let pendingCheckout = null;
 
 // Fetch and display backend logs
 async function updateLogs() {
@@ -33,6 +37,16 @@ async function updateLogs() {
     }
 }
 
+// Selector chains: config lists are shown as "first | fallback" and split back on save
+function selectorText(value) {
+    return Array.isArray(value) ? value.join(' | ') : (value || '');
+}
+
+function selectorValue(id) {
+    const parts = document.getElementById(id).value.split(' | ').map(s => s.trim()).filter(s => s);
+    return parts.length > 1 ? parts : (parts[0] || '');
+}
+
 // Load configuration
 async function loadConfig() {
     try {
@@ -50,19 +64,19 @@ async function loadConfig() {
 
         // BaseLinker selectors
         const blSel = config.baselinker_selectors || {};
-        document.getElementById('bl-products-container').value = blSel.products_container || '';
-        document.getElementById('bl-total-price').value = blSel.total_price || '';
-        document.getElementById('bl-paid-amount').value = blSel.paid_amount || '';
-        document.getElementById('bl-phone').value = blSel.phone || '';
-        document.getElementById('bl-email').value = blSel.email || '';
-        document.getElementById('bl-b2b-field').value = blSel.b2b_number_field || '';
+        document.getElementById('bl-products-container').value = selectorText(blSel.products_container);
+        document.getElementById('bl-total-price').value = selectorText(blSel.total_price);
+        document.getElementById('bl-paid-amount').value = selectorText(blSel.paid_amount);
+        document.getElementById('bl-phone').value = selectorText(blSel.phone);
+        document.getElementById('bl-email').value = selectorText(blSel.email);
+        document.getElementById('bl-b2b-field').value = selectorText(blSel.b2b_number_field);
         
         const blAddr = blSel.address || {};
-        document.getElementById('bl-addr-fullname').value = blAddr.fullname || '';
-        document.getElementById('bl-addr-company').value = blAddr.company || '';
-        document.getElementById('bl-addr-street').value = blAddr.street || '';
-        document.getElementById('bl-addr-city').value = blAddr.city || '';
-        document.getElementById('bl-addr-postcode').value = blAddr.postcode || '';
+        document.getElementById('bl-addr-fullname').value = selectorText(blAddr.fullname);
+        document.getElementById('bl-addr-company').value = selectorText(blAddr.company);
+        document.getElementById('bl-addr-street').value = selectorText(blAddr.street);
+        document.getElementById('bl-addr-city').value = selectorText(blAddr.city);
+        document.getElementById('bl-addr-postcode').value = selectorText(blAddr.postcode);
 
         // BaseLinker regex
         const blRegex = config.regex_patterns?.baselinker || {};
@@ -72,13 +86,13 @@ async function loadConfig() {
 
         // B2B selectors
         const b2bSel = config.b2b_selectors || {};
-        document.getElementById('b2b-order-container').value = b2bSel.order_settings_container || '';
-        document.getElementById('b2b-import-btn').value = b2bSel.import_button || '';
-        document.getElementById('b2b-import-modal').value = b2bSel.import_modal || '';
-        document.getElementById('b2b-file-input').value = b2bSel.file_input || '';
-        document.getElementById('b2b-continue-btn').value = b2bSel.continue_button || '';
-        document.getElementById('b2b-add-cart-btn').value = b2bSel.add_to_cart_button || '';
-        document.getElementById('b2b-checkout-btn').value = b2bSel.checkout_button || '';
+        document.getElementById('b2b-order-container').value = selectorText(b2bSel.order_settings_container);
+        document.getElementById('b2b-import-btn').value = selectorText(b2bSel.import_button);
+        document.getElementById('b2b-import-modal').value = selectorText(b2bSel.import_modal);
+        document.getElementById('b2b-file-input').value = selectorText(b2bSel.file_input);
+        document.getElementById('b2b-continue-btn').value = selectorText(b2bSel.continue_button);
+        document.getElementById('b2b-add-cart-btn').value = selectorText(b2bSel.add_to_cart_button);
+        document.getElementById('b2b-checkout-btn').value = selectorText(b2bSel.checkout_button);
 
         // B2B payment
         const paymentMethods = config.payment_methods || {};
@@ -107,6 +121,13 @@ async function loadConfig() {
         document.getElementById('timing-form').value = timing.form_submit_delay || 2;
         document.getElementById('timing-payment').value = timing.payment_section_delay || 2;
 
+        // Self-tuning profile
+        const tuning = config.timing_profile || {};
+        document.getElementById('tuning-enabled').checked = tuning.enabled !== false;
+        document.getElementById('tuning-min-delay').value = tuning.min_delay ?? 0.3;
+        document.getElementById('tuning-max-delay').value = tuning.max_delay ?? 5;
+        loadTimingProfile();
+
         // Data processing
         const dataProc = config.data_processing || {};
         document.getElementById('proc-sku-prefix').value = dataProc.remove_sku_prefix || '';
@@ -114,12 +135,19 @@ async function loadConfig() {
         document.getElementById('proc-building').value = dataProc.default_building_number || '';
         document.getElementById('proc-skip-b2b').value = (dataProc.skip_b2b_number_values || []).join(', ');
 
+        // SKU catalog
+        const catalog = config.sku_catalog || {};
+        document.getElementById('catalog-enabled').checked = catalog.enabled === true;
+        document.getElementById('catalog-path').value = catalog.path || '';
+        document.getElementById('catalog-sku-column').value = catalog.sku_column || 'SKU';
+
         // Advanced options
         const options = config.options || {};
         document.getElementById('opt-auto-detect').checked = options.auto_detect_chrome_host !== false;
         document.getElementById('opt-use-js').checked = options.use_javascript_for_form_filling !== false;
         document.getElementById('opt-preserve-polish').checked = options.preserve_polish_characters !== false;
         document.getElementById('log-level').value = options.log_level || 'INFO';
+        document.getElementById('log-detail-level').value = config.logging?.detail_level || 'INFO';
 
         // Helper service
         const helper = config.helper_service || {};
@@ -131,6 +159,37 @@ async function loadConfig() {
     }
 }
 
+// Load learned step timings
+async function loadTimingProfile() {
+    try {
+        const response = await fetch('/api/timing-profile');
+        const profile = await response.json();
+        const tbody = document.getElementById('tuning-tbody');
+        tbody.innerHTML = '';
+
+        Object.entries(profile.steps || {}).forEach(([step, entry]) => {
+            const row = tbody.insertRow();
+            row.innerHTML = `
+                <td>${step}</td>
+                <td>${entry.count}</td>
+                <td>${entry.p95.toFixed(2)}</td>
+                <td>${entry.delay !== null ? entry.delay.toFixed(2) : '-'}</td>
+                <td>${entry.default ?? '-'}</td>
+            `;
+        });
+    } catch (error) {
+        console.error('Failed to load timing profile:', error);
+    }
+}
+
+// Reset learned step timings
+document.getElementById('reset-tuning-btn').addEventListener('click', async () => {
+    if (confirm('Forget all learned step timings?')) {
+        await fetch('/api/timing-profile', { method: 'DELETE' });
+        loadTimingProfile();
+    }
+});
+
 // Save configuration
 document.getElementById('save-config-btn').addEventListener('click', async () => {
     const config = {
@@ -145,18 +204,18 @@ document.getElementById('save-config-btn').addEventListener('click', async () =>
 
         // BaseLinker selectors
         baselinker_selectors: {
-            products_container: document.getElementById('bl-products-container').value,
-            total_price: document.getElementById('bl-total-price').value,
-            paid_amount: document.getElementById('bl-paid-amount').value,
-            phone: document.getElementById('bl-phone').value,
-            email: document.getElementById('bl-email').value,
-            b2b_number_field: document.getElementById('bl-b2b-field').value,
+            products_container: selectorValue('bl-products-container'),
+            total_price: selectorValue('bl-total-price'),
+            paid_amount: selectorValue('bl-paid-amount'),
+            phone: selectorValue('bl-phone'),
+            email: selectorValue('bl-email'),
+            b2b_number_field: selectorValue('bl-b2b-field'),
             address: {
-                fullname: document.getElementById('bl-addr-fullname').value,
-                company: document.getElementById('bl-addr-company').value,
-                street: document.getElementById('bl-addr-street').value,
-                city: document.getElementById('bl-addr-city').value,
-                postcode: document.getElementById('bl-addr-postcode').value
+                fullname: selectorValue('bl-addr-fullname'),
+                company: selectorValue('bl-addr-company'),
+                street: selectorValue('bl-addr-street'),
+                city: selectorValue('bl-addr-city'),
+                postcode: selectorValue('bl-addr-postcode')
             }
         },
 
@@ -174,13 +233,13 @@ document.getElementById('save-config-btn').addEventListener('click', async () =>
 
         // B2B selectors
         b2b_selectors: {
-            order_settings_container: document.getElementById('b2b-order-container').value,
-            import_button: document.getElementById('b2b-import-btn').value,
-            import_modal: document.getElementById('b2b-import-modal').value,
-            file_input: document.getElementById('b2b-file-input').value,
-            continue_button: document.getElementById('b2b-continue-btn').value,
-            add_to_cart_button: document.getElementById('b2b-add-cart-btn').value,
-            checkout_button: document.getElementById('b2b-checkout-btn').value,
+            order_settings_container: selectorValue('b2b-order-container'),
+            import_button: selectorValue('b2b-import-btn'),
+            import_modal: selectorValue('b2b-import-modal'),
+            file_input: selectorValue('b2b-file-input'),
+            continue_button: selectorValue('b2b-continue-btn'),
+            add_to_cart_button: selectorValue('b2b-add-cart-btn'),
+            checkout_button: selectorValue('b2b-checkout-btn'),
             new_address_checkbox: 'new_delivery_address',
             address_modal: '.jsAddAddressModal',
             save_address_button: 'button[type="submit"][form="user-address-form"]',
@@ -229,6 +288,13 @@ document.getElementById('save-config-btn').addEventListener('click', async () =>
             payment_section_delay: parseFloat(document.getElementById('timing-payment').value)
         },
 
+        // Self-tuning profile
+        timing_profile: {
+            enabled: document.getElementById('tuning-enabled').checked,
+            min_delay: parseFloat(document.getElementById('tuning-min-delay').value),
+            max_delay: parseFloat(document.getElementById('tuning-max-delay').value)
+        },
+
         // Data processing
         data_processing: {
             remove_sku_prefix: document.getElementById('proc-sku-prefix').value,
@@ -237,12 +303,24 @@ document.getElementById('save-config-btn').addEventListener('click', async () =>
             skip_b2b_number_values: document.getElementById('proc-skip-b2b').value.split(',').map(s => s.trim()).filter(s => s)
         },
 
+        // SKU catalog
+        sku_catalog: {
+            enabled: document.getElementById('catalog-enabled').checked,
+            path: document.getElementById('catalog-path').value,
+            sku_column: document.getElementById('catalog-sku-column').value
+        },
+
         // Helper service
         helper_service: {
             default_url: document.getElementById('helper-default-url').value,
             docker_url: document.getElementById('helper-docker-url').value
         },
 
+        // Logging
+        logging: {
+            detail_level: document.getElementById('log-detail-level').value
+        },
+
         // Options
         options: {
             auto_detect_chrome_host: document.getElementById('opt-auto-detect').checked,
@@ -329,7 +407,7 @@ document.getElementById('launch-chrome-btn').addEventListener('click', async ()
         const result = await response.json();
 
         if (result.success) {
-            setTimeout(updateStatus, 2000);
+            updateStatus();
         }
     } catch (error) {
         console.error('Failed to launch Chrome:', error);
@@ -363,6 +441,7 @@ document.getElementById('extract-order-btn').addEventListener('click', async ()
             method: 'POST'
         });
         const result = await response.json();
+        loadTimeline(result.timeline_id);
 
         if (result.success) {
             displayOrderData(result);
@@ -380,6 +459,7 @@ document.getElementById('extract-and-import-btn').addEventListener('click', asyn
             method: 'POST'
         });
         const extractResult = await extractResponse.json();
+        loadTimeline(extractResult.timeline_id);
 
         if (!extractResult.success) {
             return;
@@ -396,19 +476,21 @@ document.getElementById('extract-and-import-btn').addEventListener('click', asyn
         const email = extractResult.email || '';
         const payment_amount = extractResult.payment_amount || '0';
 
+        if (extractResult.already_processed &&
+            !confirm(`This order already has B2B order ${extractResult.b2b_number || ''}. Import again?`)) {
+            return;
+        }
+
         if (products.length === 0 || !address.company || !address.phone || !email) {
             return;
         }
 
-        await fetch('/api/complete-order', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({
-                products: products,
-                address: address,
-                email: email,
-                payment_amount: payment_amount
-            })
+        await completeOrder({
+            products: products,
+            address: address,
+            email: email,
+            payment_amount: payment_amount,
+            order_id: extractResult.order_id
         });
 
     } catch (error) {
@@ -416,14 +498,252 @@ document.getElementById('extract-and-import-btn').addEventListener('click', asyn
     }
 });
 
+// Complete order, switching to chunked import with streamed progress for large orders
+async function completeOrder(payload) {
+    if (payload.products.length <= largeOrderThreshold) {
+        const response = await fetch('/api/complete-order', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(payload)
+        });
+        const result = await response.json();
+        showImportReport(result.import_report);
+        loadTimeline(result.timeline_id);
+        if (result.awaiting_confirmation) {
+            showPendingCheckout({id: result.job_id, order_id: payload.order_id, result: result}, '');
+        } else if (!response.ok) {
+            reportRejectedImport(response.status, result);
+        }
+        return;
+    }
+
+    const response = await fetch('/api/large-order/import', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(payload)
+    });
+
+    // Rejections (held checkout, missing products) come back as plain JSON, not a stream
+    if (!response.ok) {
+        reportRejectedImport(response.status, await response.json());
+        return;
+    }
+
+    const progress = document.getElementById('import-progress');
+    const progressBar = document.getElementById('import-progress-bar');
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    document.getElementById('import-report-section').style.display = 'block';
+    progress.style.display = 'flex';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => {
+            const event = JSON.parse(line);
+            if (event.timeline_id) {
+                loadTimeline(event.timeline_id);
+            }
+            if (event.event === 'chunk') {
+                progressBar.style.width = `${Math.round(100 * event.chunk / event.chunks)}%`;
+                progressBar.textContent = `${event.imported}/${event.total}`;
+                if (event.import_report) {
+                    showImportReport(event.import_report);
+                }
+            } else if (event.event === 'error') {
+                progressBar.classList.add('bg-danger');
+            } else if (event.event === 'done' && event.awaiting_confirmation && payload.order_id) {
+                // Chunked imports run outside the queue, so the order itself is confirmed
+                showPendingCheckout({id: null, order_id: payload.order_id,
+                                     result: {draft_b2b_number: event.draft_b2b_number}}, '');
+            }
+        });
+    }
+}
+
+// A 409 names the queue job whose checkout holds B2B Hendi; show it so it can be resolved
+function reportRejectedImport(status, result) {
+    if (status === 409 && result.job) {
+        showPendingCheckout(result.job, result.error);
+    } else if (status === 202 && result.job) {
+        alert(`${result.error} (queue job ${result.job.id})`);
+    } else {
+        alert('Failed to complete order: ' + result.error);
+    }
+}
+
+// Checkout prepared in B2B Hendi, confirmed through its queue job or (without one) its order
+function checkoutUrl(checkout, action) {
+    return checkout.id ? `/api/queue/${checkout.id}/${action}` : `/api/orders/${checkout.order_id}/${action}`;
+}
+
+function showPendingCheckout(job, error) {
+    const draft = job.result?.draft_b2b_number || '';
+    const input = document.getElementById('checkout-b2b-number');
+    if (!pendingCheckout || checkoutUrl(pendingCheckout, '') !== checkoutUrl(job, '')) {
+        input.value = draft;
+    }
+    pendingCheckout = job;
+
+    document.getElementById('checkout-pending-summary').textContent =
+        `Order ${job.order_id ?? '(no order id)'}` + (job.id ? `, queue job ${job.id}` : '') +
+        (draft ? `, draft B2B number ${draft}` : '') +
+        '. Submit the order in B2B Hendi and confirm it, or discard it if it was abandoned.';
+    if (error !== undefined) {
+        document.getElementById('checkout-pending-error').textContent = error;
+    }
+    document.getElementById('checkout-pending-section').style.display = 'block';
+}
+
+function hidePendingCheckout() {
+    pendingCheckout = null;
+    document.getElementById('checkout-pending-section').style.display = 'none';
+}
+
+async function resolveCheckout(action) {
+    if (!pendingCheckout) return;
+    try {
+        const response = await fetch(checkoutUrl(pendingCheckout, action), {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({b2b_number: document.getElementById('checkout-b2b-number').value.trim() || null})
+        });
+        const result = await response.json();
+
+        if (result.success) {
+            hidePendingCheckout();
+            loadPendingCheckout();
+        } else {
+            document.getElementById('checkout-pending-error').textContent = result.error;
+        }
+    } catch (error) {
+        console.error(`Failed to ${action} checkout:`, error);
+    }
+}
+
+// Pick up an unconfirmed checkout after a reload or one started from another tab
+async function loadPendingCheckout() {
+    try {
+        const response = await fetch('/api/queue');
+        const queue = await response.json();
+        let job = (queue.awaiting_confirmation || [])[0];
+
+        if (!job) {
+            const ordersResponse = await fetch('/api/orders?awaiting=1');
+            const order = ((await ordersResponse.json()).orders || [])[0];
+            job = order && {id: null, order_id: order.order_id, result: {draft_b2b_number: order.draft_b2b_number}};
+        }
+
+        if (job) {
+            showPendingCheckout(job);
+        } else if (pendingCheckout) {
+            hidePendingCheckout();
+        }
+    } catch (error) {
+        console.error('Failed to load pending checkout:', error);
+    }
+}
+
+document.getElementById('confirm-checkout-btn').addEventListener('click', () => resolveCheckout('confirm'));
+document.getElementById('discard-checkout-btn').addEventListener('click', () => resolveCheckout('discard'));
+
+// Waterfall of one job's spans, colored by kind
+const timelineColors = {
+    step: '#6c757d', connect: '#0d6efd', tab: '#6610f2', click: '#d63384',
+    page_load: '#fd7e14', sleep: '#ffc107', wait: '#20c997', settle: '#0dcaf0'
+};
+
+async function loadTimeline(timelineId) {
+    if (!timelineId) return;
+    try {
+        const response = await fetch(`/api/timelines/${timelineId}`);
+        if (response.ok) {
+            showTimeline(await response.json());
+        }
+    } catch (error) {
+        console.error('Failed to load timeline:', error);
+    }
+}
+
+function showTimeline(timeline) {
+    const total = Math.max(timeline.duration || 0, 0.001);
+    const rows = document.getElementById('timeline-rows');
+    rows.innerHTML = '';
+    timeline.spans.forEach(span => {
+        const duration = span.duration ?? (total - span.start);
+        const row = document.createElement('div');
+        row.className = 'timeline-row';
+        row.innerHTML = `
+            <div class="timeline-label" style="padding-left: ${span.depth * 12}px"></div>
+            <div class="timeline-track">
+                <div class="timeline-bar" style="left: ${100 * span.start / total}%; width: ${Math.max(100 * duration / total, 0.3)}%; background-color: ${timelineColors[span.kind] || '#adb5bd'}"></div>
+            </div>
+            <div class="timeline-duration">${duration.toFixed(2)}s</div>
+        `;
+        row.querySelector('.timeline-label').textContent = span.name;
+        row.querySelector('.timeline-bar').title = `${span.kind}: ${duration.toFixed(3)}s`;
+        rows.appendChild(row);
+    });
+
+    document.getElementById('timeline-legend').innerHTML = Object.entries(timeline.totals).map(([kind, seconds]) =>
+        `<span class="me-3"><span class="timeline-swatch" style="background-color: ${timelineColors[kind] || '#adb5bd'}"></span>${kind} ${seconds.toFixed(2)}s</span>`
+    ).join('');
+    document.getElementById('timeline-summary').textContent =
+        `${timeline.kind}${timeline.order_id ? ` #${timeline.order_id}` : ''}: ${total.toFixed(2)}s` +
+        (timeline.success === false ? ' (failed)' : '');
+    document.getElementById('timeline-section').style.display = 'block';
+}
+
+// Display per-SKU import preview report
+function showImportReport(report) {
+    const section = document.getElementById('import-report-section');
+    if (!report) {
+        section.style.display = 'none';
+        return;
+    }
+
+    const statusClass = {matched: 'text-success', unknown: 'text-danger', quantity_changed: 'text-warning'};
+    const tbody = document.getElementById('import-report-tbody');
+    tbody.innerHTML = '';
+    report.rows.forEach(item => {
+        const row = tbody.insertRow();
+        row.innerHTML = `
+            <td>${item.sku}</td>
+            <td>${item.requested_quantity ?? '-'}</td>
+            <td>${item.quantity ?? '-'}</td>
+            <td class="${statusClass[item.status] || ''}">${item.status.replace('_', ' ')}</td>
+        `;
+    });
+
+    document.getElementById('import-report-summary').textContent =
+        `${report.matched} matched, ${report.unknown} unknown, ${report.quantity_changed} quantity changed`;
+    section.style.display = 'block';
+}
+
 // Display order data
 function displayOrderData(data) {
+    currentOrderId = data.order_id || null;
+
     const tbody = document.getElementById('products-tbody');
     tbody.innerHTML = '';
     
+    const unknownSkus = {};
+    (data.sku_validation?.unknown || []).forEach(item => {
+        unknownSkus[item.sku] = item.suggestions;
+    });
+
     if (data.products && data.products.length > 0) {
         data.products.forEach(product => {
-            addProductRow(product.sku, product.quantity);
+            const row = addProductRow(product.sku, product.quantity);
+            if (product.sku in unknownSkus) {
+                markUnknownSku(row, unknownSkus[product.sku]);
+            }
         });
     }
 
@@ -454,6 +774,17 @@ function addProductRow(sku = '', quantity = '') {
     row.querySelector('.remove-product-btn').addEventListener('click', () => {
         row.remove();
     });
+
+    return row;
+}
+
+// Highlight SKU not found in the local catalog
+function markUnknownSku(row, suggestions) {
+    const input = row.querySelector('.product-sku');
+    input.classList.add('is-invalid');
+    input.title = suggestions.length > 0
+        ? `Unknown at B2B Hendi. Did you mean: ${suggestions.join(', ')}?`
+        : 'Unknown at B2B Hendi';
 }
 
 // Add product button
@@ -514,15 +845,12 @@ document.getElementById('import-to-b2b-btn').addEventListener('click', async ()
     }
     
     try {
-        await fetch('/api/complete-order', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({
-                products: products,
-                address: address,
-                email: email,
-                payment_amount: payment_amount
-            })
+        await completeOrder({
+            products: products,
+            address: address,
+            email: email,
+            payment_amount: payment_amount,
+            order_id: currentOrderId
         });
     } catch (error) {
         console.error('Failed to complete order:', error);
@@ -532,7 +860,16 @@ document.getElementById('import-to-b2b-btn').addEventListener('click', async ()
 // Auto-refresh
 statusInterval = setInterval(updateStatus, 5000);
 logsInterval = setInterval(updateLogs, 2000);
+checkoutInterval = setInterval(loadPendingCheckout, 5000);
+
+// Large order threshold from config
+fetch('/api/config')
+    .then(response => response.json())
+    .then(config => {
+        largeOrderThreshold = config.large_order?.threshold ?? largeOrderThreshold;
+    });
 
 // Initial updates
 updateStatus();
-updateLogs();
\ No newline at end of file
+updateLogs();
+loadPendingCheckout();
\ No newline at end of file
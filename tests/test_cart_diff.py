@@ -0,0 +1,69 @@
+from extractors.cart_diff import cart_quantities, diff_cart, missing_from_cart
+
+
+def test_empty_cart_imports_everything():
+    delta = diff_cart([{'sku': 'A1', 'quantity': 2}, {'sku': 'B2', 'quantity': '3 szt.'}], [])
+
+    assert delta['add'] == [{'sku': 'A1', 'quantity': 2}, {'sku': 'B2', 'quantity': 3}]
+    assert delta['adjust'] == [] and delta['extra'] == []
+    assert delta['unchanged'] == 0 and delta['cart_lines'] == 0
+
+
+def test_partial_cart_imports_only_missing_quantity():
+    delta = diff_cart(
+        [{'sku': 'a1', 'quantity': 5}, {'sku': 'B2', 'quantity': 1}],
+        [{'sku': ' A1 ', 'quantity': '2'}, {'sku': 'b2', 'quantity': 1}]
+    )
+
+    assert delta['add'] == [{'sku': 'a1', 'quantity': 3}]
+    assert delta['unchanged'] == 1
+
+
+def test_quantity_above_target_is_adjusted_down():
+    delta = diff_cart([{'sku': 'A1', 'quantity': 2}], [{'sku': 'A1', 'quantity': 6}])
+
+    assert delta['add'] == []
+    assert delta['adjust'] == [{'sku': 'A1', 'quantity': 2, 'cart_quantity': 6}]
+
+
+def test_duplicate_lines_are_summed():
+    delta = diff_cart(
+        [{'sku': 'A1', 'quantity': 1}, {'sku': 'a1', 'quantity': 2}],
+        [{'sku': 'A1', 'quantity': 1}, {'sku': 'A1', 'quantity': 1}]
+    )
+
+    assert delta['add'] == [{'sku': 'A1', 'quantity': 1}]
+    assert delta['cart_lines'] == 1
+
+
+def test_extra_lines_are_reported_and_removed_only_when_asked():
+    products = [{'sku': 'A1', 'quantity': 1}]
+    cart = [{'sku': 'A1', 'quantity': 1}, {'sku': 'Z9', 'quantity': 4}]
+
+    kept = diff_cart(products, cart)
+    removed = diff_cart(products, cart, remove_extra=True)
+
+    assert kept['extra'] == [{'sku': 'Z9', 'cart_quantity': 4}]
+    assert kept['adjust'] == []
+    assert removed['adjust'] == [{'sku': 'Z9', 'quantity': 0, 'cart_quantity': 4}]
+
+
+def test_cart_quantities_by_key():
+    assert cart_quantities([{'sku': 'a1', 'quantity': '2'}, {'sku': 'A1 ', 'quantity': 3}]) == {'A1': 5}
+
+
+def test_missing_from_cart_compares_what_arrived():
+    products = [{'sku': 'A1', 'quantity': 3}, {'sku': 'B2', 'quantity': 2}, {'sku': 'C3', 'quantity': 1}]
+    before = [{'sku': 'A1', 'quantity': 1}]
+    after = [{'sku': 'A1', 'quantity': 4}, {'sku': 'B2', 'quantity': 1}]
+
+    assert missing_from_cart(products, before, after) == [
+        {'sku': 'B2', 'quantity': 1},
+        {'sku': 'C3', 'quantity': 1}
+    ]
+
+
+def test_nothing_missing_after_full_add():
+    products = [{'sku': 'A1', 'quantity': 2}]
+
+    assert missing_from_cart(products, [], [{'sku': 'a1', 'quantity': 2}]) == []
@@ -0,0 +1,69 @@
+from extractors.consolidation import allocation_report, consolidate_orders
+
+ORDERS = [
+    {'order_id': 101, 'products': [{'sku': 'H-1001', 'quantity': 2}, {'sku': '2002', 'quantity': '1 szt.'}]},
+    {'order_id': 102, 'products': [{'sku': '1001 ', 'quantity': 3}, {'sku': 'H-3003', 'quantity': 0}]},
+    {'order_id': 103, 'products': [{'sku': 'h-1001', 'quantity': 1}, {'sku': '2002', 'quantity': 4}]},
+]
+
+
+def test_quantities_are_summed_per_normalised_sku():
+    merged = consolidate_orders(ORDERS)
+
+    assert merged['products'] == [
+        {'sku': '1001', 'quantity': 5},
+        {'sku': '2002', 'quantity': 5},
+        {'sku': 'h-1001', 'quantity': 1},
+    ]
+
+
+def test_allocation_keeps_each_orders_share():
+    allocation = consolidate_orders(ORDERS)['allocation']
+
+    assert allocation[0] == {
+        'sku': '1001',
+        'quantity': 5,
+        'orders': [{'order_id': '101', 'quantity': 2}, {'order_id': '102', 'quantity': 3}]
+    }
+    assert allocation[1]['orders'] == [{'order_id': '101', 'quantity': 1}, {'order_id': '103', 'quantity': 4}]
+
+
+def test_zero_quantities_and_orders_without_products_are_skipped():
+    merged = consolidate_orders([{'order_id': 1, 'products': None}, {'order_id': 2, 'products': [
+        {'sku': 'H-9', 'quantity': 'brak'}
+    ]}])
+
+    assert merged == {'products': [], 'allocation': []}
+
+
+def test_prefix_is_configurable():
+    merged = consolidate_orders([{'order_id': 1, 'products': [{'sku': 'X-5', 'quantity': 1}]}], remove_prefix='X-')
+
+    assert merged['products'] == [{'sku': '5', 'quantity': 1}]
+
+
+def test_report_without_import_report_has_no_statuses():
+    report = allocation_report(consolidate_orders(ORDERS)['allocation'])
+
+    assert [order['order_id'] for order in report] == ['101', '102', '103']
+    assert report[0]['lines'] == [
+        {'sku': '1001', 'quantity': 2, 'consolidated_quantity': 5, 'status': None},
+        {'sku': '2002', 'quantity': 1, 'consolidated_quantity': 5, 'status': None},
+    ]
+    assert all(order['issues'] == 0 for order in report)
+
+
+def test_report_flags_lines_the_import_did_not_match():
+    import_report = {'rows': [{'sku': '2002', 'status': 'unknown'}, {'sku': '1001 ', 'status': 'matched'}]}
+    report = allocation_report(consolidate_orders(ORDERS)['allocation'], import_report)
+
+    by_order = {order['order_id']: order for order in report}
+    assert by_order['101']['issues'] == 1
+    assert by_order['102']['issues'] == 0
+    assert [line['status'] for line in by_order['103']['lines']] == ['unknown', 'matched']
+
+
+def test_lines_missing_from_the_import_report_count_as_matched():
+    report = allocation_report(consolidate_orders(ORDERS)['allocation'], {'rows': []})
+
+    assert all(line['status'] == 'matched' for order in report for line in order['lines'])
@@ -0,0 +1,77 @@
+from corpus import compare, keep_selectors
+
+
+def run(label, entries):
+    return {
+        'label': label,
+        'entries': {
+            name: {'values': values, 'timings': timings}
+            for name, (values, timings) in entries.items()
+        }
+    }
+
+
+def test_compare_reports_changed_fields_only():
+    baseline = run('before', {
+        'a-baselinker': ({'order_id': '1', 'b2b_number': None}, {'order_id': 10}),
+        'b-b2b': ({'b2b_number': '123/45'}, {'b2b_number': 20}),
+    })
+    candidate = run('after', {
+        'a-baselinker': ({'order_id': '1', 'b2b_number': '77'}, {'order_id': 10}),
+        'b-b2b': ({'b2b_number': '123/45'}, {'b2b_number': 20}),
+    })
+
+    result = compare(baseline, candidate)
+
+    assert result['baseline'] == 'before' and result['candidate'] == 'after'
+    assert result['entries'] == 2
+    assert result['changed'] == {'a-baselinker': {'b2b_number': {'before': None, 'after': '77'}}}
+
+
+def test_compare_lists_entries_missing_from_either_run():
+    baseline = run('before', {'old': ({}, {}), 'both': ({}, {})})
+    candidate = run('after', {'new': ({'order_id': '5'}, {}), 'both': ({}, {})})
+
+    result = compare(baseline, candidate)
+
+    assert result['only_in_baseline'] == ['old']
+    assert result['only_in_candidate'] == ['new']
+    # New entries have nothing to compare against
+    assert result['changed'] == {}
+
+
+def test_compare_median_total_time_and_change():
+    baseline = run('before', {
+        'a': ({}, {'products': 30, 'phone': 10}),
+        'b': ({}, {'products': 60}),
+        'c': ({}, {'products': 100}),
+    })
+    candidate = run('after', {
+        'a': ({}, {'products': 20, 'phone': 10}),
+        'b': ({}, {'products': 45}),
+        'c': ({}, {'products': 80}),
+    })
+
+    result = compare(baseline, candidate)
+
+    assert result['median_ms'] == {'baseline': 60, 'candidate': 45}
+    assert result['median_change'] == -0.25
+
+
+def test_compare_empty_runs():
+    result = compare(run('before', {}), run('after', {}))
+
+    assert result['median_ms'] == {'baseline': None, 'candidate': None}
+    assert result['median_change'] is None
+
+
+def test_keep_selectors_follow_the_configured_baselinker_selectors():
+    config = {
+        'baselinker_selectors': {'products_container': ['items', 'items_v2'], 'paid_amount': '.paid'},
+        'corpus': {'extra_keep_selectors': ['.order-summary']}
+    }
+
+    assert keep_selectors(config, 'baselinker') == [
+        '#items', '#items_v2', '#sale_total_price', '#oms_info_extra_field_1', '.paid', '.order-summary'
+    ]
+    assert keep_selectors(config, 'b2b') == ['.order-summary']
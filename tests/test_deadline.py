@@ -0,0 +1,90 @@
+import pytest
+
+from extractors import deadline as deadline_module
+from extractors.deadline import Deadline, DeadlineExceeded
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(deadline_module.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(deadline_module.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_clamp_without_budget_keeps_wait(clock):
+    deadline = Deadline(None)
+
+    assert deadline.clamp(30, 'modal') == 30
+    assert deadline.remaining() is None
+    assert deadline.last_wait is None
+
+
+def test_clamp_within_budget_keeps_wait(clock):
+    deadline = Deadline(10)
+    clock.now += 4
+
+    assert deadline.clamp(6, 'modal') == 6
+    assert deadline.last_wait is None
+
+
+def test_clamp_beyond_budget_uses_remaining(clock):
+    deadline = Deadline(10)
+    clock.now += 7
+
+    assert deadline.clamp(5, 'preview rows') == pytest.approx(3)
+    assert deadline.last_wait == 'preview rows'
+
+
+def test_clamp_after_expiry_is_zero(clock):
+    deadline = Deadline(10)
+    clock.now += 12
+
+    assert deadline.clamp(5, 'checkout') == 0
+    assert deadline.expired
+
+
+def test_clamp_passes_none_through(clock):
+    assert Deadline(10).clamp(None, 'implicit wait') is None
+
+
+def test_sleep_is_clamped(clock):
+    deadline = Deadline(2)
+    deadline.sleep(5, 'after click')
+    deadline.sleep(1, 'after click')
+
+    assert clock.slept == [2]
+
+
+def test_check_raises_once_spent(clock):
+    deadline = Deadline(3)
+    deadline.check('open_order')
+    clock.now += 3
+
+    with pytest.raises(DeadlineExceeded) as error:
+        deadline.check('import_products')
+    assert error.value.step == 'import_products'
+    assert error.value.budget == 3
+
+
+def test_report_names_the_clamped_wait(clock):
+    deadline = Deadline(4)
+    clock.now += 3
+    deadline.clamp(10, 'cart rows')
+
+    assert deadline.report('read_cart') == {
+        'step': 'read_cart', 'budget': 4, 'elapsed': 3.0, 'waiting_for': 'cart rows'
+    }
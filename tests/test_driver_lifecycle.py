@@ -0,0 +1,212 @@
+import itertools
+import json
+import os
+
+import pytest
+
+from extractors import driver_lifecycle
+from extractors.driver_lifecycle import DriverLifecycle
+
+PIDS = itertools.count(5000)
+
+
+class FakeProcess:
+    def __init__(self):
+        self.pid = next(PIDS)
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = -15
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+class FakeService:
+    def __init__(self):
+        self.process = FakeProcess()
+
+
+class FakeDriver:
+    def __init__(self):
+        self.service = FakeService()
+        self.window_handles = ['main']
+
+
+class FakeExtractor:
+    _chrome_host = '127.0.0.1'
+    chrome_debug_port = 9222
+
+    def create_driver(self):
+        return FakeDriver()
+
+
+@pytest.fixture
+def rss(monkeypatch, tmp_path):
+    monkeypatch.setattr(driver_lifecycle, 'DEFAULT_PIDS_PATH', str(tmp_path / 'pids'))
+    sizes = {}
+    monkeypatch.setattr(driver_lifecycle, 'process_rss', lambda pid: sizes.get(pid, 0))
+    return sizes
+
+
+def test_idle_driver_is_reused(rss):
+    lifecycle = DriverLifecycle({'max_processes': 2})
+    first = lifecycle.acquire(FakeExtractor())
+    lifecycle.release(first)
+
+    assert lifecycle.acquire(FakeExtractor()) is first
+    assert lifecycle.started_total == 1
+    assert lifecycle.reused_total == 1
+
+
+def test_process_cap_stops_oldest_idle_driver(rss):
+    lifecycle = DriverLifecycle({'max_processes': 2})
+    extractor = FakeExtractor()
+    oldest, newer = lifecycle.acquire(extractor), lifecycle.acquire(extractor)
+    lifecycle.release(oldest)
+    lifecycle.release(newer)
+    lifecycle._entries[id(oldest)]['last_used'] -= 10
+
+    lifecycle.enforce_caps(reserve=1)
+
+    assert oldest.service.process.poll() is not None
+    assert newer.service.process.poll() is None
+    assert lifecycle.snapshot()['processes'] == 1
+    assert lifecycle.stopped_total == 1
+
+
+def test_process_cap_with_every_driver_in_use_raises(rss):
+    lifecycle = DriverLifecycle({'max_processes': 1})
+    busy = lifecycle.acquire(FakeExtractor())
+
+    with pytest.raises(RuntimeError, match='cap reached'):
+        lifecycle.acquire(FakeExtractor())
+    assert busy.service.process.poll() is None
+
+
+def test_memory_cap_stops_idle_drivers_until_it_holds(rss):
+    lifecycle = DriverLifecycle({'max_processes': 5, 'max_rss_mb': 100})
+    extractor = FakeExtractor()
+    drivers = [lifecycle.acquire(extractor) for _ in range(3)]
+    for age, driver in enumerate(drivers):
+        rss[driver.service.process.pid] = 40 * 1024 * 1024
+        lifecycle.release(driver)
+        lifecycle._entries[id(driver)]['last_used'] -= 10 - age
+
+    lifecycle.enforce_caps()
+
+    assert [driver.service.process.poll() is None for driver in drivers] == [False, True, True]
+
+
+def test_memory_cap_with_busy_drivers_raises(rss):
+    lifecycle = DriverLifecycle({'max_processes': 5, 'max_rss_mb': 10})
+    busy = lifecycle.acquire(FakeExtractor())
+    rss[busy.service.process.pid] = 20 * 1024 * 1024
+
+    with pytest.raises(RuntimeError, match='memory cap'):
+        lifecycle.enforce_caps()
+
+
+def test_reap_drops_exited_and_stops_expired_drivers(rss):
+    lifecycle = DriverLifecycle({'idle_timeout': 60})
+    extractor = FakeExtractor()
+    exited, expired, busy = (lifecycle.acquire(extractor) for _ in range(3))
+    exited.service.process.returncode = 1
+    lifecycle.release(expired)
+    lifecycle._entries[id(expired)]['last_used'] -= 120
+
+    lifecycle.reap()
+
+    assert expired.service.process.poll() is not None
+    assert list(lifecycle._entries) == [id(busy)]
+
+
+class Observer:
+    def __init__(self):
+        self.detached = []
+
+    def detach(self, driver):
+        self.detached.append(driver)
+
+
+def test_reused_driver_is_detached_from_the_previous_jobs_observers(rss):
+    lifecycle = DriverLifecycle()
+    driver = lifecycle.acquire(FakeExtractor())
+    timeline, recorder = Observer(), Observer()
+    lifecycle.release(driver, (timeline, None, recorder))
+
+    assert timeline.detached == [] and recorder.detached == []
+    assert lifecycle.acquire(FakeExtractor()) is driver
+    assert timeline.detached == [driver] and recorder.detached == [driver]
+
+
+class FakePsutilProcess:
+    def __init__(self, table, pid):
+        if pid not in table:
+            raise FakePsutil.Error()
+        self.table, self.pid = table, pid
+
+    def name(self):
+        return self.table[self.pid]['name']
+
+    def create_time(self):
+        return self.table[self.pid]['started']
+
+    def terminate(self):
+        self.table[self.pid]['terminated'] = True
+
+    def wait(self, timeout=None):
+        pass
+
+
+class FakePsutil:
+    class Error(Exception):
+        pass
+
+    class TimeoutExpired(Error):
+        pass
+
+    def __init__(self, table):
+        self.table = table
+
+    def Process(self, pid):
+        return FakePsutilProcess(self.table, pid)
+
+
+def write_pid_file(directory, owner, owner_started, drivers):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{owner}.json"), 'w', encoding='utf-8') as f:
+        json.dump({'owner': owner, 'owner_started': owner_started,
+                   'drivers': {str(pid): started for pid, started in drivers.items()}}, f)
+
+
+def test_orphan_reaping_only_stops_chromedrivers_this_app_recorded(rss, monkeypatch, tmp_path):
+    table = {
+        os.getpid(): {'name': 'python', 'started': 1.0},
+        # Owner of a live sibling instance (e.g. the broker)
+        4001: {'name': 'python', 'started': 2.0},
+        # Left behind by a run that has exited
+        6001: {'name': 'chromedriver', 'started': 10.0},
+        # Recorded pid since reused by another program
+        6002: {'name': 'chromedriver', 'started': 99.0},
+        # The sibling's chromedriver
+        6003: {'name': 'chromedriver', 'started': 30.0},
+        # Another application's chromedriver, never recorded
+        6004: {'name': 'chromedriver', 'started': 40.0},
+    }
+    monkeypatch.setattr(driver_lifecycle, 'psutil', FakePsutil(table))
+    pids = str(tmp_path / 'pids')
+    write_pid_file(pids, 3001, 5.0, {6001: 10.0, 6002: 20.0})
+    write_pid_file(pids, 4001, 2.0, {6003: 30.0})
+
+    lifecycle = DriverLifecycle({'pids_path': pids})
+
+    assert lifecycle.reap_orphans() == 1
+    assert [pid for pid, process in table.items() if process.get('terminated')] == [6001]
+    assert sorted(os.listdir(pids)) == ['4001.json']
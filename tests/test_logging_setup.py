@@ -0,0 +1,69 @@
+import atexit
+import gzip
+import logging
+
+import pytest
+
+from logging_setup import OFF_LEVEL, _parse_level, create_file_handler, setup_logging
+
+
+def write_records(handler, count, size=100):
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for index in range(count):
+        handler.emit(logging.LogRecord('test', logging.INFO, __file__, 0, f"{index:04d}" + 'x' * size, None, None))
+    handler.close()
+
+
+def test_size_rotation_gzips_segments(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = create_file_handler({'logging': {'file': str(log_file), 'max_bytes': 500, 'backup_count': 2}})
+    write_records(handler, 20)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['app.log', 'app.log.1.gz', 'app.log.2.gz']
+    with gzip.open(tmp_path / 'app.log.1.gz', 'rt', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines and all(line.endswith('x' * 100) for line in lines)
+
+
+def test_rotation_without_compression(tmp_path):
+    log_file = tmp_path / 'app.log'
+    handler = create_file_handler({'logging': {'file': str(log_file), 'max_bytes': 500, 'backup_count': 1,
+                                               'compress': False}})
+    write_records(handler, 20)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['app.log', 'app.log.1']
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('debug', logging.DEBUG),
+    ('WARNING', logging.WARNING),
+    ('off', OFF_LEVEL),
+    ('nonsense', logging.INFO),
+    (None, logging.INFO),
+])
+def test_parse_level(value, expected):
+    assert _parse_level(value) == expected
+
+
+def test_setup_logging_writes_through_the_queue(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    log_file = tmp_path / 'app.log'
+    try:
+        listener = setup_logging({'logging': {'file': str(log_file)}, 'options': {'log_level': 'INFO'}})
+        logging.getLogger('test').info('queued line')
+        logging.getLogger('test').debug('filtered line')
+        listener.stop()
+        atexit.unregister(listener.stop)
+        for handler in listener.handlers:
+            handler.close()
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+
+    content = log_file.read_text(encoding='utf-8')
+    assert 'INFO - queued line' in content
+    assert 'filtered line' not in content
@@ -0,0 +1,111 @@
+import json
+
+from extractors.order_payload import lookup, map_order_payload, parse_payloads
+
+FIELDS = {
+    'order_id': 'order.order_id',
+    'products': 'order.products',
+    'product_sku': 'sku',
+    'product_quantity': 'quantity',
+    'total_price': 'order.total_price',
+    'paid_amount': 'order.payment_done',
+    'phone': 'order.phone',
+    'email': 'order.email',
+    'b2b_number': 'order.extra_field_1',
+    'address': {
+        'name': 'order.delivery_fullname',
+        'company': 'order.delivery_company',
+        'address': 'order.delivery_address',
+        'city': 'order.delivery_city',
+        'postal_code': 'order.delivery_postcode'
+    }
+}
+
+
+def payload(**order):
+    base = {
+        'order_id': 555,
+        'products': [{'sku': 'H-1001', 'quantity': 2}, {'sku': '2002 ', 'quantity': '1'}],
+        'total_price': '120,50',
+        'payment_done': '120.50',
+        'phone': '+48 600 100 200',
+        'email': 'klient@example.com',
+        'extra_field_1': '...',
+        'delivery_fullname': 'Jan Testowy',
+        'delivery_address': 'Polna 1',
+        'delivery_city': 'Poznań',
+        'delivery_postcode': '60-001'
+    }
+    base.update(order)
+    return {'order': base}
+
+
+def test_lookup_walks_dicts_and_list_indexes():
+    data = {'items': [{'sku': 'A'}, {'sku': 'B'}]}
+
+    assert lookup(data, 'items.1.sku') == 'B'
+    assert lookup(data, 'items.5.sku') is None
+    assert lookup(data, 'items.x') is None
+    assert lookup(data, '') is None
+
+
+def test_maps_order_onto_extractor_result():
+    result = map_order_payload(payload(), FIELDS, order_id='555')
+
+    assert result == {
+        'b2b_number': None,
+        'products': [{'sku': '1001', 'quantity': '2'}, {'sku': '2002', 'quantity': '1'}],
+        'payment_amount': '120.5',
+        'phone': '600100200',
+        'email': 'klient@example.com',
+        'address': {'name': 'Jan Testowy', 'company': '', 'address': 'Polna 1', 'city': 'Poznań',
+                    'postal_code': '60-001'}
+    }
+
+
+def test_partially_paid_order_has_no_payment_amount():
+    result = map_order_payload(payload(payment_done='50'), FIELDS)
+
+    assert result['payment_amount'] == '0'
+
+
+def test_b2b_number_is_kept_unless_configured_as_empty():
+    assert map_order_payload(payload(extra_field_1='4711'), FIELDS)['b2b_number'] == '4711'
+    assert map_order_payload(payload(extra_field_1='-'), FIELDS,
+                             {'skip_b2b_number_values': ['-']})['b2b_number'] is None
+
+
+def test_products_keyed_by_id_are_accepted():
+    result = map_order_payload(payload(products={'9': {'sku': 'H-7', 'quantity': 3}}), FIELDS)
+
+    assert result['products'] == [{'sku': '7', 'quantity': '3'}]
+
+
+def test_payload_of_another_order_is_rejected():
+    assert map_order_payload(payload(), FIELDS, order_id='556') is None
+
+
+def test_payload_without_usable_products_is_rejected():
+    assert map_order_payload(payload(products=[]), FIELDS) is None
+    assert map_order_payload(payload(products=[{'sku': '', 'quantity': 1}]), FIELDS) is None
+
+
+def test_prefixes_follow_data_processing():
+    result = map_order_payload(payload(phone='+49 151 1', products=[{'sku': 'X-5', 'quantity': 1}]), FIELDS,
+                               {'remove_sku_prefix': 'X-', 'remove_phone_prefix': '+49'})
+
+    assert result['products'] == [{'sku': '5', 'quantity': '1'}]
+    assert result['phone'] == '1511'
+
+
+def test_parse_payloads_filters_by_url_newest_first():
+    captured = [
+        {'url': '/orders/getOrder?id=1', 'body': json.dumps({'n': 1})},
+        {'url': '/stats', 'body': json.dumps({'n': 2})},
+        {'url': '/orders/getOrder?id=1', 'body': 'not json'},
+        {'url': '/orders/getOrder?id=1', 'body': json.dumps({'n': 3})},
+    ]
+
+    assert parse_payloads(captured, r'getOrder') == [{'n': 3}, {'n': 1}]
+    assert len(parse_payloads(captured, '')) == 3
+    assert parse_payloads(None, r'getOrder') == []
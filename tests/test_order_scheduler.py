@@ -0,0 +1,149 @@
+import pytest
+
+from order_scheduler import OrderScheduler, TokenBucket, classify
+
+# Unlimited sites, so only priority and fairness decide the order
+OPEN_SITES = {
+    'b2b': {'rate_per_minute': 6000, 'burst': 100, 'max_concurrent': 10},
+    'baselinker': {'rate_per_minute': 6000, 'burst': 100, 'max_concurrent': 10}
+}
+
+
+def scheduler(**settings):
+    settings.setdefault('sites', OPEN_SITES)
+    return OrderScheduler(settings, runner=lambda job: {'success': True})
+
+
+def drain(queue, now):
+    """Order ids in the order _next_job hands them out"""
+    picked = []
+    while True:
+        job, _ = queue._next_job(now)
+        if job is None:
+            return picked
+        picked.append(job['order_id'])
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    bucket = TokenBucket(rate=0.5, burst=2)
+    bucket.updated = 100.0
+
+    bucket.take(100.0)
+    bucket.take(100.0)
+    assert bucket.wait_time(100.0) == pytest.approx(2.0)
+    assert bucket.wait_time(101.0) == pytest.approx(1.0)
+    assert bucket.wait_time(102.0) == 0.0
+
+
+def test_bucket_does_not_exceed_burst():
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.updated = 100.0
+    bucket.wait_time(1000.0)
+
+    assert bucket.tokens == 2
+
+
+def test_bucket_without_rate_never_refills():
+    bucket = TokenBucket(rate=0, burst=1)
+    bucket.take(100.0)
+
+    assert bucket.wait_time(200.0) == float('inf')
+
+
+@pytest.mark.parametrize('order, expected', [
+    ({'priority': 'cod', 'express': True}, 'cod'),
+    ({'express': True}, 'express'),
+    ({'delivery_method': 'Kurier 24 DPD'}, 'express'),
+    ({'payment_amount': '120,50'}, 'paid'),
+    ({'payment_amount': '0'}, 'cod'),
+    ({'payment_amount': 'n/a'}, 'cod'),
+    ({}, 'cod'),
+])
+def test_classify(order, expected):
+    assert classify(order) == expected
+
+
+def test_classes_run_in_priority_order():
+    queue = scheduler(promote_after=0)
+    queue.submit({'order_id': 1, 'priority': 'cod'})
+    queue.submit({'order_id': 2, 'priority': 'paid'})
+    queue.submit({'order_id': 3, 'priority': 'express'})
+
+    assert drain(queue, queue._jobs['3']['_queued']) == [3, 2, 1]
+
+
+def test_operators_take_turns_within_a_class():
+    queue = scheduler(promote_after=0)
+    for order_id in (1, 2, 3):
+        queue.submit({'order_id': order_id, 'priority': 'paid'}, operator='anna')
+    queue.submit({'order_id': 4, 'priority': 'paid'}, operator='piotr')
+    queue.submit({'order_id': 5, 'priority': 'paid'}, operator='piotr')
+
+    assert drain(queue, queue._jobs['5']['_queued']) == [1, 4, 2, 5, 3]
+
+
+def test_waiting_jobs_are_promoted_one_class_per_interval():
+    queue = scheduler(promote_after=60)
+    queue.submit({'order_id': 1, 'priority': 'cod'})
+    old = queue._jobs['1']['_queued']
+    queue._jobs['1']['_queued'] = old - 120
+    queue.submit({'order_id': 2, 'priority': 'paid'})
+
+    assert queue._effective_class(queue._jobs['1'], old) == 0
+    # Promoted to express, it overtakes the newer paid order
+    assert drain(queue, old) == [1, 2]
+
+
+def test_rate_limited_site_reports_the_wait():
+    queue = scheduler(sites={'b2b': {'rate_per_minute': 6, 'burst': 1, 'max_concurrent': 1}})
+    queue.submit({'order_id': 1})
+    now = queue._jobs['1']['_queued']
+    queue.sites['b2b'].bucket.take(now)
+
+    job, wait = queue._next_job(now)
+    assert job is None
+    assert wait == pytest.approx(10.0)
+
+
+def test_held_site_blocks_only_jobs_that_use_it():
+    queue = scheduler()
+    queue.sites['b2b'].held_by = '99'
+    queue.submit({'order_id': 1, 'priority': 'express'})
+    queue.submit({'order_id': 2, 'priority': 'cod'}, kind='extract')
+
+    assert drain(queue, queue._jobs['2']['_queued']) == [2]
+    assert queue._next_job(queue._jobs['2']['_queued']) == (None, None)
+
+
+def test_checkout_awaiting_confirmation_holds_the_site_until_released():
+    runs = []
+
+    def runner(job):
+        runs.append(job['order_id'])
+        return {'success': True, 'awaiting_confirmation': job['order_id'] == 1}
+
+    queue = OrderScheduler({'sites': OPEN_SITES}, runner).start()
+    try:
+        first = queue.submit({'order_id': 1})
+        assert queue.wait(first['id'], timeout=5)['status'] == 'awaiting_confirmation'
+        assert queue.holder('b2b')['id'] == first['id']
+        assert queue.awaiting_job(1) == first['id']
+
+        second = queue.submit({'order_id': 2})
+        assert queue.wait(second['id'], timeout=0.2)['status'] == 'queued'
+
+        assert queue.release(first['id'], 'confirmed')['status'] == 'confirmed'
+        assert queue.wait(second['id'], timeout=5)['status'] == 'completed'
+        assert queue.holder('b2b') is None
+        assert runs == [1, 2]
+    finally:
+        queue.stop()
+
+
+def test_release_ignores_jobs_not_awaiting_confirmation():
+    queue = scheduler()
+    job = queue.submit({'order_id': 1})
+
+    assert queue.release(job['id'], 'discarded') is None
+    assert queue.cancel(job['id'])
+    assert queue.job(job['id'])['status'] == 'cancelled'
@@ -0,0 +1,22 @@
+from extractors.pii import pii_selectors
+
+
+def test_defaults():
+    assert pii_selectors({}) == ['#oms_info_phone', '#oms_info_email', '.jsAddAddressModal']
+
+
+def test_fallback_chains_give_one_selector_per_candidate():
+    config = {
+        'baselinker_selectors': {
+            'phone': ['oms_info_phone', 'phone2'],
+            'email': 'oms_info_email',
+            'address': {'name': ['delivery_fullname', ''], 'city': 'delivery_city', 'company': ''}
+        },
+        'b2b_selectors': {'address_modal': ['.jsAddAddressModal', '#address-modal']},
+        'corpus': {'extra_pii_selectors': ['.customer-notes']}
+    }
+
+    assert pii_selectors(config) == [
+        '#oms_info_phone', '#phone2', '#oms_info_email', '#delivery_fullname', '#delivery_city',
+        '.jsAddAddressModal', '#address-modal', '.customer-notes'
+    ]
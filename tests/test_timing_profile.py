@@ -0,0 +1,90 @@
+import json
+
+from extractors.timing_profile import TimingProfile
+
+
+def make_profile(tmp_path, **settings):
+    return TimingProfile(str(tmp_path / 'timing_profile.json'), settings)
+
+
+def test_uses_default_until_enough_samples(tmp_path):
+    profile = make_profile(tmp_path, min_samples=3)
+    profile.record('import_continue_1', 1.0)
+    profile.record('import_continue_1', 1.0)
+
+    assert profile.delay_for('import_continue_1', 2.5) == 2.5
+
+
+def test_tuned_delay_is_p95_with_headroom(tmp_path):
+    profile = make_profile(tmp_path, min_samples=5, headroom=1.5, max_delay=10)
+    for seconds in range(1, 21):
+        profile.record('checkout', seconds / 10)
+
+    # Nearest rank: ceil(0.95 * 20) = 19th of 0.1..2.0
+    assert profile.snapshot()['steps']['checkout']['p95'] == 1.9
+    assert profile.delay_for('checkout', 3) == 2.85
+
+
+def test_tuned_delay_is_capped(tmp_path):
+    profile = make_profile(tmp_path, min_samples=1, min_delay=0.5, max_delay=2)
+    profile.record('fast', 0.01)
+    profile.record('slow', 9)
+
+    assert profile.delay_for('fast', 1) == 0.5
+    assert profile.delay_for('slow', 1) == 2
+
+
+def test_disabled_profile_returns_default(tmp_path):
+    profile = make_profile(tmp_path, enabled=False, min_samples=1)
+    profile.record('checkout', 4)
+
+    assert profile.delay_for('checkout', 1.5) == 1.5
+
+
+def test_window_keeps_latest_samples(tmp_path):
+    profile = make_profile(tmp_path, window_size=3, min_samples=1, headroom=1, max_delay=100)
+    for seconds in (50, 1, 1, 1):
+        profile.record('checkout', seconds)
+
+    assert profile.snapshot()['steps']['checkout']['count'] == 3
+    assert profile.delay_for('checkout', 5) == 1
+
+
+def test_save_and_reload(tmp_path):
+    profile = make_profile(tmp_path, min_samples=2, headroom=1)
+    profile.delay_for('checkout', 2)
+    profile.record('checkout', 0.8)
+    profile.record('checkout', 1.2)
+    profile.save()
+
+    data = json.loads((tmp_path / 'timing_profile.json').read_text(encoding='utf-8'))
+    assert data['steps']['checkout']['samples'] == [0.8, 1.2]
+    assert data['steps']['checkout']['default'] == 2
+
+    reloaded = make_profile(tmp_path, min_samples=2, headroom=1)
+    assert reloaded.delay_for('checkout', 2) == 1.2
+
+
+def test_save_skips_unchanged_profile(tmp_path):
+    profile = make_profile(tmp_path)
+    profile.save()
+
+    assert not (tmp_path / 'timing_profile.json').exists()
+
+
+def test_corrupt_profile_starts_empty(tmp_path):
+    (tmp_path / 'timing_profile.json').write_text('{not json', encoding='utf-8')
+    profile = make_profile(tmp_path, min_samples=1)
+
+    assert profile.snapshot()['steps'] == {}
+    assert profile.delay_for('checkout', 1.5) == 1.5
+
+
+def test_reset_removes_profile(tmp_path):
+    profile = make_profile(tmp_path, min_samples=1)
+    profile.record('checkout', 1)
+    profile.save()
+    profile.reset()
+
+    assert not (tmp_path / 'timing_profile.json').exists()
+    assert profile.delay_for('checkout', 3) == 3